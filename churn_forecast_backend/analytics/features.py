@@ -0,0 +1,111 @@
+import pandas as pd
+from django.db.models import Avg, Count, Exists, F, OuterRef, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Customer, CustomerFeatures, Order
+
+# Bump when the stored features change meaning; rows with an older schema
+# version are recomputed on the next refresh
+FEATURE_SCHEMA_VERSION = 1
+
+STORED_FEATURES = [
+    'age', 'gender', 'country', 'subscription_status', 'signup_date', 'last_purchase_date',
+    'cancellations_count', 'purchase_frequency', 'ratings', 'total_orders', 'avg_order_value'
+]
+
+
+def stale_customers(customers=None):
+    """Customers whose stored features are missing, outdated or older than their data"""
+    customers = Customer.objects.all() if customers is None else customers
+    orders_changed = Order.objects.filter(
+        customer=OuterRef('pk'),
+        updated_at__gt=OuterRef('features__computed_at')
+    )
+    return customers.filter(
+        Q(features__isnull=True) |
+        Q(features__schema_version__lt=FEATURE_SCHEMA_VERSION) |
+        Q(updated_at__gt=F('features__computed_at')) |
+        Exists(orders_changed)
+    )
+
+
+def refresh_customer_features(customers=None, chunk_size=None):
+    """Recompute and upsert features for stale customers only
+
+    Args:
+        customers: Customer queryset to consider, defaults to all customers
+        chunk_size: Customers upserted per batch
+
+    Returns:
+        Number of customers whose features were recomputed
+    """
+    chunk_size = chunk_size or 10000
+    computed_at = timezone.now()
+    rows = Customer.objects.filter(pk__in=stale_customers(customers).values('pk')).annotate(
+        total_orders=Count('orders'),
+        avg_order_value=Avg('orders__quantity') * Avg('orders__product__unit_price')
+    ).values(
+        'pk', 'age', 'gender', 'country', 'subscription_status', 'signup_date', 'last_purchase_date',
+        'cancellations_count', 'purchase_frequency', 'ratings', 'total_orders', 'avg_order_value'
+    ).order_by('pk')
+
+    refreshed = 0
+    batch = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        customer_pk = row.pop('pk')
+        row['avg_order_value'] = row['avg_order_value'] or 0
+        batch.append(CustomerFeatures(
+            customer_id=customer_pk,
+            schema_version=FEATURE_SCHEMA_VERSION,
+            computed_at=computed_at,
+            **row
+        ))
+        if len(batch) >= chunk_size:
+            refreshed += upsert_features(batch)
+            batch = []
+    if batch:
+        refreshed += upsert_features(batch)
+    return refreshed
+
+
+def upsert_features(batch):
+    CustomerFeatures.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=['schema_version', 'computed_at', *STORED_FEATURES],
+        batch_size=1000
+    )
+    return len(batch)
+
+
+def customer_feature_frame(customers, chunk_size=None):
+    """Churn feature frame for a customer queryset, read from the feature store
+
+    Stale customers are refreshed first, so features are only recomputed
+    when the underlying customer or orders changed.
+    """
+    refresh_customer_features(customers, chunk_size=chunk_size)
+    rows = CustomerFeatures.objects.filter(
+        customer__in=customers.values('pk')
+    ).values_list('customer_id', 'customer__customer_id', *STORED_FEATURES).order_by('customer_id')
+
+    return pd.DataFrame.from_records(
+        rows.iterator(chunk_size=chunk_size or 10000),
+        columns=['customer_pk', 'customer_id', *STORED_FEATURES]
+    )
+
+
+def customer_features(customer):
+    """Stored features for one customer as a dict for single predictions"""
+    refresh_customer_features(Customer.objects.filter(pk=customer.pk))
+    features = CustomerFeatures.objects.values(*STORED_FEATURES).get(customer=customer)
+    return {'customer_pk': customer.pk, 'customer_id': customer.customer_id, **features}
+
+
+@receiver(post_delete, sender=Order)
+def invalidate_features_on_order_delete(sender, instance, **kwargs):
+    """Deleted orders leave no updated_at trace, so drop the stored row instead"""
+    CustomerFeatures.objects.filter(customer_id=instance.customer_id).delete()
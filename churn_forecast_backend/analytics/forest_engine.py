@@ -0,0 +1,188 @@
+"""
+Random forests flattened into packed NumPy arrays for low-latency inference.
+
+Every tree's nodes are concatenated into shared arrays (feature, threshold,
+children, missing-value direction and leaf value), with leaves pointing at
+themselves so all rows can be walked down all trees in lockstep for a fixed
+number of steps. Evaluation mirrors sklearn's arithmetic step for step, so
+probabilities and predictions are bit-for-bit identical; compile_forest
+checks that on sample rows before an engine is used.
+
+The StandardScaler is kept as a per-feature mean/scale applied up front
+rather than folded into the thresholds: sklearn compares float32-rounded
+scaled inputs, and thresholds mapped back to raw units send rows sitting on
+a split value down the other branch.
+"""
+import numpy as np
+
+# Rows walked through the trees at once; keeps the (rows x trees) node
+# index matrix small enough to stay in cache for large batches
+ENGINE_CHUNK_ROWS = 2048
+
+
+class CompiledForest:
+    """Packed forest evaluated with NumPy, with an optional StandardScaler applied first"""
+
+    ARRAYS = ('feature', 'threshold', 'children', 'missing_left', 'value', 'roots', 'mean', 'scale')
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots, depth, mean=None, scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        # (nodes, 2) array of left/right child per node
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        # StandardScaler statistics applied to inputs first, if any
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_estimator(cls, estimator, scaler=None):
+        """Flatten a fitted RandomForestClassifier/Regressor and optional StandardScaler"""
+        is_classifier = hasattr(estimator, 'classes_')
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for tree_estimator in estimator.estimators_:
+            tree = tree_estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+            if is_classifier:
+                value = tree.value[:, 0, :].copy()
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value /= normalizer
+            else:
+                value = tree.value[:, 0, :1].copy()
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(np.column_stack([
+                np.where(is_leaf, node_ids, tree.children_left + offset),
+                np.where(is_leaf, node_ids, tree.children_right + offset),
+            ]))
+            missing.append(tree.missing_go_to_left.astype(bool))
+            values.append(value)
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            depth=depth,
+            mean=scaler.mean_.copy() if scaler is not None else None,
+            scale=scaler.scale_.copy() if scaler is not None else None,
+        )
+
+    def prepare(self, X):
+        """Inputs as sklearn's trees see them: scaled like StandardScaler, rounded to float32"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X.astype(np.float32).astype(np.float64)
+
+    def leaves(self, X):
+        """Leaf node reached in every tree, shape (rows, trees)"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], n_rows, axis=0)
+        has_missing = np.isnan(flat).any()
+        for _ in range(self.depth):
+            x = flat.take(row_offsets + self.feature.take(nodes))
+            go_right = x > self.threshold.take(nodes)
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.missing_left.take(nodes), go_right)
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        return nodes
+
+    def predict(self, X):
+        """Mean leaf value over the trees: class probabilities or the regression output
+
+        Trees are accumulated in order, as sklearn does, so results match exactly.
+        """
+        X = np.ascontiguousarray(self.prepare(X))
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), ENGINE_CHUNK_ROWS):
+            leaves = self.leaves(X[start:start + ENGINE_CHUNK_ROWS])
+            out[start:start + ENGINE_CHUNK_ROWS] = tree_mean(self.value[leaves])
+        return out
+
+    def tree_values(self, X):
+        """Every tree's own prediction (first output) per row, shape (rows, trees)"""
+        X = np.ascontiguousarray(self.prepare(X))
+        out = np.empty((len(X), len(self.roots)))
+        for start in range(0, len(X), ENGINE_CHUNK_ROWS):
+            out[start:start + ENGINE_CHUNK_ROWS] = self.value[self.leaves(X[start:start + ENGINE_CHUNK_ROWS]), 0]
+        return out
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in self.ARRAYS if getattr(self, name) is not None}
+        np.savez(path, depth=self.depth, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] if name in data else None for name in cls.ARRAYS}
+            return cls(depth=int(data['depth']), **arrays)
+
+
+def is_forest(estimator):
+    """Whether an estimator is a fitted ensemble of decision trees"""
+    return hasattr(estimator, 'estimators_') and hasattr(estimator.estimators_[0], 'tree_')
+
+
+def tree_mean(values):
+    """Mean over the trees (axis 1), added strictly in tree order like sklearn's forests"""
+    return np.cumsum(values, axis=1)[:, -1] / values.shape[1]
+
+
+def tree_predictions(estimator, X):
+    """Every tree's prediction for already scaled rows through sklearn, shape (rows, trees)"""
+    X = np.asarray(X, dtype=np.float32)
+    return np.column_stack([tree.predict(X) for tree in estimator.estimators_])
+
+
+def sklearn_predict(estimator, scaler, X):
+    """Reference output of the sklearn path, single-threaded so trees add up in order"""
+    X = scaler.transform(X) if scaler is not None else X
+    n_jobs = getattr(estimator, 'n_jobs', None)
+    estimator.n_jobs = None
+    try:
+        if hasattr(estimator, 'classes_'):
+            return estimator.predict_proba(X)
+        return estimator.predict(X)[:, np.newaxis]
+    finally:
+        estimator.n_jobs = n_jobs
+
+
+def compile_forest(estimator, scaler=None, check_rows=None):
+    """Compile a fitted forest for NumPy inference
+
+    Returns None for estimators that are not random forests, or when the
+    engine does not reproduce sklearn's output exactly on check_rows.
+    """
+    if not is_forest(estimator):
+        return None
+
+    engine = CompiledForest.from_estimator(estimator, scaler)
+    if check_rows is not None and not np.array_equal(
+        engine.predict(np.asarray(check_rows, dtype=np.float64)),
+        sklearn_predict(estimator, scaler, check_rows)
+    ):
+        return None
+    return engine
@@ -0,0 +1,107 @@
+"""
+Per-request timings: database queries, serialization and named sections.
+
+PerformanceMiddleware opens a RequestMetrics for each request and installs
+record_query as an execute wrapper on every database connection, so each
+query adds one counter increment and two clock reads. Serializers using
+TimedSerializerMixin and pipeline steps (StageTimer) add their time to the
+request's sections through timed(). Outside a request these are no-ops.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request spent its time on"""
+
+    __slots__ = ('started', 'queries', 'db_seconds', 'sections', 'open_sections', 'slow_queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        # Section name -> seconds, summed over every time it was entered
+        self.sections = {}
+        self.open_sections = set()
+        # (seconds, sql) of queries over SLOW_QUERY_MS, when SLOW_QUERY_LOG is on
+        self.slow_queries = []
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def summary(self):
+        """Milliseconds per measurement, for the structured log line"""
+        return {
+            'total_ms': round(self.total_seconds * 1000, 2),
+            'db_queries': self.queries,
+            'db_ms': round(self.db_seconds * 1000, 2),
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.sections.items()},
+            'slow_queries': len(self.slow_queries),
+        }
+
+    def server_timing(self):
+        """Server-Timing header value; sections overlap db when they run queries"""
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        metrics.extend(f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.sections.items())
+        metrics.append(f'total;dur={self.total_seconds * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed(name):
+    """Add the block's wall time to the current request's section name
+
+    Re-entering a section that is already open (a nested serializer, say)
+    is not counted twice.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or name in metrics.open_sections:
+        yield
+        return
+    metrics.open_sections.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - start)
+        metrics.open_sections.discard(name)
+
+
+def record_seconds(name, seconds):
+    """Add an already measured duration to the current request's section name"""
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.add(name, seconds)
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper counting queries and their time for the current request"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.db_seconds += seconds
+        if settings.SLOW_QUERY_LOG and seconds * 1000 >= settings.SLOW_QUERY_MS:
+            metrics.slow_queries.append((seconds, sql))
+
+
+class TimedSerializerMixin:
+    """Count a serializer's to_representation as the request's serialize section"""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
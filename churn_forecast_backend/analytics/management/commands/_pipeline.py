@@ -0,0 +1,26 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class PipelineCommand(BaseCommand):
+    """Shared options and reporting for the ML pipeline commands"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows fetched/scored per chunk (defaults to the settings value)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Cores used by sklearn (-1 for all; training defaults to '
+                                 'ML_TRAINING_JOBS, scoring to one)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Run the stage without writing models, predictions or forecasts')
+
+    def report(self, stage, result):
+        """Print per-step timings followed by the full result"""
+        prefix = '[dry run] ' if result.get('dry_run') else ''
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{stage} finished in {result['seconds']:.2f}s"))
+        for step, seconds in result['timings'].items():
+            self.stdout.write(f"  {step:<16} {seconds:>9.3f}s")
+
+        details = {key: value for key, value in result.items() if key not in ('timings', 'seconds')}
+        self.stdout.write(json.dumps(details, indent=2, default=str))
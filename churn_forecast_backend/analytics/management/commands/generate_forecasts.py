@@ -0,0 +1,30 @@
+from django.core.management.base import CommandError
+
+from analytics.ml_models import FORECAST_PERIODS, MAX_FORECAST_HORIZON
+from analytics.pipeline import forecast_all, top_selling_products
+
+from ._pipeline import PipelineCommand
+
+
+class Command(PipelineCommand):
+    help = 'Generate sales forecasts with the saved sales model'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--top-products', type=int, default=None,
+                            help='Only forecast the N products with the most orders')
+        parser.add_argument('--period', default='monthly', choices=list(FORECAST_PERIODS))
+        parser.add_argument('--horizon', type=int, default=12,
+                            help='Number of periods to forecast')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['horizon'] <= MAX_FORECAST_HORIZON:
+            raise CommandError(f'--horizon must be between 1 and {MAX_FORECAST_HORIZON}')
+        products = top_selling_products(options['top_products']) if options['top_products'] else None
+        result = forecast_all(
+            products=products,
+            periods=[(options['period'], options['horizon'])],
+            n_jobs=options['workers'],
+            dry_run=options['dry_run']
+        )
+        self.report('generate_forecasts', result)
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.registry import REGISTRY_NAMES, list_versions, pointer, promote, rollback
+
+
+class Command(BaseCommand):
+    help = 'List the saved versions of a model, or change which one is served'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_type', choices=list(REGISTRY_NAMES))
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument('--promote', metavar='VERSION', help='Serve this saved version')
+        action.add_argument('--rollback', action='store_true',
+                            help='Serve the version that was served before the current one')
+
+    def handle(self, *args, **options):
+        model_type = options['model_type']
+        try:
+            if options['promote']:
+                version = promote(model_type, options['promote'])
+            elif options['rollback']:
+                version = rollback(model_type)
+            else:
+                version = None
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if version:
+            self.stdout.write(self.style.SUCCESS(f"Serving {model_type} {version}"))
+            self.stdout.write('Rescore or regenerate forecasts to refresh stored results with it')
+            return
+
+        current = pointer(model_type) or {'version': None, 'history': []}
+        for manifest in list_versions(model_type):
+            marker = '*' if manifest['version'] == current['version'] else ' '
+            self.stdout.write(f"{marker} {manifest['version']}  {manifest['created_at']}  "
+                              f"{json.dumps(manifest['metadata'], default=str)}")
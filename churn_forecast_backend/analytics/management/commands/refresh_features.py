@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.features import FEATURE_SCHEMA_VERSION, refresh_customer_features
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored churn features for customers whose data changed since they were computed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Customers upserted per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = refresh_customer_features(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed features for {refreshed} customers (schema v{FEATURE_SCHEMA_VERSION}) "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,15 @@
+from analytics.pipeline import score_all
+
+from ._pipeline import PipelineCommand
+
+
+class Command(PipelineCommand):
+    help = 'Score every customer with the saved churn model and activate the new predictions'
+
+    def handle(self, *args, **options):
+        result = score_all(
+            chunk_size=options['chunk_size'],
+            n_jobs=options['workers'],
+            dry_run=options['dry_run']
+        )
+        self.report('score_churn', result)
@@ -0,0 +1,45 @@
+import json
+
+from analytics.ml_models import ESTIMATOR_BACKENDS, INTERVAL_METHODS
+from analytics.pipeline import TRAINING_MODES, fit_sales
+from analytics.validation import CV_SCHEMES
+
+from ._pipeline import PipelineCommand
+
+
+class Command(PipelineCommand):
+    help = 'Train the sales forecasting model and save it (does not generate forecasts)'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--backend', choices=list(ESTIMATOR_BACKENDS), default=None,
+                            help='Estimator backend (defaults to ML_TRAINING_BACKEND)')
+        parser.add_argument('--params', type=json.loads, default=None,
+                            help='JSON object of hyperparameters overriding the backend defaults')
+        parser.add_argument('--mode', choices=list(TRAINING_MODES), default=None,
+                            help='full, sample or incremental (defaults to sampling only above ML_TRAINING_MEMORY_MB)')
+        parser.add_argument('--max-rows', type=int, default=None,
+                            help='Sample size, overriding the budget derived from ML_TRAINING_MEMORY_MB')
+        parser.add_argument('--cv', type=int, default=5,
+                            help='Cross-validation folds (0 for a single holdout split)')
+        parser.add_argument('--cv-scheme', choices=list(CV_SCHEMES), default=None)
+        parser.add_argument('--intervals', choices=list(INTERVAL_METHODS), default=None,
+                            help='How forecast intervals are computed (defaults to ML_FORECAST_INTERVALS)')
+        parser.add_argument('--force', action='store_true',
+                            help='Retrain even when the data and options are unchanged since the saved model')
+
+    def handle(self, *args, **options):
+        result = fit_sales(
+            n_jobs=options['workers'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            backend=options['backend'],
+            params=options['params'],
+            mode=options['mode'],
+            max_rows=options['max_rows'],
+            cv=options['cv'],
+            cv_scheme=options['cv_scheme'],
+            intervals=options['intervals'],
+            force=options['force']
+        )
+        self.report('train_sales', result)
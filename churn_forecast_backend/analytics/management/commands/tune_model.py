@@ -0,0 +1,37 @@
+from analytics.ml_models import ESTIMATOR_BACKENDS
+from analytics.tuning import SEARCH_STRATEGIES, TUNED_MODELS, tune_model
+
+from ._pipeline import PipelineCommand
+
+
+class Command(PipelineCommand):
+    help = 'Search hyperparameters for the churn or sales model and record the winners'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('model_type', choices=list(TUNED_MODELS))
+        parser.add_argument('--backends', nargs='+', choices=list(ESTIMATOR_BACKENDS), default=None,
+                            help='Backends to search (defaults to ML_TRAINING_BACKEND)')
+        parser.add_argument('--search', choices=list(SEARCH_STRATEGIES), default='random')
+        parser.add_argument('--candidates', type=int, default=10,
+                            help='Hyperparameter sets sampled in total')
+        parser.add_argument('--cv', type=int, default=3, help='Folds per candidate')
+        parser.add_argument('--max-rows', type=int, default=None,
+                            help='Sample size, overriding the budget derived from ML_TRAINING_MEMORY_MB')
+        parser.add_argument('--refit', action='store_true',
+                            help='Train and save the best candidate afterwards')
+
+    def handle(self, *args, **options):
+        result = tune_model(
+            options['model_type'],
+            backends=options['backends'],
+            search=options['search'],
+            n_candidates=options['candidates'],
+            cv=options['cv'],
+            n_jobs=options['workers'],
+            refit=options['refit'],
+            dry_run=options['dry_run'],
+            max_rows=options['max_rows'],
+            chunk_size=options['chunk_size']
+        )
+        self.report('tune_model', result)
@@ -0,0 +1,240 @@
+"""
+Operational metrics shared by every worker process, in Prometheus text format.
+
+Counters and histograms are declared at the bottom of this module. Each
+process keeps its samples in its own memory-mapped file under METRICS_DIR
+(<pid>.db) and updates them in place, so recording a value is a dict lookup
+and a few 8-byte writes. exposition() reads every process's file and sums
+the samples, so whichever gunicorn worker answers a scrape of /metrics
+reports the same totals. Files of exited workers are kept, so counters never
+go backwards while the directory lives; clear it when deploying.
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+
+# Latency buckets in seconds, from fast API reads to full training runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+INITIAL_FILE_SIZE = 1 << 16
+# Header: bytes of the file in use, written after each new entry is complete
+HEADER = struct.Struct('<Q')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+
+
+def entry_size(key):
+    """Bytes of a key length, key padded to 8-byte alignment and value"""
+    return KEY_LENGTH.size + len(key) + (-(KEY_LENGTH.size + len(key)) % 8) + VALUE.size
+
+
+def read_samples(path):
+    """Every (key, value) recorded in one process's file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        return
+    used = HEADER.unpack_from(data, 0)[0]
+    offset = HEADER.size
+    while offset < used:
+        (length,) = KEY_LENGTH.unpack_from(data, offset)
+        key = data[offset + KEY_LENGTH.size:offset + KEY_LENGTH.size + length]
+        size = entry_size(key)
+        yield key.decode(), VALUE.unpack_from(data, offset + size - VALUE.size)[0]
+        offset += size
+
+
+class MmapStore:
+    """One process's samples in a memory-mapped file, keyed by sample name and labels"""
+
+    def __init__(self, directory=None):
+        # METRICS_DIR unless given; read on first use, not at import
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def open(self):
+        self.directory = self.directory or settings.METRICS_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.pid = os.getpid()
+        self.file = open(os.path.join(self.directory, f'{self.pid}.db'), 'a+b')
+        if os.fstat(self.file.fileno()).st_size < INITIAL_FILE_SIZE:
+            self.file.truncate(INITIAL_FILE_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {}
+        offset = HEADER.size
+        for key, _ in read_samples(self.file.name):
+            offset += entry_size(key.encode())
+            self.positions[key] = offset - VALUE.size
+
+    def position(self, key):
+        """Offset of a sample's value, appending a zero entry for a new key"""
+        if key in self.positions:
+            return self.positions[key]
+        encoded = key.encode()
+        size = entry_size(encoded)
+        if self.used + size > len(self.map):
+            grown = max(len(self.map) * 2, self.used + size)
+            self.map.close()
+            self.file.truncate(grown)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        self.map[self.used + KEY_LENGTH.size:self.used + KEY_LENGTH.size + len(encoded)] = encoded
+        VALUE.pack_into(self.map, self.used + size - VALUE.size, 0.0)
+        self.positions[key] = self.used + size - VALUE.size
+        self.used += size
+        HEADER.pack_into(self.map, 0, self.used)
+        return self.positions[key]
+
+    def add(self, increments):
+        """Add to several samples, given as (key, amount) pairs"""
+        with self.lock:
+            # A forked worker writes to its own file, not its parent's
+            if self.pid != os.getpid():
+                self.open()
+            for key, amount in increments:
+                position = self.position(key)
+                VALUE.pack_into(self.map, position, VALUE.unpack_from(self.map, position)[0] + amount)
+
+
+store = MmapStore()
+registry = []
+
+
+@lru_cache(maxsize=4096)
+def encode_key(name, labels):
+    return json.dumps([name, labels])
+
+
+def sample_key(name, labels):
+    """File key of a sample; encoded once per label set"""
+    return encode_key(name, tuple(sorted(labels.items())))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.append(self)
+
+    def labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames)}")
+        return {name: str(value) for name, value in labels.items()}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        store.add([(sample_key(self.name, self.labels(labels)), amount)])
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        labels = self.labels(labels)
+        # Only the value's own bucket is counted; exposition accumulates them
+        index = bisect.bisect_left(self.buckets, value)
+        le = format_value(self.buckets[index]) if index < len(self.buckets) else '+Inf'
+        store.add([
+            (sample_key(f'{self.name}_bucket', {**labels, 'le': le}), 1),
+            (sample_key(f'{self.name}_sum', labels), value),
+            (sample_key(f'{self.name}_count', labels), 1),
+        ])
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+def format_value(value):
+    return repr(float(value)) if value != int(value) else f'{int(value)}.0'
+
+
+def escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_sample(name, labels, value):
+    label_text = ','.join(f'{key}="{escape(label)}"' for key, label in labels)
+    return f'{name}{{{label_text}}} {value!r}' if labels else f'{name} {value!r}'
+
+
+def collect():
+    """Samples summed over every process's file, as {(name, labels): value}"""
+    totals = {}
+    directory = settings.METRICS_DIR
+    if not os.path.isdir(directory):
+        return totals
+    for filename in os.listdir(directory):
+        if not filename.endswith('.db'):
+            continue
+        for key, value in read_samples(os.path.join(directory, filename)):
+            name, labels = json.loads(key)
+            sample = (name, tuple(tuple(label) for label in labels))
+            totals[sample] = totals.get(sample, 0.0) + value
+    return totals
+
+
+def exposition():
+    """Every metric in the Prometheus text format (version 0.0.4)"""
+    totals = collect()
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        if metric.kind == 'counter':
+            lines.extend(
+                format_sample(name, labels, value)
+                for (name, labels), value in sorted(totals.items()) if name == metric.name
+            )
+            continue
+
+        series = sorted({labels for name, labels in totals if name == f'{metric.name}_count'})
+        bounds = [*(format_value(bucket) for bucket in metric.buckets), '+Inf']
+        for labels in series:
+            cumulative = 0.0
+            for le in bounds:
+                cumulative += totals.get((f'{metric.name}_bucket', tuple(sorted((*labels, ('le', le))))), 0.0)
+                lines.append(format_sample(f'{metric.name}_bucket', (*labels, ('le', le)), cumulative))
+            lines.append(format_sample(f'{metric.name}_sum', labels, totals[(f'{metric.name}_sum', labels)]))
+            lines.append(format_sample(f'{metric.name}_count', labels, totals[(f'{metric.name}_count', labels)]))
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by view', ['method', 'view', 'status']
+)
+PIPELINE_STEP_SECONDS = Histogram(
+    'ml_pipeline_step_seconds', 'Duration of ML pipeline steps (load_data, train, score, ...)', ['step']
+)
+ROWS_SCORED = Counter('ml_rows_scored_total', 'Customers scored by the churn model', ['mode'])
+SCORING_SECONDS = Counter(
+    'ml_scoring_seconds_total', 'Time spent scoring and writing churn predictions; '
+    'rate(ml_rows_scored_total) / rate(ml_scoring_seconds_total) is rows per second', ['mode']
+)
+FORECAST_ROWS_WRITTEN = Counter('ml_forecast_rows_written_total', 'Sales forecast rows written', ['source'])
+CACHE_REQUESTS = Counter('ml_cache_requests_total', 'Cache lookups, by cache and hit or miss', ['cache', 'result'])
+MODEL_LOAD_SECONDS = Histogram('ml_model_load_seconds', 'Time to load a saved model from disk', ['model_type'])
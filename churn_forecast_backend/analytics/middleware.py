@@ -0,0 +1,166 @@
+import json
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, fall back to gzip only
+    brotli = None
+
+from .instrumentation import RequestMetrics, current_metrics, record_query
+from .metrics import REQUEST_LATENCY
+
+performance_logger = logging.getLogger('analytics.performance')
+slow_query_logger = logging.getLogger('analytics.slow_queries')
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+def compress_sequence_brotli(sequence, quality):
+    """Incrementally Brotli-compress a streaming response
+
+    Each chunk is flushed as it is compressed, as Django's gzip
+    compress_sequence does, so clients receive a streamed export while it is
+    being produced rather than when it ends.
+    """
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with Brotli when the client accepts it and the brotli
+    package is installed, otherwise fall back to Django's gzip handling.
+    Payloads that are already compressed (e.g. Parquet) are passed through.
+    """
+
+    skip_content_types = ('application/vnd.apache.parquet',)
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith(self.skip_content_types):
+            return response
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or not re_accepts_brotli.search(ae):
+            return super().process_response(request, response)
+
+        # Mirror GZipMiddleware's guards
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = getattr(settings, 'BROTLI_QUALITY', 4)
+
+        if response.streaming:
+            if response.is_async:
+                # Async streams are rare here; let gzip handle them
+                return super().process_response(request, response)
+            response.streaming_content = compress_sequence_brotli(response.streaming_content, quality)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request's database queries, serialization, pipeline steps
+    and total time. Results go out as a Server-Timing header and one JSON
+    log line on the analytics.performance logger; with SLOW_QUERY_LOG on,
+    queries over SLOW_QUERY_MS are logged with their SQL on
+    analytics.slow_queries. The total is also observed in the
+    http_request_duration_seconds histogram served on /metrics.
+
+    Streamed bodies (the exports) run their queries after this middleware
+    returns, so their chunks are produced under the request's metrics too,
+    and the log line and histogram are recorded when the stream ends. Their
+    Server-Timing header, sent before the body, only has the time to the
+    first byte.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        with measuring(metrics):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.headers['Server-Timing'] = f'first_byte;dur={metrics.total_seconds * 1000:.2f}'
+            response.streaming_content = self.measured_stream(request, response, metrics, response.streaming_content)
+            return response
+
+        response.headers['Server-Timing'] = metrics.server_timing()
+        self.record(request, response, metrics)
+        return response
+
+    def measured_stream(self, request, response, metrics, content):
+        """Yield the streamed body, measuring each chunk, and record the request once it ends or is closed"""
+        chunks = iter(content)
+        try:
+            while True:
+                with measuring(metrics):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.record(request, response, metrics)
+
+    def record(self, request, response, metrics):
+        view = request.resolver_match.view_name if request.resolver_match else 'unmatched'
+        REQUEST_LATENCY.observe(metrics.total_seconds, method=request.method, view=view, status=response.status_code)
+        summary = metrics.summary()
+        performance_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **summary,
+        }))
+        for seconds, sql in metrics.slow_queries:
+            slow_query_logger.warning(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'duration_ms': round(seconds * 1000, 2),
+                'sql': sql,
+            }))
+
+
+@contextmanager
+def measuring(metrics):
+    """Count the block's queries and timed sections towards metrics"""
+    token = current_metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            yield
+    finally:
+        current_metrics.reset(token)
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_date'], name='orders_order_date_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:18
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def activate_existing_predictions(apps, schema_editor):
+    """Register predictions written before versioning as the active version"""
+    ChurnPrediction = apps.get_model('analytics', 'ChurnPrediction')
+    ModelVersion = apps.get_model('analytics', 'ModelVersion')
+
+    latest = ChurnPrediction.objects.order_by('-prediction_date').values_list('model_version', flat=True).first()
+    if latest is not None:
+        ModelVersion.objects.create(
+            model_type='churn_prediction',
+            version=latest,
+            status='active',
+            activated_at=timezone.now()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_order_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_type', models.CharField(max_length=50)),
+                ('version', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('building', 'Building'), ('active', 'Active'), ('retired', 'Retired'), ('failed', 'Failed')], default='building', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'model_versions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='churnprediction',
+            index=models.Index(fields=['model_version', 'risk_level'], name='churn_pred_version_risk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='churnprediction',
+            index=models.Index(fields=['model_version', '-churn_probability'], name='churn_pred_version_prob_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelversion',
+            constraint=models.UniqueConstraint(fields=('model_type', 'version'), name='unique_model_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('model_type',), name='one_active_model_version'),
+        ),
+        migrations.RunPython(activate_existing_predictions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_model_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelversion',
+            name='high_threshold',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelversion',
+            name='medium_threshold',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
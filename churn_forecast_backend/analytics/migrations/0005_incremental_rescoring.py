@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_model_version_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelversion',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at'], name='customers_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='orders_updated_at_idx'),
+        ),
+    ]
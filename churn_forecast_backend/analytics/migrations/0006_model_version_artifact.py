@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_incremental_rescoring'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelversion',
+            name='artifact_version',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_model_version_artifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerFeatures',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to='analytics.customer')),
+                ('schema_version', models.IntegerField()),
+                ('age', models.IntegerField()),
+                ('gender', models.CharField(max_length=10)),
+                ('country', models.CharField(max_length=100)),
+                ('subscription_status', models.CharField(max_length=20)),
+                ('signup_date', models.DateField()),
+                ('last_purchase_date', models.DateField()),
+                ('cancellations_count', models.IntegerField()),
+                ('purchase_frequency', models.IntegerField()),
+                ('ratings', models.FloatField()),
+                ('total_orders', models.IntegerField()),
+                ('avg_order_value', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'customer_features',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0007_customer_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelperformance',
+            name='backend',
+            field=models.CharField(default='random_forest', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='modelperformance',
+            name='hyperparameters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='modelperformance',
+            name='training_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
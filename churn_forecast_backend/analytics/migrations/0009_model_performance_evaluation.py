@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0008_model_performance_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelperformance',
+            name='evaluation',
+            field=models.CharField(default='holdout', max_length=20),
+        ),
+    ]
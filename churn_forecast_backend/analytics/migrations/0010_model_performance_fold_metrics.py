@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0009_model_performance_evaluation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelperformance',
+            name='fold_metrics',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
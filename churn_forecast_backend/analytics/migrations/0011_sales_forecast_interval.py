@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0010_model_performance_fold_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesforecast',
+            name='lower_bound',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salesforecast',
+            name='upper_bound',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
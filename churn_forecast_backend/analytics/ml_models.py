@@ -1,16 +1,247 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor,
+    HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error, r2_score
-from sklearn.linear_model import LinearRegression
-from sklearn.svm import SVR
-from datetime import datetime, timedelta
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from datetime import datetime, time, timedelta
 import joblib
 import os
+import threading
 from django.conf import settings
 
+from .forest_engine import CompiledForest, compile_forest, is_forest, tree_mean, tree_predictions
+from .registry import current_version, publish, resolve
+from .time_series import SALES_FEATURES, SalesHistory, add_history_features, recursive_forecast
+
+
+# Estimator backends selectable per training run, with their default
+# hyperparameters. Random forests fit trees in parallel across n_jobs cores;
+# histogram gradient boosting bins features and is multi-threaded via OpenMP.
+# Incremental backends support partial_fit, so they can be trained on chunks
+# streamed from the database without holding the whole table in memory.
+ESTIMATOR_BACKENDS = {
+    'random_forest': {
+        'classifier': RandomForestClassifier,
+        'regressor': RandomForestRegressor,
+        'params': {'n_estimators': 100, 'random_state': 42},
+        'parallel': True,
+    },
+    'hist_gradient_boosting': {
+        'classifier': HistGradientBoostingClassifier,
+        'regressor': HistGradientBoostingRegressor,
+        'params': {'max_iter': 200, 'random_state': 42},
+        'parallel': False,
+    },
+    'sgd': {
+        'classifier': SGDClassifier,
+        'regressor': SGDRegressor,
+        'params': {'loss': 'log_loss', 'random_state': 42},
+        'regressor_params': {'random_state': 42},
+        'parallel': False,
+        'incremental': True,
+    },
+}
+DEFAULT_BACKEND = 'random_forest'
+INCREMENTAL_BACKEND = 'sgd'
+
+# Every HOLDOUT_EVERY-th streamed row is held out for evaluation when
+# training incrementally
+HOLDOUT_EVERY = 5
+
+
+def build_estimator(task, backend=None, params=None, n_jobs=None):
+    """Instantiate a classifier or regressor for a backend
+
+    Args:
+        task: 'classifier' or 'regressor'
+        backend: Key of ESTIMATOR_BACKENDS, defaults to random_forest
+        params: Hyperparameters overriding the backend defaults
+        n_jobs: Cores for backends that take n_jobs (None for one, -1 for all)
+
+    Returns:
+        Tuple of (estimator, resolved hyperparameters)
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in ESTIMATOR_BACKENDS:
+        raise ValueError(f"Unknown estimator backend '{backend}'. Use one of: {', '.join(ESTIMATOR_BACKENDS)}")
+    
+    spec = ESTIMATOR_BACKENDS[backend]
+    defaults = spec.get(f'{task}_params', spec['params'])
+    resolved = {**defaults, **(params or {})}
+    estimator_params = dict(resolved)
+    if spec['parallel']:
+        estimator_params['n_jobs'] = n_jobs
+    return spec[task](**estimator_params), resolved
+
+
+def incremental_estimator(task, backend=None, params=None):
+    """Instantiate a partial_fit-capable estimator, see build_estimator"""
+    backend = backend or INCREMENTAL_BACKEND
+    if not ESTIMATOR_BACKENDS.get(backend, {}).get('incremental'):
+        incremental = [name for name, spec in ESTIMATOR_BACKENDS.items() if spec.get('incremental')]
+        raise ValueError(f"Backend '{backend}' cannot train incrementally. Use one of: {', '.join(incremental)}")
+    return build_estimator(task, backend, params)
+
+
+def holdout_mask(offset, length, every=HOLDOUT_EVERY):
+    """Rows of a streamed chunk held out for evaluation, stable across passes"""
+    return (np.arange(offset, offset + length) % every) == 0
+
+
+# Churn model inputs, in the order the estimator sees them
+NUMERIC_FEATURES = ['age', 'cancellations_count', 'purchase_frequency', 'ratings']
+CATEGORICAL_FEATURES = ['gender', 'country', 'subscription_status']
+CHURN_FEATURES = [
+    *NUMERIC_FEATURES, 'days_since_last_purchase', *(f'{col}_encoded' for col in CATEGORICAL_FEATURES)
+]
+
+# Up to this many rows the compiled NumPy engine beats sklearn's per-call
+# overhead; larger batches go through sklearn's Cython trees
+ENGINE_MAX_ROWS = 128
+
+
+def save_engine(engine, path):
+    """Persist a compiled forest next to the model, if it has one"""
+    if engine is not None:
+        engine.save(path)
+
+
+def load_engine(path):
+    return CompiledForest.load(path) if os.path.exists(path) else None
+
+
+def category_codes(label_encoders):
+    """Category -> code dicts giving the same codes as each fitted LabelEncoder
+    
+    Values an encoder never saw get the reserved unknown code, len(classes_).
+    """
+    return {
+        col: {label: code for code, label in enumerate(encoder.classes_)}
+        for col, encoder in label_encoders.items()
+    }
+
+
+def encode_categories(values, classes):
+    """Codes for a column of categories, unseen values mapped to the reserved unknown code
+    
+    Same codes as LabelEncoder.transform for known values, looked up through
+    a pandas Categorical (a hash table) in one vectorized pass.
+    """
+    codes = pd.Categorical(values.astype(str), categories=classes).codes.astype(np.int64)
+    codes[codes < 0] = len(classes)
+    return codes
+
+
+def days_since(value, now):
+    """Whole days from a date (or ISO string) to now, as pandas computes them"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return (now - value).days
+
+
+# Sales forecasts come with an interval meant to hold the actual quantity
+# this often: per-tree quantiles of a random forest ('trees') or separate
+# quantile-regression models fitted for the lower and upper bound
+# ('quantile', also used for backends without trees)
+FORECAST_CONFIDENCE_LEVEL = 0.8
+INTERVAL_METHODS = ('trees', 'quantile')
+
+# Periods forecast_dates can step by, and the most periods one forecast covers
+FORECAST_PERIODS = ('daily', 'weekly', 'monthly', 'quarterly', 'yearly')
+MAX_FORECAST_HORIZON = 366
+
+
+def forecast_dates(forecast_period, forecast_horizon, start=None):
+    """Dates a forecast covers: forecast_horizon period ends from start (default now)"""
+    start = start or datetime.now()
+    if forecast_period == 'daily':
+        return pd.date_range(start=start, periods=forecast_horizon, freq='D')
+    elif forecast_period == 'weekly':
+        return pd.date_range(start=start, periods=forecast_horizon, freq='W')
+    elif forecast_period == 'monthly':
+        # Use month-end to avoid FutureWarning about 'M'
+        return pd.date_range(start=start, periods=forecast_horizon, freq='ME')
+    elif forecast_period == 'quarterly':
+        # Use quarter-end
+        return pd.date_range(start=start, periods=forecast_horizon, freq='QE')
+    elif forecast_period == 'yearly':
+        return pd.date_range(start=start, periods=forecast_horizon, freq='YE')
+    raise ValueError(f"Unknown forecast period '{forecast_period}'. Use one of: {', '.join(FORECAST_PERIODS)}")
+
+
+def set_prediction_jobs(estimator, n_jobs):
+    """Set prediction-time parallelism on estimators that support it"""
+    if hasattr(estimator, 'n_jobs'):
+        estimator.n_jobs = n_jobs
+
+
+# Risk tiers are cut at population percentiles of churn probability: top 10%
+# High, next 20% Medium, with floors so a low-risk population isn't flagged
+RISK_PERCENTILES = {'high': 90, 'medium': 70}
+RISK_THRESHOLD_FLOORS = {'high': 0.75, 'medium': 0.50}
+DEFAULT_RISK_THRESHOLDS = {'high': 0.85, 'medium': 0.60}
+
+
+def compute_risk_thresholds(probabilities):
+    """Percentile-based risk thresholds for an array of churn probabilities"""
+    high, medium = np.percentile(probabilities, [RISK_PERCENTILES['high'], RISK_PERCENTILES['medium']])
+    return {
+        'high': max(float(high), RISK_THRESHOLD_FLOORS['high']),
+        'medium': max(float(medium), RISK_THRESHOLD_FLOORS['medium'])
+    }
+
+
+def assign_risk_levels(probabilities, thresholds):
+    """Vectorized High/Medium/Low assignment for an array of probabilities"""
+    probabilities = np.asarray(probabilities)
+    return np.select(
+        [probabilities >= thresholds['high'], probabilities >= thresholds['medium']],
+        ['High', 'Medium'],
+        default='Low'
+    )
+
+
+class ProbabilityHistogram:
+    """Fixed-bin quantile sketch for probabilities in [0, 1]
+
+    Memory is constant regardless of population size and quantiles are exact
+    to within one bin width, so thresholds can be computed while scoring in
+    chunks without keeping every probability.
+    """
+
+    def __init__(self, bins=10000):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, probabilities):
+        indices = np.minimum((np.asarray(probabilities) * self.bins).astype(np.int64), self.bins - 1)
+        self.counts += np.bincount(indices, minlength=self.bins)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def percentile(self, q):
+        """Lower edge of the bin holding the q-th percentile"""
+        target = q / 100 * self.total
+        index = int(np.searchsorted(np.cumsum(self.counts), target, side='left'))
+        return min(index, self.bins - 1) / self.bins
+
+    def risk_thresholds(self):
+        return {
+            'high': max(self.percentile(RISK_PERCENTILES['high']), RISK_THRESHOLD_FLOORS['high']),
+            'medium': max(self.percentile(RISK_PERCENTILES['medium']), RISK_THRESHOLD_FLOORS['medium'])
+        }
+
 
 class ChurnPredictionModel:
     def __init__(self):
@@ -18,7 +249,13 @@ class ChurnPredictionModel:
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.feature_columns = []
-        self.model_version = "v1.0"
+        # Named by the training run (versioning.new_model_version) before saving
+        self.model_version = None
+        self.backend = DEFAULT_BACKEND
+        self.params = {}
+        self.engine = None
+        # Built from label_encoders on first single-row prediction
+        self.category_codes = None
         
     def prepare_features(self, df):
         """Prepare features for churn prediction"""
@@ -32,25 +269,49 @@ class ChurnPredictionModel:
         df['days_since_last_purchase'] = (datetime.now() - df['last_purchase_date']).dt.days
         
         # Encode categorical variables
-        categorical_columns = ['gender', 'country', 'subscription_status']
-        for col in categorical_columns:
+        for col in CATEGORICAL_FEATURES:
             if col not in self.label_encoders:
-                self.label_encoders[col] = LabelEncoder()
-                df[f'{col}_encoded'] = self.label_encoders[col].fit_transform(df[col].astype(str))
-            else:
-                df[f'{col}_encoded'] = self.label_encoders[col].transform(df[col].astype(str))
+                self.label_encoders[col] = LabelEncoder().fit(df[col].astype(str))
+            df[f'{col}_encoded'] = encode_categories(df[col], self.label_encoders[col].classes_)
         
         # Select features
-        feature_columns = [
-            'age', 'cancellations_count', 'purchase_frequency', 'ratings',
-            'days_since_last_purchase', 'gender_encoded', 'country_encoded', 'subscription_status_encoded'
-        ]
+        self.feature_columns = CHURN_FEATURES
+        self.category_codes = None
+        return df[CHURN_FEATURES], df['churn']
+    
+    def feature_vector(self, customer_data):
+        """One customer record as a (1, n_features) array, without pandas
         
-        self.feature_columns = feature_columns
-        return df[feature_columns], df['churn']
+        Matches prepare_features for a single row, looking categories up in
+        precomputed code dicts instead of going through the label encoders.
+        """
+        if self.category_codes is None:
+            self.category_codes = category_codes(self.label_encoders)
+        
+        row = [np.nan if customer_data[col] is None else float(customer_data[col]) for col in NUMERIC_FEATURES]
+        row.append(days_since(customer_data['last_purchase_date'], datetime.now()))
+        for col in CATEGORICAL_FEATURES:
+            codes = self.category_codes[col]
+            row.append(codes.get(str(customer_data[col]), len(codes)))
+        return np.array([row], dtype=np.float64)
+    
+    def unseen_categories(self, df):
+        """Rows per categorical column with a value the encoders never saw"""
+        return {
+            col: int((~df[col].astype(str).isin(self.label_encoders[col].classes_)).sum())
+            for col in CATEGORICAL_FEATURES
+        }
     
-    def train(self, df):
-        """Train the churn prediction model"""
+    def train(self, df, n_jobs=None, save=True, backend=None, params=None):
+        """Train the churn prediction model
+        
+        Args:
+            df: Customer feature frame
+            n_jobs: Cores used to fit the forest (None for one, -1 for all)
+            save: Persist the trained model with save_model
+            backend: Key of ESTIMATOR_BACKENDS, defaults to random_forest
+            params: Hyperparameters overriding the backend defaults
+        """
         X, y = self.prepare_features(df.copy())
         
         # Split data
@@ -61,8 +322,10 @@ class ChurnPredictionModel:
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train model
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.backend = backend or DEFAULT_BACKEND
+        self.model, self.params = build_estimator('classifier', self.backend, params, n_jobs)
         self.model.fit(X_train_scaled, y_train)
+        self.engine = compile_forest(self.model, self.scaler, check_rows=X_test)
         
         # Evaluate model
         y_pred = self.model.predict(X_test_scaled)
@@ -74,16 +337,95 @@ class ChurnPredictionModel:
         f1 = f1_score(y_test, y_pred)
         
         # Save model
-        self.save_model()
+        if save:
+            self.save_model()
         
         return {
             'accuracy': accuracy,
             'precision': precision,
             'recall': recall,
             'f1_score': f1,
-            'test_size': len(X_test)
+            'test_size': len(X_test),
+            'backend': self.backend,
+            'params': self.params
         }
     
+    def train_incremental(self, frames, categories, save=True, backend=None, params=None):
+        """Train on customer chunks without loading them all at once
+        
+        Args:
+            frames: Callable returning a fresh iterator of customer feature
+                    frames; it is consumed three times (scaling statistics,
+                    fitting, evaluation) and must yield rows in the same order
+            categories: Dict of categorical column -> every value it takes
+            save: Persist the trained model with save_model
+            backend: Incremental backend key, defaults to sgd
+            params: Hyperparameters overriding the backend defaults
+        """
+        self.backend = backend or INCREMENTAL_BACKEND
+        self.model, self.params = incremental_estimator('classifier', self.backend, params)
+        self.engine = None
+        self.label_encoders = {
+            col: LabelEncoder().fit([str(value) for value in values]) for col, values in categories.items()
+        }
+        self.scaler = StandardScaler()
+        
+        def chunks():
+            offset = 0
+            for df in frames():
+                X, y = self.prepare_features(df)
+                yield X, y.to_numpy(), holdout_mask(offset, len(df))
+                offset += len(df)
+        
+        for X, _, holdout in chunks():
+            if (~holdout).any():
+                self.scaler.partial_fit(X[~holdout])
+        
+        training_rows = 0
+        for X, y, holdout in chunks():
+            if (~holdout).any():
+                self.model.partial_fit(self.scaler.transform(X[~holdout]), y[~holdout], classes=[0, 1])
+                training_rows += int((~holdout).sum())
+        
+        y_test, y_pred = [], []
+        for X, y, holdout in chunks():
+            if holdout.any():
+                y_test.append(y[holdout])
+                y_pred.append(self.model.predict(self.scaler.transform(X[holdout])))
+        y_test = np.concatenate(y_test) if y_test else np.array([], dtype=int)
+        y_pred = np.concatenate(y_pred) if y_pred else np.array([], dtype=int)
+        
+        if save:
+            self.save_model()
+        
+        return {
+            'accuracy': accuracy_score(y_test, y_pred) if len(y_test) else 0.0,
+            'precision': precision_score(y_test, y_pred, zero_division=0),
+            'recall': recall_score(y_test, y_pred, zero_division=0),
+            'f1_score': f1_score(y_test, y_pred, zero_division=0),
+            'test_size': len(y_test),
+            'training_rows': training_rows,
+            'backend': self.backend,
+            'params': self.params
+        }
+    
+    def predict_proba_batch(self, df):
+        """Churn probabilities for a DataFrame of customers in one pass"""
+        if self.model is None:
+            self.load_model()
+        
+        X, _ = self.prepare_features(df.copy())
+        return self.predict_proba_matrix(X)
+    
+    def predict_proba_matrix(self, X):
+        """Churn probabilities for an unscaled feature matrix"""
+        if self.engine is not None and len(X) <= ENGINE_MAX_ROWS:
+            return self.engine.predict(np.asarray(X, dtype=np.float64))[:, 1]
+        if isinstance(X, np.ndarray):
+            # StandardScaler.transform's arithmetic, without its feature-name check
+            return self.model.predict_proba((X - self.scaler.mean_) / self.scaler.scale_)[:, 1]
+        return self.model.predict_proba(self.scaler.transform(X))[:, 1]
+    
     def predict(self, customer_data, percentile_thresholds=None):
         """Predict churn probability for a customer
         
@@ -95,65 +437,66 @@ class ChurnPredictionModel:
         if self.model is None:
             self.load_model()
         
-        # Prepare features
-        df = pd.DataFrame([customer_data])
-        X, _ = self.prepare_features(df)
+        # Predict from a plain feature vector; pandas costs more than the model here
+        X = self.feature_vector(customer_data)
+        churn_probability = self.predict_proba_matrix(X)[0]
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
-        
-        # Predict
-        churn_probability = self.model.predict_proba(X_scaled)[0, 1]
-        
-        # Use tight thresholds by default (ensures <10% high risk)
-        # High risk: top 10% (90th percentile)
-        # Medium risk: 10-30% (70th-90th percentile)
-        # Low risk: bottom 70%
-        if percentile_thresholds is None:
-            high_threshold = 0.85  # Only top 15% are high risk (tighter than 10%)
-            medium_threshold = 0.60  # 15-40% are medium risk
-        else:
-            high_threshold = percentile_thresholds.get('high', 0.85)
-            medium_threshold = percentile_thresholds.get('medium', 0.60)
-        
-        # Determine risk level with tighter criteria
-        if churn_probability >= high_threshold:
-            risk_level = "High"
-        elif churn_probability >= medium_threshold:
-            risk_level = "Medium"
-        else:
-            risk_level = "Low"
+        # Use the thresholds persisted with the batch run when given,
+        # falling back to tight defaults (ensures <15% high risk)
+        thresholds = dict(DEFAULT_RISK_THRESHOLDS)
+        if percentile_thresholds is not None:
+            thresholds.update({k: v for k, v in percentile_thresholds.items() if v is not None})
+        
+        risk_level = str(assign_risk_levels([churn_probability], thresholds)[0])
         
         return {
             'churn_probability': churn_probability,
             'risk_level': risk_level
         }
     
-    def save_model(self):
-        """Save the trained model"""
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(model_dir, exist_ok=True)
-        
-        joblib.dump(self.model, os.path.join(model_dir, 'churn_model.pkl'))
-        joblib.dump(self.scaler, os.path.join(model_dir, 'churn_scaler.pkl'))
-        joblib.dump(self.label_encoders, os.path.join(model_dir, 'churn_encoders.pkl'))
-        joblib.dump(self.feature_columns, os.path.join(model_dir, 'churn_features.pkl'))
+    def save_model(self, promote=True):
+        """Save the trained model as a new registry version, serving it unless promote is False"""
+        if self.model_version is None:
+            raise ValueError('model_version must be set before saving a model')
+        metadata = {'backend': self.backend, 'params': self.params}
+        with publish('churn_prediction', self.model_version, metadata, promote_version=promote) as model_dir:
+            joblib.dump(self.model, os.path.join(model_dir, 'model.pkl'))
+            joblib.dump(self.scaler, os.path.join(model_dir, 'scaler.pkl'))
+            joblib.dump(self.label_encoders, os.path.join(model_dir, 'encoders.pkl'))
+            joblib.dump(self.feature_columns, os.path.join(model_dir, 'features.pkl'))
+            save_engine(self.engine, os.path.join(model_dir, 'engine.npz'))
     
-    def load_model(self):
-        """Load the trained model"""
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        
-        self.model = joblib.load(os.path.join(model_dir, 'churn_model.pkl'))
-        self.scaler = joblib.load(os.path.join(model_dir, 'churn_scaler.pkl'))
-        self.label_encoders = joblib.load(os.path.join(model_dir, 'churn_encoders.pkl'))
-        self.feature_columns = joblib.load(os.path.join(model_dir, 'churn_features.pkl'))
+    def load_model(self, version=None):
+        """Load a saved model, by default the version currently served"""
+        # Imported here so validation's worker processes can import this
+        # module without Django settings
+        from .metrics import MODEL_LOAD_SECONDS
+        with MODEL_LOAD_SECONDS.time(model_type='churn_prediction'):
+            model_dir, manifest = resolve('churn_prediction', version)
+            
+            self.model = joblib.load(os.path.join(model_dir, 'model.pkl'))
+            self.scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+            self.label_encoders = joblib.load(os.path.join(model_dir, 'encoders.pkl'))
+            self.feature_columns = joblib.load(os.path.join(model_dir, 'features.pkl'))
+            self.category_codes = None
+            self.engine = load_engine(os.path.join(model_dir, 'engine.npz'))
+            self.model_version = manifest['version']
+            self.backend = manifest['metadata']['backend']
+            self.params = manifest['metadata']['params']
 
 
 class SalesForecastModel:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
-        self.model_version = "v1.0"
+        # Named by the training run (versioning.new_model_version) before saving
+        self.model_version = None
+        self.backend = DEFAULT_BACKEND
+        self.params = {}
+        self.engine = None
+        self.interval_method = None
+        # Lower and upper bound models of the 'quantile' interval method
+        self.interval_models = None
     
     def prepare_sales_data(self, df):
         """Prepare sales data for forecasting"""
@@ -170,16 +513,30 @@ class SalesForecastModel:
         sales_data['day_of_week'] = sales_data['order_date'].dt.dayofweek
         sales_data['day_of_year'] = sales_data['order_date'].dt.dayofyear
         
-        return sales_data
+        # Each product's lags, rolling means and seasonal means
+        return add_history_features(sales_data)
     
-    def train(self, df):
-        """Train the sales forecasting model"""
+    def training_data(self, df):
+        """Feature matrix and target quantities for an order frame
+        
+        History features need each product's full history, so frames must
+        not split a product's days (sales_frames keeps them together).
+        """
         sales_data = self.prepare_sales_data(df)
+        return sales_data[SALES_FEATURES], sales_data['quantity']
+    
+    def train(self, df, n_jobs=None, save=True, backend=None, params=None, intervals=None):
+        """Train the sales forecasting model
         
-        # Prepare features and target
-        feature_columns = ['year', 'month', 'day_of_week', 'day_of_year', 'unit_price']
-        X = sales_data[feature_columns]
-        y = sales_data['quantity']
+        Args:
+            df: Order frame
+            n_jobs: Cores used to fit the forest (None for one, -1 for all)
+            save: Persist the trained model with save_model
+            backend: Key of ESTIMATOR_BACKENDS, defaults to random_forest
+            params: Hyperparameters overriding the backend defaults
+            intervals: Key of INTERVAL_METHODS, defaults to ML_FORECAST_INTERVALS
+        """
+        X, y = self.training_data(df)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -189,21 +546,104 @@ class SalesForecastModel:
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train model
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.backend = backend or DEFAULT_BACKEND
+        self.model, self.params = build_estimator('regressor', self.backend, params, n_jobs)
         self.model.fit(X_train_scaled, y_train)
+        self.engine = compile_forest(self.model, self.scaler, check_rows=X_test)
+        self.fit_intervals(intervals, X_train_scaled, y_train)
         
         # Evaluate model
         y_pred = self.model.predict(X_test_scaled)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
+        bounds = self.predict_intervals(X_test.to_numpy(dtype=np.float64))
         
         # Save model
-        self.save_model()
+        if save:
+            self.save_model()
         
         return {
             'mse': mse,
             'r2_score': r2,
-            'test_size': len(X_test)
+            'interval_method': self.interval_method,
+            # Share of held-out days inside their forecast interval
+            'interval_coverage': float(np.mean((bounds[:, 1] <= y_test.to_numpy()) & (y_test.to_numpy() <= bounds[:, 2]))),
+            'test_size': len(X_test),
+            'backend': self.backend,
+            'params': self.params
+        }
+    
+    def fit_intervals(self, method, X_scaled, y):
+        """Prepare FORECAST_CONFIDENCE_LEVEL prediction intervals for a fitted model"""
+        method = method or settings.ML_FORECAST_INTERVALS
+        if method not in INTERVAL_METHODS:
+            raise ValueError(f"Unknown interval method '{method}'. Use one of: {', '.join(INTERVAL_METHODS)}")
+        if method == 'trees' and not is_forest(self.model):
+            method = 'quantile'
+        
+        self.interval_method = method
+        self.interval_models = None
+        if method == 'quantile':
+            alpha = (1 - FORECAST_CONFIDENCE_LEVEL) / 2
+            self.interval_models = [
+                HistGradientBoostingRegressor(loss='quantile', quantile=quantile, random_state=42).fit(X_scaled, y)
+                for quantile in (alpha, 1 - alpha)
+            ]
+    
+    def train_incremental(self, frames, save=True, backend=None, params=None):
+        """Train on chunks of daily product sales without loading them all at once
+        
+        Args:
+            frames: Callable returning a fresh iterator of frames with
+                    product_id, order_date, quantity and unit_price, one row
+                    per product and day, each product within one frame;
+                    consumed three times in the same order
+            save: Persist the trained model with save_model
+            backend: Incremental backend key, defaults to sgd
+            params: Hyperparameters overriding the backend defaults
+        """
+        self.backend = backend or INCREMENTAL_BACKEND
+        self.model, self.params = incremental_estimator('regressor', self.backend, params)
+        self.engine = None
+        self.interval_method = None
+        self.interval_models = None
+        self.scaler = StandardScaler()
+        
+        def chunks():
+            offset = 0
+            for df in frames():
+                X, y = self.training_data(df)
+                yield X, y.to_numpy(dtype=float), holdout_mask(offset, len(X))
+                offset += len(X)
+        
+        for X, _, holdout in chunks():
+            if (~holdout).any():
+                self.scaler.partial_fit(X[~holdout])
+        
+        training_rows = 0
+        for X, y, holdout in chunks():
+            if (~holdout).any():
+                self.model.partial_fit(self.scaler.transform(X[~holdout]), y[~holdout])
+                training_rows += int((~holdout).sum())
+        
+        y_test, y_pred = [], []
+        for X, y, holdout in chunks():
+            if holdout.any():
+                y_test.append(y[holdout])
+                y_pred.append(self.model.predict(self.scaler.transform(X[holdout])))
+        y_test = np.concatenate(y_test) if y_test else np.array([])
+        y_pred = np.concatenate(y_pred) if y_pred else np.array([])
+        
+        if save:
+            self.save_model()
+        
+        return {
+            'mse': mean_squared_error(y_test, y_pred) if len(y_test) else 0.0,
+            'r2_score': r2_score(y_test, y_pred) if len(y_test) > 1 else 0.0,
+            'test_size': len(y_test),
+            'training_rows': training_rows,
+            'backend': self.backend,
+            'params': self.params
         }
     
     def forecast(self, product_data):
@@ -214,77 +654,145 @@ class SalesForecastModel:
                 - unit_price: Product unit price
                 - forecast_period: 'daily', 'weekly', 'monthly', 'quarterly', 'yearly'
                 - forecast_horizon: Number of periods to forecast
+                - history: The product's daily sales (order_date, quantity,
+                           unit_price), oldest first; empty if omitted
         """
-        if self.model is None:
-            self.load_model()
-        
         forecast_period = product_data.get('forecast_period', 'monthly')
         forecast_horizon = product_data.get('forecast_horizon', 12)
-        unit_price = product_data.get('unit_price', 0)
-        
-        # Generate future dates
-        if forecast_period == 'daily':
-            dates = pd.date_range(start=datetime.now(), periods=forecast_horizon, freq='D')
-        elif forecast_period == 'weekly':
-            dates = pd.date_range(start=datetime.now(), periods=forecast_horizon, freq='W')
-        elif forecast_period == 'monthly':
-            # Use month-end to avoid FutureWarning about 'M'
-            dates = pd.date_range(start=datetime.now(), periods=forecast_horizon, freq='ME')
-        elif forecast_period == 'quarterly':
-            # Use quarter-end
-            dates = pd.date_range(start=datetime.now(), periods=forecast_horizon, freq='QE')
-        else:  # yearly
-            dates = pd.date_range(start=datetime.now(), periods=forecast_horizon, freq='YE')
-        
-        # Prepare features for forecast
-        forecast_data = []
-        for date in dates:
-            features = {
-                'year': date.year,
-                'month': date.month,
-                'day_of_week': date.dayofweek,
-                'day_of_year': date.dayofyear,
-                'unit_price': unit_price
-            }
-            forecast_data.append(features)
-        
-        X_forecast = pd.DataFrame(forecast_data)
-        
-        # Check if we have the required columns
-        required_cols = ['year', 'month', 'day_of_week', 'day_of_year', 'unit_price']
-        missing_cols = [col for col in required_cols if col not in X_forecast.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-        
-        X_forecast_scaled = self.scaler.transform(X_forecast[required_cols])
-        
-        # Generate predictions
-        predictions = self.model.predict(X_forecast_scaled)
-        
-        # Ensure non-negative predictions
-        predictions = np.maximum(predictions, 0)
-        
-        # Calculate confidence level (simplified)
-        confidence_level = 0.8  # This could be calculated based on model uncertainty
+        dates = forecast_dates(forecast_period, forecast_horizon)
+        
+        history = product_data.get('history')
+        if history is None:
+            history = pd.DataFrame(columns=['order_date', 'quantity', 'unit_price'])
+        history = SalesHistory.from_frame(
+            history.assign(product_id=0), product_ids=[0], unit_prices=[float(product_data.get('unit_price', 0))]
+        )
+        forecasts = self.forecast_products(history, dates)[0]
         
         return {
             'dates': dates.tolist(),
-            'predictions': predictions.tolist(),
-            'confidence_level': confidence_level
+            'predictions': forecasts[:, 0].tolist(),
+            # None when the model has no interval method (incremental training)
+            'lower_bound': [None if np.isnan(bound) else bound for bound in forecasts[:, 1].tolist()],
+            'upper_bound': [None if np.isnan(bound) else bound for bound in forecasts[:, 2].tolist()],
+            'confidence_level': FORECAST_CONFIDENCE_LEVEL
         }
     
-    def save_model(self):
-        """Save the trained model"""
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(model_dir, exist_ok=True)
+    def forecast_products(self, history, dates):
+        """Recursive forecast of every product in a SalesHistory at once
         
-        joblib.dump(self.model, os.path.join(model_dir, 'sales_model.pkl'))
-        joblib.dump(self.scaler, os.path.join(model_dir, 'sales_scaler.pkl'))
+        Each date is predicted for all products in one batch and fed back as
+        their latest sale; history is extended in place. Intervals are those
+        of each step's prediction given the forecast path so far.
+        
+        Returns:
+            Array of non-negative prediction, lower and upper bound,
+            shape (products, dates, 3)
+        """
+        if self.model is None:
+            self.load_model()
+        if self.model.n_features_in_ != len(SALES_FEATURES):
+            raise ValueError("The saved sales model predates per-product history features; retrain it")
+        return recursive_forecast(self.predict_intervals, history, dates, n_outputs=3)
+    
+    def scale(self, X):
+        """StandardScaler.transform's arithmetic, without its feature-name check"""
+        return (X - self.scaler.mean_) / self.scaler.scale_
     
-    def load_model(self):
-        """Load the trained model"""
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+    def predict_intervals(self, X):
+        """Predictions with their FORECAST_CONFIDENCE_LEVEL interval, for an unscaled feature array
         
-        self.model = joblib.load(os.path.join(model_dir, 'sales_model.pkl'))
-        self.scaler = joblib.load(os.path.join(model_dir, 'sales_scaler.pkl'))
+        With the 'trees' method every tree's prediction is collected for the
+        whole matrix in one pass and the bounds are quantiles across trees,
+        so intervals cost little more than the point forecast.
+        
+        Returns:
+            Array of prediction, lower and upper bound, shape (rows, 3);
+            bounds are NaN when the model has no interval method
+        """
+        alpha = (1 - FORECAST_CONFIDENCE_LEVEL) / 2
+        if self.interval_method == 'trees':
+            if self.engine is not None and len(X) <= ENGINE_MAX_ROWS:
+                per_tree = self.engine.tree_values(X)
+            else:
+                per_tree = tree_predictions(self.model, self.scale(X))
+            lower, upper = np.quantile(per_tree, [alpha, 1 - alpha], axis=1)
+            # With few trees a skewed mean can fall outside the quantiles
+            prediction = tree_mean(per_tree)
+            return np.column_stack([prediction, np.minimum(lower, prediction), np.maximum(upper, prediction)])
+        
+        prediction = self.predict_matrix(X)
+        if self.interval_method == 'quantile':
+            X_scaled = self.scale(X)
+            # The bound models are fitted separately, so keep them around the prediction
+            lower = np.minimum(self.interval_models[0].predict(X_scaled), prediction)
+            upper = np.maximum(self.interval_models[1].predict(X_scaled), prediction)
+            return np.column_stack([prediction, lower, upper])
+        return np.column_stack([prediction, np.full(len(X), np.nan), np.full(len(X), np.nan)])
+    
+    def predict_matrix(self, X):
+        """Predicted quantities for an unscaled feature matrix"""
+        if self.engine is not None and len(X) <= ENGINE_MAX_ROWS:
+            return self.engine.predict(np.asarray(X, dtype=np.float64))[:, 0]
+        if isinstance(X, np.ndarray):
+            return self.model.predict(self.scale(X))
+        return self.model.predict(self.scaler.transform(X))
+    
+    def save_model(self, promote=True):
+        """Save the trained model as a new registry version, serving it unless promote is False"""
+        if self.model_version is None:
+            raise ValueError('model_version must be set before saving a model')
+        metadata = {'backend': self.backend, 'params': self.params, 'interval_method': self.interval_method}
+        with publish('sales_forecast', self.model_version, metadata, promote_version=promote) as model_dir:
+            joblib.dump(self.model, os.path.join(model_dir, 'model.pkl'))
+            joblib.dump(self.scaler, os.path.join(model_dir, 'scaler.pkl'))
+            save_engine(self.engine, os.path.join(model_dir, 'engine.npz'))
+            if self.interval_models is not None:
+                joblib.dump(self.interval_models, os.path.join(model_dir, 'intervals.pkl'))
+    
+    def load_model(self, version=None):
+        """Load a saved model, by default the version currently served"""
+        # Imported here so validation's worker processes can import this
+        # module without Django settings
+        from .metrics import MODEL_LOAD_SECONDS
+        with MODEL_LOAD_SECONDS.time(model_type='sales_forecast'):
+            model_dir, manifest = resolve('sales_forecast', version)
+            
+            self.model = joblib.load(os.path.join(model_dir, 'model.pkl'))
+            self.scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+            self.engine = load_engine(os.path.join(model_dir, 'engine.npz'))
+            self.model_version = manifest['version']
+            self.backend = manifest['metadata']['backend']
+            self.params = manifest['metadata']['params']
+            self.interval_method = manifest['metadata']['interval_method']
+            
+            intervals_path = os.path.join(model_dir, 'intervals.pkl')
+            self.interval_models = joblib.load(intervals_path) if os.path.exists(intervals_path) else None
+
+
+
+SERVED_MODEL_CLASSES = {
+    'churn_prediction': ChurnPredictionModel,
+    'sales_forecast': SalesForecastModel,
+}
 
+# One loaded model per model type and process, shared by request handlers
+SERVED_MODELS = {}
+_served_lock = threading.Lock()
+
+
+def served_model(model_type):
+    """The currently served model of model_type, loaded once per process
+    
+    Only the registry's CURRENT pointer is read per call; the model is
+    reloaded when it names another version (a new training run, promote or
+    rollback).
+    """
+    version = current_version(model_type)
+    with _served_lock:
+        model = SERVED_MODELS.get(model_type)
+        if model is None or model.model_version != version:
+            model = SERVED_MODEL_CLASSES[model_type]()
+            model.load_model(version)
+            SERVED_MODELS[model_type] = model
+        return model
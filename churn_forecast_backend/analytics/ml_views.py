@@ -8,13 +8,47 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 
-from .models import Customer, Product, Order, ChurnPrediction, SalesForecast, ModelPerformance
+from .models import Customer, Product, Order, SalesForecast, ModelVersion
 from .serializers import (
     CustomerSerializer, ProductSerializer, OrderSerializer,
     ChurnPredictionSerializer, SalesForecastSerializer, ModelPerformanceSerializer,
-    CustomerChurnDataSerializer, SalesForecastDataSerializer
+    CustomerChurnDataSerializer, SalesForecastDataSerializer, ForecastRequestSerializer, TrainingRequestSerializer,
+    TuneRequestSerializer
 )
-from .ml_models import ChurnPredictionModel, SalesForecastModel
+from .ml_models import ChurnPredictionModel, served_model
+from .features import customer_features
+from .metrics import FORECAST_ROWS_WRITTEN
+from .registry import list_versions, pointer, promote, rollback
+from .sampling import daily_sales_frame
+from .tuning import tune_model
+from .pipeline import (
+    NoTrainingData, fit_churn, score_all, fit_sales, forecast_all, top_selling_products, rescore_changed_customers
+)
+
+
+def training_request(request):
+    """Estimator backend and hyperparameter overrides from a training request body
+
+    Raises a ValidationError, answered with 400, for options of the wrong
+    type or out of range; call it before the view's catch-all handler.
+    """
+    serializer = TrainingRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def forecast_request(request):
+    """Forecast period, horizon and product count from a forecast request body, validated like training_request"""
+    serializer = ForecastRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def tune_request(request):
+    """Hyperparameter search options from a tune request body, validated like training_request"""
+    serializer = TuneRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
 
 
 class MLTrainingViewSet(viewsets.ViewSet):
@@ -22,273 +56,289 @@ class MLTrainingViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['post'])
     def train_churn_model(self, request):
-        """Train the churn prediction model"""
+        """Train the churn prediction model and rescore all customers"""
+        options = training_request(request)
         try:
-            # Get all customer data
-            customers = Customer.objects.all()
-            orders = Order.objects.select_related('customer', 'product').all()
-            
-            # Convert to DataFrame
-            customer_data = []
-            for customer in customers:
-                customer_orders = orders.filter(customer=customer)
-                total_orders = customer_orders.count()
-                avg_order_value = customer_orders.aggregate(
-                    avg_value=Avg('quantity') * Avg('product__unit_price')
-                )['avg_value'] or 0
-                
-                customer_data.append({
-                    'customer_id': customer.customer_id,
-                    'age': customer.age,
-                    'gender': customer.gender,
-                    'country': customer.country,
-                    'signup_date': customer.signup_date,
-                    'last_purchase_date': customer.last_purchase_date,
-                    'cancellations_count': customer.cancellations_count,
-                    'subscription_status': customer.subscription_status,
-                    'purchase_frequency': customer.purchase_frequency,
-                    'ratings': customer.ratings,
-                    'total_orders': total_orders,
-                    'avg_order_value': avg_order_value
+            fit_result = fit_churn(**options)
+            scored = ModelVersion.objects.filter(
+                model_type='churn_prediction', status=ModelVersion.STATUS_ACTIVE,
+                artifact_version=fit_result['model_version']
+            ).exists()
+            if fit_result['cached'] and scored:
+                # Same data and model as the active predictions: nothing to rescore
+                print(f"Churn model {fit_result['model_version']} is up to date; predictions kept")
+                return Response({
+                    'message': 'Churn prediction model is up to date',
+                    'performance': fit_result['performance'],
+                    'cached': True
                 })
+            score_result = score_all()
+            
+            distribution = score_result['risk_distribution']
+            total = score_result['predictions_created']
+            if total:
+                thresholds = score_result['thresholds']
+                print(f"Created {total} churn predictions")
+                print(f"Risk distribution - High: {distribution.get('High', 0)} ({distribution.get('High', 0)/total*100:.1f}%), "
+                      f"Medium: {distribution.get('Medium', 0)} ({distribution.get('Medium', 0)/total*100:.1f}%), "
+                      f"Low: {distribution.get('Low', 0)} ({distribution.get('Low', 0)/total*100:.1f}%)")
+                print(f"Thresholds used - High: {thresholds['high']:.3f}, Medium: {thresholds['medium']:.3f}")
+            else:
+                print("No predictions generated")
             
-            df = pd.DataFrame(customer_data)
+            return Response({
+                'message': 'Churn prediction model trained successfully',
+                'performance': fit_result['performance'],
+                'cached': fit_result['cached']
+            })
             
-            # Train model
-            churn_model = ChurnPredictionModel()
-            performance = churn_model.train(df)
+        except NoTrainingData as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def fit_churn_model(self, request):
+        """Train and persist the churn model without rescoring customers
+
+        Body (all optional): backend (random_forest, hist_gradient_boosting
+        or sgd), params (hyperparameter overrides), n_jobs, mode (full, sample
+        or incremental), max_rows (sample size), cv (folds, 0 for a single
+        holdout split), cv_scheme (kfold or time_series) and force (retrain
+        even when the data is unchanged since the saved model).
+        """
+        options = training_request(request)
+        try:
+            result = fit_churn(**options)
+            return Response({
+                'message': 'Churn prediction model trained successfully',
+                **result
+            })
             
-            # Save performance metrics
-            ModelPerformance.objects.create(
-                model_type='churn_prediction',
-                model_version=churn_model.model_version,
-                accuracy=performance['accuracy'],
-                precision=performance['precision'],
-                recall=performance['recall'],
-                f1_score=performance['f1_score'],
-                test_data_size=performance['test_size']
-            )
+        except NoTrainingData as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def tune(self, request):
+        """Search hyperparameters and record the best candidate per backend
+
+        Body: model_type (churn_prediction or sales_forecast) and, optionally,
+        backends, search (random or halving), n_candidates, cv, n_jobs,
+        refit (train and save the winner) and dry_run.
+        """
+        options = tune_request(request)
+        try:
+            result = tune_model(**options)
+            return Response({
+                'message': 'Hyperparameter search completed',
+                **result
+            })
             
-            # Generate predictions for all customers
-            ChurnPrediction.objects.all().delete()  # Clear existing predictions
-            
-            # First, get all predictions with probabilities
-            all_predictions = []
-            predictions_created = 0
-            
-            for _, row in df.iterrows():
-                try:
-                    customer = Customer.objects.get(customer_id=row['customer_id'])
-                    customer_dict = row.to_dict()
-                    
-                    # Get probability first (without risk level)
-                    df_temp = pd.DataFrame([customer_dict])
-                    X, _ = churn_model.prepare_features(df_temp)
-                    X_scaled = churn_model.scaler.transform(X)
-                    churn_probability = churn_model.model.predict_proba(X_scaled)[0, 1]
-                    
-                    all_predictions.append({
-                        'customer': customer,
-                        'churn_probability': churn_probability
-                    })
-                except Exception as e:
-                    print(f"Error predicting for customer {row.get('customer_id', 'unknown')}: {str(e)}")
-                    continue
-            
-            # Calculate percentile-based thresholds to ensure <10% high risk
-            if all_predictions:
-                probabilities = [p['churn_probability'] for p in all_predictions]
-                high_threshold = np.percentile(probabilities, 90)  # Top 10% are high risk
-                medium_threshold = np.percentile(probabilities, 70)  # 10-30% are medium risk
-                
-                # Ensure thresholds are reasonable
-                if high_threshold < 0.75:
-                    high_threshold = 0.75  # Minimum threshold for high risk
-                if medium_threshold < 0.50:
-                    medium_threshold = 0.50  # Minimum threshold for medium risk
-                
-                percentile_thresholds = {
-                    'high': high_threshold,
-                    'medium': medium_threshold
-                }
-                
-                # Now assign risk levels using percentile-based thresholds
-                predictions_to_create = []
-                for pred in all_predictions:
-                    prob = pred['churn_probability']
-                    if prob >= high_threshold:
-                        risk_level = "High"
-                    elif prob >= medium_threshold:
-                        risk_level = "Medium"
-                    else:
-                        risk_level = "Low"
-                    
-                    predictions_to_create.append(ChurnPrediction(
-                        customer=pred['customer'],
-                        churn_probability=prob,
-                        risk_level=risk_level,
-                        model_version=churn_model.model_version
-                    ))
-                    predictions_created += 1
-                
-                # Bulk create predictions
-                ChurnPrediction.objects.bulk_create(predictions_to_create, batch_size=500)
-                
-                # Verify distribution
-                total = ChurnPrediction.objects.count()
-                high_count = ChurnPrediction.objects.filter(risk_level='High').count()
-                medium_count = ChurnPrediction.objects.filter(risk_level='Medium').count()
-                low_count = ChurnPrediction.objects.filter(risk_level='Low').count()
-                
-                print(f"Created {predictions_created} churn predictions")
-                print(f"Risk distribution - High: {high_count} ({high_count/total*100:.1f}%), "
-                      f"Medium: {medium_count} ({medium_count/total*100:.1f}%), "
-                      f"Low: {low_count} ({low_count/total*100:.1f}%)")
-                print(f"Thresholds used - High: {high_threshold:.3f}, Medium: {medium_threshold:.3f}")
+        except NoTrainingData as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def model_versions(self, request):
+        """Saved versions of a model (?model_type=, churn_prediction by default), newest first"""
+        model_type = request.query_params.get('model_type', 'churn_prediction')
+        try:
+            return Response({
+                'model_type': model_type,
+                'current': pointer(model_type),
+                'versions': list_versions(model_type)
+            })
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def rollback_model(self, request):
+        """Serve an earlier saved model version
+
+        Body: model_type (churn_prediction or sales_forecast) and, optionally,
+        version to serve; without it the previously served version is restored.
+        Stored predictions and forecasts keep their version until the next
+        score_churn or generate_forecasts run.
+        """
+        model_type = request.data.get('model_type', 'churn_prediction')
+        try:
+            if request.data.get('version'):
+                version = promote(model_type, request.data['version'])
             else:
-                print("No predictions generated")
-            
+                version = rollback(model_type)
             return Response({
-                'message': 'Churn prediction model trained successfully',
-                'performance': performance
+                'message': f'Serving {model_type} {version}',
+                'model_type': model_type,
+                'model_version': version
+            })
+        except (FileNotFoundError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def score_churn(self, request):
+        """Score all customers with the persisted churn model"""
+        try:
+            result = score_all()
+            return Response({
+                'message': f"Scored {result['predictions_created']} customers",
+                **result
             })
             
+        except FileNotFoundError:
+            return Response({
+                'error': 'No trained churn model found. Train the churn model first.'
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['post'])
-    def train_sales_model(self, request):
-        """Train the sales forecasting model"""
+    def rescore_churn(self, request):
+        """Rescore only customers whose data or orders changed since the last scoring run"""
         try:
-            # Get all order data
-            orders = Order.objects.select_related('customer', 'product').all()
-            
-            # Convert to DataFrame
-            order_data = []
-            for order in orders:
-                order_data.append({
-                    'order_id': order.order_id,
-                    'product_id': order.product.product_id,
-                    'product_name': order.product.product_name,
-                    'category': order.product.category,
-                    'unit_price': order.product.unit_price,
-                    'quantity': order.quantity,
-                    'order_date': order.order_date
-                })
+            active_version = ModelVersion.objects.filter(
+                model_type='churn_prediction',
+                status=ModelVersion.STATUS_ACTIVE
+            ).first()
+            if active_version is None:
+                return Response({
+                    'error': 'No active churn model. Train the churn model first.'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            df = pd.DataFrame(order_data)
+            since = active_version.scored_at or active_version.created_at
+            churn_model = ChurnPredictionModel()
+            churn_model.load_model()
+            if active_version.artifact_version and churn_model.model_version != active_version.artifact_version:
+                # Mixing models within one prediction set would skew the tiers
+                return Response({
+                    'error': 'The churn model was retrained since the last full scoring run. Run score_churn first.'
+                }, status=status.HTTP_409_CONFLICT)
+            rescored = rescore_changed_customers(churn_model, active_version)
             
+            return Response({
+                'message': f'Rescored {rescored} changed customers',
+                'customers_rescored': rescored,
+                'changed_since': since,
+                'model_version': active_version.version
+            })
+            
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def train_sales_model(self, request):
+        """Train the sales forecasting model and forecast the top products"""
+        options = training_request(request)
+        try:
             import time
             start_time = time.time()
             
             print("=" * 60)
             print("Starting sales forecasting model training...")
-            print(f"Processing {len(df)} order records...")
             
-            # Train model
-            sales_model = SalesForecastModel()
-            print("Training the Random Forest model...")
-            train_start = time.time()
-            performance = sales_model.train(df)
-            train_time = time.time() - train_start
+            fit_result = fit_sales(**options)
+            performance = fit_result['performance']
             
-            print(f"✓ Model trained successfully in {train_time:.2f} seconds!")
+            print(f"✓ Model trained on {fit_result['training_rows']} daily product sales rows in {fit_result['seconds']:.2f} seconds!")
             print(f"  R² Score: {performance['r2_score']:.3f}")
             print(f"  MSE: {performance['mse']:.2f}")
             
-            # Save performance metrics
-            ModelPerformance.objects.create(
-                model_type='sales_forecast',
-                model_version=sales_model.model_version,
-                accuracy=performance['r2_score'],
-                precision=0.0,
-                recall=0.0,
-                f1_score=0.0,
-                test_data_size=performance['test_size']
-            )
-            
             # Only generate forecasts for top 20 products to speed up training
             # Users can generate forecasts on-demand for specific products via the API
             print("\nGenerating forecasts for top 20 products (for dashboard display)...")
-            SalesForecast.objects.all().delete()
-            
-            # Get top products by order count
-            top_products = Product.objects.annotate(
-                order_count=Count('orders')
-            ).filter(order_count__gt=0).order_by('-order_count')[:20]
+            forecast_result = forecast_all(products=top_selling_products(20))
             
-            if not top_products.exists():
-                print("No products with orders found. Skipping forecast generation.")
-                total_time = time.time() - start_time
-                return Response({
-                    'message': 'Sales forecasting model trained successfully',
-                    'performance': performance,
-                    'forecasts_generated': 0,
-                    'products_forecasted': 0,
-                    'training_time_seconds': round(train_time, 2),
-                    'total_time_seconds': round(total_time, 2),
-                    'note': 'No products with orders found. Model is ready for on-demand forecasting.'
-                })
-            
-            forecasts_to_create = []
-            forecast_start = time.time()
-            
-            for idx, product in enumerate(top_products, 1):
-                try:
-                    # Generate monthly forecast for next 12 months
-                    forecast_data = {
-                        'unit_price': product.unit_price,
-                        'forecast_period': 'monthly',
-                        'forecast_horizon': 12
-                    }
-                    
-                    forecast_result = sales_model.forecast(forecast_data)
-                    
-                    # Prepare forecasts for bulk creation
-                    for date, quantity in zip(forecast_result['dates'], forecast_result['predictions']):
-                        forecasts_to_create.append(SalesForecast(
-                            product=product,
-                            forecast_date=date.date() if hasattr(date, 'date') else date,
-                            predicted_quantity=int(max(0, quantity)),
-                            confidence_level=forecast_result['confidence_level'],
-                            forecast_period='monthly',
-                            model_version=sales_model.model_version
-                        ))
-                    
-                    if idx % 5 == 0:
-                        print(f"  Processed {idx}/{len(top_products)} products...")
-                        
-                except Exception as e:
-                    print(f"  ⚠ Error forecasting for product {product.product_id}: {str(e)}")
-                    continue
-            
-            # Bulk insert all forecasts at once
-            if forecasts_to_create:
-                print(f"Inserting {len(forecasts_to_create)} forecasts into database...")
-                SalesForecast.objects.bulk_create(forecasts_to_create, batch_size=500)
-                forecast_time = time.time() - forecast_start
-                print(f"✓ Generated {len(forecasts_to_create)} forecasts for {len(top_products)} products in {forecast_time:.2f} seconds")
-            else:
-                print("⚠ No forecasts generated")
+            print(f"✓ Generated {forecast_result['forecasts_generated']} forecasts for "
+                  f"{forecast_result['products_forecasted']} products in {forecast_result['seconds']:.2f} seconds")
             
             total_time = time.time() - start_time
             print("=" * 60)
             print(f"✓ Sales forecasting model training completed in {total_time:.2f} seconds!")
             print("=" * 60)
             
-            return Response({
+            response_data = {
                 'message': 'Sales forecasting model trained successfully',
                 'performance': performance,
-                'forecasts_generated': len(forecasts_to_create),
-                'products_forecasted': len(top_products),
-                'training_time_seconds': round(train_time, 2),
-                'forecast_generation_time_seconds': round(forecast_time if forecasts_to_create else 0, 2),
+                'cached': fit_result['cached'],
+                'forecasts_generated': forecast_result['forecasts_generated'],
+                'products_forecasted': forecast_result['products_forecasted'],
+                'training_time_seconds': fit_result['seconds'],
+                'forecast_generation_time_seconds': forecast_result['seconds'],
                 'total_time_seconds': round(total_time, 2),
                 'note': 'Forecasts generated for top 20 products. Use forecast_sales endpoint for other products.'
+            }
+            if not forecast_result['products_forecasted']:
+                response_data['note'] = 'No products with orders found. Model is ready for on-demand forecasting.'
+            
+            return Response(response_data)
+            
+        except NoTrainingData as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def fit_sales_model(self, request):
+        """Train and persist the sales forecasting model without generating forecasts
+
+        Body (all optional): backend (random_forest, hist_gradient_boosting
+        or sgd), params (hyperparameter overrides), n_jobs, mode (full, sample
+        or incremental), max_rows (sample size), cv (folds, 0 for a single
+        holdout split), cv_scheme (kfold or time_series) and force (retrain
+        even when the data is unchanged since the saved model).
+        """
+        options = training_request(request)
+        try:
+            result = fit_sales(**options)
+            return Response({
+                'message': 'Sales forecasting model trained successfully',
+                **result
             })
             
+        except NoTrainingData as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def generate_forecasts(self, request):
+        """Generate forecasts with the persisted sales model
+
+        Body (all optional): top_products (forecast only the N best sellers),
+        forecast_period and forecast_horizon.
+        """
+        options = forecast_request(request)
+        try:
+            top_products = options['top_products']
+            products = top_selling_products(top_products) if top_products else None
+            periods = [(options['forecast_period'], options['forecast_horizon'])]
+            
+            result = forecast_all(products=products, periods=periods)
+            return Response({
+                'message': f"Generated {result['forecasts_generated']} forecasts",
+                **result
+            })
+            
+        except FileNotFoundError:
+            return Response({
+                'error': 'No trained sales model found. Train the sales model first.'
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': str(e)
@@ -301,31 +351,19 @@ class MLTrainingViewSet(viewsets.ViewSet):
             customer_id = request.data.get('customer_id')
             customer = get_object_or_404(Customer, customer_id=customer_id)
             
-            # Get customer data
-            orders = Order.objects.filter(customer=customer)
-            total_orders = orders.count()
-            avg_order_value = orders.aggregate(
-                avg_value=Avg('quantity') * Avg('product__unit_price')
-            )['avg_value'] or 0
-            
-            customer_data = {
-                'customer_id': customer.customer_id,
-                'age': customer.age,
-                'gender': customer.gender,
-                'country': customer.country,
-                'signup_date': customer.signup_date,
-                'last_purchase_date': customer.last_purchase_date,
-                'cancellations_count': customer.cancellations_count,
-                'subscription_status': customer.subscription_status,
-                'purchase_frequency': customer.purchase_frequency,
-                'ratings': customer.ratings,
-                'total_orders': total_orders,
-                'avg_order_value': avg_order_value
-            }
+            # Read the customer's features from the feature store
+            customer_data = customer_features(customer)
             
-            # Load model and predict
-            churn_model = ChurnPredictionModel()
-            prediction = churn_model.predict(customer_data)
+            # Load model and predict with the cut-offs of the active batch run
+            active_version = ModelVersion.objects.filter(
+                model_type='churn_prediction',
+                status=ModelVersion.STATUS_ACTIVE
+            ).first()
+            churn_model = served_model('churn_prediction')
+            prediction = churn_model.predict(
+                customer_data,
+                percentile_thresholds=active_version.risk_thresholds if active_version else None
+            )
             
             return Response(prediction)
             
@@ -337,10 +375,10 @@ class MLTrainingViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def forecast_sales(self, request):
         """Generate sales forecast for a specific product"""
+        options = forecast_request(request)
+        forecast_period, forecast_horizon = options['forecast_period'], options['forecast_horizon']
         try:
             product_id = request.data.get('product_id')
-            forecast_period = request.data.get('forecast_period', 'monthly')
-            forecast_horizon = int(request.data.get('forecast_horizon', 12))
             
             product = get_object_or_404(Product, product_id=product_id)
             orders = Order.objects.filter(product=product)
@@ -356,27 +394,31 @@ class MLTrainingViewSet(viewsets.ViewSet):
                 'product_name': product.product_name,
                 'category': product.category,
                 'unit_price': product.unit_price,
-                'historical_sales': list(orders.values_list('quantity', flat=True)),
+                'history': daily_sales_frame(products=[product]),
                 'forecast_period': forecast_period,
                 'forecast_horizon': forecast_horizon
             }
             
-            # Load model and forecast
-            sales_model = SalesForecastModel()
+            # Forecast with the served model
+            sales_model = served_model('sales_forecast')
             forecast_result = sales_model.forecast(forecast_data)
             
             # Save forecasts to database for top_selling endpoint
             SalesForecast.objects.filter(product=product).delete()  # Clear existing forecasts
             
-            for i, (date, quantity) in enumerate(zip(forecast_result['dates'], forecast_result['predictions'])):
+            for date, quantity, lower, upper in zip(forecast_result['dates'], forecast_result['predictions'],
+                                                    forecast_result['lower_bound'], forecast_result['upper_bound']):
                 SalesForecast.objects.create(
                     product=product,
                     forecast_date=date.date(),
                     predicted_quantity=int(max(0, quantity)),
+                    lower_bound=lower,
+                    upper_bound=upper,
                     confidence_level=forecast_result['confidence_level'],
                     forecast_period=forecast_period,
                     model_version=sales_model.model_version
                 )
+            FORECAST_ROWS_WRITTEN.inc(len(forecast_result['dates']), source='on_demand')
             
             return Response(forecast_result)
             
@@ -389,48 +431,13 @@ class MLTrainingViewSet(viewsets.ViewSet):
     def generate_all_forecasts(self, request):
         """Generate sales forecasts for all products with extended periods"""
         try:
-            from datetime import datetime, timedelta
-            
-            # Get all products
-            products = Product.objects.all()
-            orders = Order.objects.select_related('product').all()
-            
-            # Clear existing forecasts
-            SalesForecast.objects.all().delete()
-            
-            sales_model = SalesForecastModel()
-            
-            for product in products:
-                product_orders = orders.filter(product=product)
-                if product_orders.exists():
-                    # Generate forecasts for different periods
-                    periods = [
-                        {'period': 'quarterly', 'horizon': 4, 'freq': 'Q'},  # Next 4 quarters
-                        {'period': 'yearly', 'horizon': 3, 'freq': 'Y'},     # Next 3 years (2025-2027)
-                    ]
-                    
-                    for period_config in periods:
-                        forecast_data = {
-                            'unit_price': product.unit_price,
-                            'forecast_period': period_config['period'],
-                            'forecast_horizon': period_config['horizon']
-                        }
-                        
-                        forecast_result = sales_model.forecast(forecast_data)
-                        
-                        # Save forecasts
-                        for i, (date, quantity) in enumerate(zip(forecast_result['dates'], forecast_result['predictions'])):
-                            SalesForecast.objects.create(
-                                product=product,
-                                forecast_date=date.date(),
-                                predicted_quantity=int(max(0, quantity)),
-                                confidence_level=forecast_result['confidence_level'],
-                                forecast_period=period_config['period'],
-                                model_version=sales_model.model_version
-                            )
+            result = forecast_all(periods=[
+                ('quarterly', 4),  # Next 4 quarters
+                ('yearly', 3),     # Next 3 years
+            ])
             
             return Response({
-                'message': f'Generated forecasts for {products.count()} products',
+                'message': f"Generated forecasts for {result['products_forecasted']} products",
                 'forecast_periods': ['quarterly', 'yearly'],
                 'time_horizon': '2025-2027'
             })
@@ -439,4 +446,3 @@ class MLTrainingViewSet(viewsets.ViewSet):
             return Response({
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
@@ -18,11 +18,38 @@ class Customer(models.Model):
 
     class Meta:
         db_table = 'customers'
+        indexes = [
+            models.Index(fields=['updated_at'], name='customers_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"Customer {self.customer_id}"
 
 
+class CustomerFeatures(models.Model):
+    """Per-customer churn features, maintained incrementally by analytics.features"""
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='features')
+    schema_version = models.IntegerField()
+    age = models.IntegerField()
+    gender = models.CharField(max_length=10)
+    country = models.CharField(max_length=100)
+    subscription_status = models.CharField(max_length=20)
+    signup_date = models.DateField()
+    last_purchase_date = models.DateField()
+    cancellations_count = models.IntegerField()
+    purchase_frequency = models.IntegerField()
+    ratings = models.FloatField()
+    total_orders = models.IntegerField()
+    avg_order_value = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'customer_features'
+
+    def __str__(self):
+        return f"Features for customer {self.customer_id} (schema v{self.schema_version})"
+
+
 class Product(models.Model):
     product_id = models.CharField(max_length=50, unique=True)
     product_name = models.CharField(max_length=200)
@@ -49,6 +76,11 @@ class Order(models.Model):
 
     class Meta:
         db_table = 'orders'
+        indexes = [
+            # Date-range filters and date-bucketed trends scan by order_date
+            models.Index(fields=['order_date'], name='orders_order_date_idx'),
+            models.Index(fields=['updated_at'], name='orders_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id}"
@@ -58,6 +90,63 @@ class Order(models.Model):
         return self.quantity * self.product.unit_price
 
 
+class ModelVersion(models.Model):
+    STATUS_BUILDING = 'building'
+    STATUS_ACTIVE = 'active'
+    STATUS_RETIRED = 'retired'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_BUILDING, 'Building'),
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_RETIRED, 'Retired'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    model_type = models.CharField(max_length=50)  # churn_prediction, sales_forecast
+    version = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_BUILDING)
+    # Version of the trained model these rows were produced with
+    artifact_version = models.CharField(max_length=50, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+    # Risk cut-offs computed by the batch scoring run (churn models only)
+    high_threshold = models.FloatField(null=True, blank=True)
+    medium_threshold = models.FloatField(null=True, blank=True)
+    # Data changed after this point is picked up by incremental rescoring
+    scored_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'model_versions'
+        constraints = [
+            models.UniqueConstraint(fields=['model_type', 'version'], name='unique_model_version'),
+            # At most one active version per model type
+            models.UniqueConstraint(
+                fields=['model_type'],
+                condition=models.Q(status='active'),
+                name='one_active_model_version'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_type} {self.version} ({self.status})"
+
+    @property
+    def risk_thresholds(self):
+        if self.high_threshold is None or self.medium_threshold is None:
+            return None
+        return {'high': self.high_threshold, 'medium': self.medium_threshold}
+
+
+class ChurnPredictionQuerySet(models.QuerySet):
+    def active(self):
+        """Predictions of the currently active model version"""
+        active_version = ModelVersion.objects.filter(
+            model_type='churn_prediction',
+            status=ModelVersion.STATUS_ACTIVE
+        ).values('version')[:1]
+        return self.filter(model_version=models.Subquery(active_version))
+
+
 class ChurnPrediction(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='churn_predictions')
     churn_probability = models.FloatField()
@@ -65,8 +154,14 @@ class ChurnPrediction(models.Model):
     prediction_date = models.DateTimeField(auto_now_add=True)
     model_version = models.CharField(max_length=50, default='v1.0')
 
+    objects = ChurnPredictionQuerySet.as_manager()
+
     class Meta:
         db_table = 'churn_predictions'
+        indexes = [
+            models.Index(fields=['model_version', 'risk_level'], name='churn_pred_version_risk_idx'),
+            models.Index(fields=['model_version', '-churn_probability'], name='churn_pred_version_prob_idx'),
+        ]
 
     def __str__(self):
         return f"Churn prediction for {self.customer.customer_id}"
@@ -76,6 +171,9 @@ class SalesForecast(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_forecasts')
     forecast_date = models.DateField()
     predicted_quantity = models.IntegerField()
+    # Interval expected to hold the actual quantity with probability confidence_level
+    lower_bound = models.FloatField(null=True, blank=True)
+    upper_bound = models.FloatField(null=True, blank=True)
     confidence_level = models.FloatField()
     forecast_period = models.CharField(max_length=20)  # daily, weekly, monthly, quarterly, yearly
     model_version = models.CharField(max_length=50, default='v1.0')
@@ -97,6 +195,15 @@ class ModelPerformance(models.Model):
     f1_score = models.FloatField()
     training_date = models.DateTimeField(auto_now_add=True)
     test_data_size = models.IntegerField()
+    backend = models.CharField(max_length=50, default='random_forest')
+    hyperparameters = models.JSONField(default=dict, blank=True)
+    training_seconds = models.FloatField(null=True, blank=True)
+    # holdout: one train/test split of a training run; cross_validation:
+    # mean metrics over folds of a training run; search: mean cross-validated
+    # metrics of a hyperparameter search winner
+    evaluation = models.CharField(max_length=20, default='holdout')
+    # Metrics and fit/score timings of each fold, when cross-validated
+    fold_metrics = models.JSONField(default=list, blank=True)
 
     class Meta:
         db_table = 'model_performance'
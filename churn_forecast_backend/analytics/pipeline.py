@@ -0,0 +1,598 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, Q, Value, When
+from django.utils import timezone
+
+from .features import customer_feature_frame
+from .instrumentation import record_seconds
+from .metrics import CACHE_REQUESTS, FORECAST_ROWS_WRITTEN, PIPELINE_STEP_SECONDS, ROWS_SCORED, SCORING_SECONDS
+from .ml_models import (
+    FORECAST_CONFIDENCE_LEVEL, INCREMENTAL_BACKEND, ChurnPredictionModel, SalesForecastModel,
+    ProbabilityHistogram, assign_risk_levels, compute_risk_thresholds, forecast_dates, set_prediction_jobs
+)
+from .models import ChurnPrediction, Customer, ModelPerformance, Order, Product, SalesForecast
+from .registry import promote
+from .sampling import (
+    customer_categories, customer_frames, customer_population, customer_probe, daily_sales_frame,
+    sales_frames, sales_population, sales_probe, sample_customer_frame, sample_sales_frame,
+    training_row_budget
+)
+from .time_series import SalesHistory
+from .training_cache import cached_training, save_training_record, training_fingerprint
+from .validation import cross_validate
+from .versioning import (
+    activate_version, collect_old_versions_in_background, fail_version, new_model_version, start_version
+)
+
+
+def changed_customers(since):
+    """Customers whose record or orders changed after a scoring run"""
+    # Customers without stored features had orders deleted (or are new)
+    return Customer.objects.filter(
+        Q(updated_at__gt=since) |
+        Q(features__isnull=True) |
+        Q(pk__in=Order.objects.filter(updated_at__gt=since).values('customer_id'))
+    )
+
+
+# (forecast_period, forecast_horizon) pairs generated by forecast_all
+DEFAULT_FORECAST_PERIODS = [('monthly', 12)]
+
+
+def record_performance(model_type, model_version, performance, training_seconds=None, evaluation='holdout',
+                       fold_metrics=None):
+    """Store a training run's evaluation metrics and the backend that produced them"""
+    if model_type == 'sales_forecast':
+        # Regression runs report R² in the accuracy column
+        metrics = {'accuracy': performance['r2_score'], 'precision': 0.0, 'recall': 0.0, 'f1_score': 0.0}
+    else:
+        metrics = {key: performance[key] for key in ('accuracy', 'precision', 'recall', 'f1_score')}
+
+    return ModelPerformance.objects.create(
+        model_type=model_type,
+        model_version=model_version,
+        test_data_size=performance['test_size'],
+        backend=performance['backend'],
+        hyperparameters=performance['params'],
+        training_seconds=training_seconds,
+        evaluation=evaluation,
+        fold_metrics=fold_metrics or [],
+        **metrics
+    )
+
+
+def write_predictions(customer_pks, probabilities, risk_levels, model_version):
+    """Bulk insert one chunk of predictions under model_version"""
+    ChurnPrediction.objects.bulk_create([
+        ChurnPrediction(
+            customer_id=int(pk),
+            churn_probability=float(probability),
+            risk_level=str(risk_level),
+            model_version=model_version.version
+        )
+        for pk, probability, risk_level in zip(customer_pks, probabilities, risk_levels)
+    ], batch_size=1000)
+
+
+def score_customers(churn_model, df, model_version, chunk_size=None, scored_at=None):
+    """Score every customer in df and write predictions under model_version
+
+    Probabilities are computed a chunk at a time. Up to
+    CHURN_EXACT_PERCENTILE_LIMIT customers the thresholds are exact
+    percentiles and tiers are assigned in NumPy before writing; above it,
+    rows are written as they are scored, thresholds come from a streaming
+    histogram and tiers are assigned with a single UPDATE.
+
+    Args:
+        churn_model: Trained ChurnPredictionModel
+        df: Customer feature frame, including a 'customer_pk' column
+        model_version: ModelVersion the rows are written under; its
+                       thresholds are saved for single predictions
+        chunk_size: Customers scored per predict_proba call
+        scored_at: When the scored data was read, so later rescoring can
+                   pick up changes made after it (defaults to now)
+
+    Returns:
+        Tuple of (predictions created, risk thresholds)
+    """
+    chunk_size = chunk_size or settings.CHURN_SCORING_CHUNK_SIZE
+    total = len(df)
+    if total == 0:
+        return 0, None
+    started = time.perf_counter()
+
+    chunks = [df.iloc[start:start + chunk_size] for start in range(0, total, chunk_size)]
+
+    if total <= settings.CHURN_EXACT_PERCENTILE_LIMIT:
+        probabilities = np.concatenate([churn_model.predict_proba_batch(chunk) for chunk in chunks])
+        thresholds = compute_risk_thresholds(probabilities)
+        risk_levels = assign_risk_levels(probabilities, thresholds)
+        customer_pks = df['customer_pk'].to_numpy()
+        for start in range(0, total, chunk_size):
+            end = start + chunk_size
+            write_predictions(customer_pks[start:end], probabilities[start:end], risk_levels[start:end], model_version)
+    else:
+        sketch = ProbabilityHistogram()
+        for chunk in chunks:
+            probabilities = churn_model.predict_proba_batch(chunk)
+            sketch.update(probabilities)
+            # Tier is a placeholder until the thresholds are known
+            write_predictions(chunk['customer_pk'].to_numpy(), probabilities, ['Low'] * len(chunk), model_version)
+
+        thresholds = sketch.risk_thresholds()
+        ChurnPrediction.objects.filter(model_version=model_version.version).update(
+            risk_level=Case(
+                When(churn_probability__gte=thresholds['high'], then=Value('High')),
+                When(churn_probability__gte=thresholds['medium'], then=Value('Medium')),
+                default=Value('Low')
+            )
+        )
+
+    model_version.high_threshold = thresholds['high']
+    model_version.medium_threshold = thresholds['medium']
+    model_version.scored_at = scored_at or timezone.now()
+    model_version.save(update_fields=['high_threshold', 'medium_threshold', 'scored_at'])
+
+    ROWS_SCORED.inc(total, mode='batch')
+    SCORING_SECONDS.inc(time.perf_counter() - started, mode='batch')
+    return total, thresholds
+
+
+def rescore_changed_customers(churn_model, model_version, chunk_size=None):
+    """Refresh predictions of customers changed since the last scoring run
+
+    Uses the current model and the version's persisted thresholds, so no
+    retraining happens and tiers stay comparable with the batch run. Each
+    customer's old prediction is replaced in the same transaction.
+
+    Returns:
+        Number of customers rescored
+    """
+    chunk_size = chunk_size or settings.CHURN_SCORING_CHUNK_SIZE
+    snapshot = timezone.now()
+    started = time.perf_counter()
+    # Resolve the delta before refreshing features, which would clear it
+    changed_pks = list(changed_customers(model_version.scored_at or model_version.created_at).values_list('pk', flat=True))
+    df = customer_feature_frame(Customer.objects.filter(pk__in=changed_pks))
+    thresholds = model_version.risk_thresholds
+    if thresholds is None and len(df):
+        thresholds = compute_risk_thresholds(churn_model.predict_proba_batch(df))
+
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        probabilities = churn_model.predict_proba_batch(chunk)
+        risk_levels = assign_risk_levels(probabilities, thresholds)
+        customer_pks = chunk['customer_pk'].to_numpy()
+        with transaction.atomic():
+            ChurnPrediction.objects.filter(
+                model_version=model_version.version,
+                customer_id__in=customer_pks.tolist()
+            ).delete()
+            write_predictions(customer_pks, probabilities, risk_levels, model_version)
+
+    model_version.scored_at = snapshot
+    model_version.save(update_fields=['scored_at'])
+    ROWS_SCORED.inc(len(df), mode='incremental')
+    SCORING_SECONDS.inc(time.perf_counter() - started, mode='incremental')
+    return len(df)
+
+
+def risk_distribution(version):
+    """Count predictions per risk level for a version in one grouped query"""
+    counts = ChurnPrediction.objects.filter(model_version=version).values('risk_level').annotate(count=Count('id'))
+    return {row['risk_level']: row['count'] for row in counts}
+
+
+# Cross-validation scheme per model: churn customers have no time order,
+# while sales are validated on days after the ones they were trained on
+DEFAULT_CV_SCHEMES = {
+    'churn_prediction': 'kfold',
+    'sales_forecast': 'time_series',
+}
+
+
+def feature_matrix(model_type, df, time_ordered=False):
+    """Feature matrix and target of a training frame as NumPy arrays
+
+    Built once and shared by every cross-validation fold or search candidate.
+    time_ordered sorts sales rows by date for time-series splits.
+    """
+    if model_type == 'churn_prediction':
+        X, y = ChurnPredictionModel().prepare_features(df.copy())
+    else:
+        X, y = SalesForecastModel().training_data(df)
+        if time_ordered:
+            X = X.sort_values(['year', 'day_of_year'], kind='stable')
+            y = y.loc[X.index]
+    return X.to_numpy(dtype=float), y.to_numpy()
+
+
+def cross_validate_frame(model_type, df, backend, params, n_splits, scheme=None, n_jobs=None):
+    """Cross-validate a backend configuration on a training frame, folds in parallel"""
+    scheme = scheme or DEFAULT_CV_SCHEMES[model_type]
+    if scheme == 'time_series' and model_type == 'churn_prediction':
+        raise ValueError("Churn features have no time order; use kfold cross-validation")
+    X, y = feature_matrix(model_type, df, time_ordered=scheme == 'time_series')
+    task = 'classifier' if model_type == 'churn_prediction' else 'regressor'
+    return cross_validate(X, y, task, backend, params, n_splits=n_splits, scheme=scheme, n_jobs=n_jobs)
+
+
+def record_training(model_type, model_version, performance, training_seconds, validation):
+    """Record a fit stage's metrics, cross-validated when folds were run"""
+    if validation is None:
+        return record_performance(model_type, model_version, performance, training_seconds)
+    return record_performance(model_type, model_version, {
+        **performance,
+        **validation['mean'],
+        'test_size': sum(fold['test_size'] for fold in validation['folds']),
+    }, training_seconds, evaluation='cross_validation', fold_metrics=validation['folds'])
+
+
+# Pipeline stages. Each stage reads its inputs from the database or from the
+# persisted model artifacts, so they can be run and scheduled independently.
+# All stages accept n_jobs (cores for sklearn) and dry_run (compute
+# everything but write nothing), and report per-step timings. The fit stages
+# also take the estimator backend and hyperparameter overrides.
+
+class StageTimer:
+    """Collect wall-clock timings of the steps within a stage"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timings[name] = round(seconds, 3)
+            # Reported in the Server-Timing header when run within a request
+            record_seconds(name, seconds)
+            PIPELINE_STEP_SECONDS.observe(seconds, step=name)
+
+    @property
+    def seconds(self):
+        return round(time.perf_counter() - self.started, 2)
+
+
+def training_options(backend, n_jobs, mode):
+    """Fill in the configured training backend and core count"""
+    if backend is None:
+        backend = INCREMENTAL_BACKEND if mode == 'incremental' else settings.ML_TRAINING_BACKEND
+    n_jobs = settings.ML_TRAINING_JOBS if n_jobs is None else n_jobs
+    return backend, n_jobs
+
+
+# How a fit stage reads its training data:
+#   full        - the whole table in one frame
+#   sample      - a stratified sample of about the row budget, picked in SQL
+#   incremental - chunks streamed to a partial_fit learner, never all at once
+TRAINING_MODES = ('full', 'sample', 'incremental')
+
+
+class NoTrainingData(ValueError):
+    """Raised when the table a model trains on has no rows"""
+
+
+def resolve_training_mode(mode, population, probe, max_rows=None):
+    """Pick the training mode and row budget for a population
+
+    Without an explicit mode, the table is loaded whole when it fits within
+    ML_TRAINING_MEMORY_MB (or max_rows) and sampled otherwise.
+    """
+    if mode is not None and mode not in TRAINING_MODES:
+        raise ValueError(f"Unknown training mode '{mode}'. Use one of: {', '.join(TRAINING_MODES)}")
+    budget = max_rows or training_row_budget(probe)
+    if mode is None:
+        mode = 'sample' if budget is not None and population > budget else 'full'
+    return mode, budget
+
+
+def training_frame(model_type, mode=None, max_rows=None, chunk_size=None):
+    """Load the training data for a model type in the resolved mode
+
+    Returns:
+        Tuple of (frame, mode, population rows); the frame is None in
+        incremental mode, where the data is streamed instead
+    """
+    if model_type == 'churn_prediction':
+        population = customer_population()
+        if not population:
+            raise NoTrainingData('No customers to train the churn model on')
+        mode, budget = resolve_training_mode(mode, population, customer_probe(), max_rows)
+        if mode == 'full':
+            return customer_feature_frame(Customer.objects.all(), chunk_size=chunk_size), mode, population
+        if mode == 'sample':
+            return sample_customer_frame(budget, chunk_size=chunk_size), mode, population
+    else:
+        population = sales_population()
+        if not population:
+            raise NoTrainingData('No orders to train the sales model on')
+        mode, budget = resolve_training_mode(mode, population, sales_probe(), max_rows)
+        if mode == 'full':
+            return daily_sales_frame(chunk_size=chunk_size), mode, population
+        if mode == 'sample':
+            return sample_sales_frame(budget, chunk_size=chunk_size), mode, population
+    return None, mode, population
+
+
+def cached_fit(model_type, fingerprint, timer):
+    """Result of the saved model's fit when it was trained on the same data and options"""
+    result = cached_training(model_type, fingerprint)
+    CACHE_REQUESTS.inc(cache='training', result='miss' if result is None else 'hit')
+    if result is None:
+        return None
+    return {**result, 'data_fingerprint': fingerprint, 'cached': True, 'dry_run': False,
+            'timings': timer.timings, 'seconds': timer.seconds}
+
+
+def fit_churn(n_jobs=None, chunk_size=None, dry_run=False, backend=None, params=None, mode=None, max_rows=None,
+              cv=None, cv_scheme=None, force=False):
+    """Stage: train the churn model on customers and persist it
+
+    mode is one of TRAINING_MODES (chosen from the memory ceiling when None);
+    max_rows overrides the row budget derived from ML_TRAINING_MEMORY_MB.
+    cv folds (ML_CV_FOLDS when None, 0 to skip) of cv_scheme are run in
+    parallel on the same frame and recorded instead of the holdout metrics.
+    When the training data and options fingerprint the same as for the saved
+    model, that model's result is returned without refitting unless force.
+    """
+    timer = StageTimer()
+    with timer.step('fingerprint'):
+        fingerprint = training_fingerprint('churn_prediction', backend=backend, params=params, mode=mode,
+                                           max_rows=max_rows, cv=cv, cv_scheme=cv_scheme)
+    if not (force or dry_run):
+        cached = cached_fit('churn_prediction', fingerprint, timer)
+        if cached is not None:
+            return cached
+
+    with timer.step('load_data'):
+        df, mode, population = training_frame('churn_prediction', mode, max_rows, chunk_size)
+    backend, n_jobs = training_options(backend, n_jobs, mode)
+
+    churn_model = ChurnPredictionModel()
+    churn_model.model_version = new_model_version()
+    with timer.step('train'):
+        if mode == 'incremental':
+            performance = churn_model.train_incremental(
+                customer_frames(chunk_size), customer_categories(), save=False, backend=backend, params=params
+            )
+        else:
+            performance = churn_model.train(df, n_jobs=n_jobs, save=False, backend=backend, params=params)
+    validation = None
+    cv = settings.ML_CV_FOLDS if cv is None else cv
+    if cv and cv > 1 and mode != 'incremental':
+        with timer.step('cross_validate'):
+            validation = cross_validate_frame('churn_prediction', df, churn_model.backend, churn_model.params, cv,
+                                              scheme=cv_scheme, n_jobs=n_jobs)
+    result = {
+        'model_version': churn_model.model_version,
+        'performance': performance,
+        'training_mode': mode,
+        'population_rows': population,
+        'training_rows': performance['training_rows'] if mode == 'incremental' else len(df),
+        'cross_validation': validation,
+        'data_fingerprint': fingerprint,
+        'cached': False,
+        'dry_run': dry_run,
+    }
+    if not dry_run:
+        # Served only once validation and its records have succeeded
+        with timer.step('save'):
+            churn_model.save_model(promote=False)
+        record_training('churn_prediction', churn_model.model_version, performance, timer.timings['train'], validation)
+        save_training_record('churn_prediction', fingerprint, result)
+        promote('churn_prediction', churn_model.model_version)
+
+    result.update({'timings': timer.timings, 'seconds': timer.seconds})
+    return result
+
+
+def score_all(chunk_size=None, n_jobs=None, dry_run=False):
+    """Stage: score every customer with the persisted churn model
+
+    Predictions are written under a new version and swapped in atomically;
+    the previous set is collected in the background. A dry run computes the
+    probabilities, thresholds and tier counts without writing anything.
+    """
+    timer = StageTimer()
+    with timer.step('load_model'):
+        churn_model = ChurnPredictionModel()
+        churn_model.load_model()
+        set_prediction_jobs(churn_model.model, n_jobs)
+
+    scoring_started = timezone.now()
+    with timer.step('load_data'):
+        df = customer_feature_frame(Customer.objects.all(), chunk_size=chunk_size)
+
+    result = {
+        'model_version': churn_model.model_version,
+        # Scored with the reserved unknown category code
+        'unseen_categories': churn_model.unseen_categories(df),
+        'dry_run': dry_run,
+    }
+
+    if dry_run:
+        thresholds, distribution = None, {}
+        with timer.step('score'):
+            if len(df):
+                probabilities = churn_model.predict_proba_batch(df)
+                thresholds = compute_risk_thresholds(probabilities)
+                levels, counts = np.unique(assign_risk_levels(probabilities, thresholds), return_counts=True)
+                distribution = {str(level): int(count) for level, count in zip(levels, counts)}
+        result.update({
+            'predictions_created': 0,
+            'customers_scored': len(df),
+            'thresholds': thresholds,
+            'risk_distribution': distribution,
+        })
+    else:
+        prediction_version = start_version('churn_prediction', artifact_version=churn_model.model_version)
+        try:
+            with timer.step('score_and_write'):
+                predictions_created, thresholds = score_customers(
+                    churn_model, df, prediction_version, chunk_size=chunk_size, scored_at=scoring_started
+                )
+            with timer.step('activate'):
+                if predictions_created:
+                    activate_version(prediction_version)
+                else:
+                    fail_version(prediction_version)
+        except Exception:
+            fail_version(prediction_version)
+            raise
+        finally:
+            collect_old_versions_in_background('churn_prediction')
+
+        result.update({
+            'prediction_version': prediction_version.version,
+            'predictions_created': predictions_created,
+            'customers_scored': predictions_created,
+            'thresholds': thresholds,
+            'risk_distribution': risk_distribution(prediction_version.version),
+        })
+
+    result.update({'timings': timer.timings, 'seconds': timer.seconds})
+    return result
+
+
+def fit_sales(n_jobs=None, chunk_size=None, dry_run=False, backend=None, params=None, mode=None, max_rows=None,
+              cv=None, cv_scheme=None, intervals=None, force=False):
+    """Stage: train the sales forecasting model on daily product sales and persist it
+
+    Orders are summed per product and day in the database, the grain the
+    model trains at. mode, max_rows, cv and cv_scheme are as for fit_churn,
+    except that sales default to time-series cross-validation. intervals
+    picks how forecast intervals are computed (INTERVAL_METHODS). Unchanged
+    data and options reuse the saved model unless force, as for fit_churn.
+    """
+    timer = StageTimer()
+    with timer.step('fingerprint'):
+        fingerprint = training_fingerprint('sales_forecast', backend=backend, params=params, mode=mode,
+                                           max_rows=max_rows, cv=cv, cv_scheme=cv_scheme, intervals=intervals)
+    if not (force or dry_run):
+        cached = cached_fit('sales_forecast', fingerprint, timer)
+        if cached is not None:
+            return cached
+
+    with timer.step('load_data'):
+        df, mode, population = training_frame('sales_forecast', mode, max_rows, chunk_size)
+    backend, n_jobs = training_options(backend, n_jobs, mode)
+
+    sales_model = SalesForecastModel()
+    sales_model.model_version = new_model_version()
+    with timer.step('train'):
+        if mode == 'incremental':
+            performance = sales_model.train_incremental(
+                sales_frames(chunk_size), save=False, backend=backend, params=params
+            )
+        else:
+            performance = sales_model.train(df, n_jobs=n_jobs, save=False, backend=backend, params=params,
+                                            intervals=intervals)
+    validation = None
+    cv = settings.ML_CV_FOLDS if cv is None else cv
+    if cv and cv > 1 and mode != 'incremental':
+        with timer.step('cross_validate'):
+            validation = cross_validate_frame('sales_forecast', df, sales_model.backend, sales_model.params, cv,
+                                              scheme=cv_scheme, n_jobs=n_jobs)
+    result = {
+        'model_version': sales_model.model_version,
+        'performance': performance,
+        'training_mode': mode,
+        'population_rows': population,
+        'training_rows': performance['training_rows'] if mode == 'incremental' else len(df),
+        'cross_validation': validation,
+        'data_fingerprint': fingerprint,
+        'cached': False,
+        'dry_run': dry_run,
+    }
+    if not dry_run:
+        with timer.step('save'):
+            sales_model.save_model(promote=False)
+        record_training('sales_forecast', sales_model.model_version, performance, timer.timings['train'], validation)
+        save_training_record('sales_forecast', fingerprint, result)
+        promote('sales_forecast', sales_model.model_version)
+
+    result.update({'timings': timer.timings, 'seconds': timer.seconds})
+    return result
+
+
+def forecast_all(products=None, periods=None, n_jobs=None, dry_run=False):
+    """Stage: generate forecasts with the persisted sales model
+
+    Args:
+        products: Products to forecast, defaults to every product with orders
+        periods: List of (forecast_period, forecast_horizon) pairs
+        n_jobs: Cores used by the forest at prediction time
+        dry_run: Compute forecasts without replacing the stored ones
+
+    Every product's sales history is read in one query and the forecast is
+    recursive: each future date is predicted for all products in one batch.
+    Existing forecasts are replaced in one transaction, so readers see either
+    the old set or the new one.
+    """
+    timer = StageTimer()
+    periods = periods or DEFAULT_FORECAST_PERIODS
+    if products is None:
+        products = Product.objects.filter(orders__isnull=False).distinct()
+    products = list(products)
+
+    with timer.step('load_model'):
+        sales_model = SalesForecastModel()
+        sales_model.load_model()
+        set_prediction_jobs(sales_model.model, n_jobs)
+
+    with timer.step('load_data'):
+        history = SalesHistory.from_frame(
+            daily_sales_frame(products=products),
+            product_ids=[product.product_id for product in products],
+            unit_prices=[float(product.unit_price) for product in products]
+        )
+
+    forecasts_to_create = []
+    with timer.step('forecast'):
+        for forecast_period, forecast_horizon in periods:
+            dates = forecast_dates(forecast_period, forecast_horizon)
+            forecasts = sales_model.forecast_products(history.copy(), dates)
+            for product, product_forecasts in zip(products, forecasts):
+                for date, (quantity, lower, upper) in zip(dates, product_forecasts):
+                    forecasts_to_create.append(SalesForecast(
+                        product=product,
+                        forecast_date=date.date(),
+                        predicted_quantity=int(quantity),
+                        lower_bound=None if np.isnan(lower) else float(lower),
+                        upper_bound=None if np.isnan(upper) else float(upper),
+                        confidence_level=FORECAST_CONFIDENCE_LEVEL,
+                        forecast_period=forecast_period,
+                        model_version=sales_model.model_version
+                    ))
+
+    if not dry_run:
+        with timer.step('write'):
+            with transaction.atomic():
+                SalesForecast.objects.all().delete()
+                SalesForecast.objects.bulk_create(forecasts_to_create, batch_size=1000)
+        FORECAST_ROWS_WRITTEN.inc(len(forecasts_to_create), source='batch')
+
+    return {
+        'model_version': sales_model.model_version,
+        'forecasts_generated': len(forecasts_to_create),
+        'products_forecasted': len(products),
+        'dry_run': dry_run,
+        'timings': timer.timings,
+        'seconds': timer.seconds
+    }
+
+
+def top_selling_products(limit=20):
+    """Products with the most orders, for dashboard forecasts"""
+    return Product.objects.annotate(
+        order_count=Count('orders')
+    ).filter(order_count__gt=0).order_by('-order_count')[:limit]
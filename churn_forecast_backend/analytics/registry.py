@@ -0,0 +1,266 @@
+"""
+Versioned, immutable model artifacts.
+
+Every saved model gets its own directory, <ML_REGISTRY_DIR>/<name>/<version>/,
+holding its artifact files and a manifest.json (model type, version,
+creation time, training metadata and the size and SHA-256 of every file).
+The directory is built under a temporary name and renamed into place, and
+is never written again. The version that is served is recorded in
+<name>/CURRENT, which promotion replaces atomically; loaders resolve CURRENT
+once and read every file from that one directory, so a training run saving
+concurrently can never hand them a mismatched model and scaler. Rolling
+back points CURRENT at the previously served version. Promotion, rollback
+and pruning read CURRENT before acting on it, so they take <name>/.lock,
+an exclusive lock held across processes, for the whole step.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Directory of each model type's versions under ML_REGISTRY_DIR
+REGISTRY_NAMES = {
+    'churn_prediction': 'churn',
+    'sales_forecast': 'sales',
+}
+
+MANIFEST = 'manifest.json'
+POINTER = 'CURRENT'
+LOCK = '.lock'
+# Previously served versions remembered for rollback
+ROLLBACK_DEPTH = 10
+
+
+def model_root(model_type):
+    if model_type not in REGISTRY_NAMES:
+        raise ValueError(f"Unknown model type '{model_type}'. Use one of: {', '.join(REGISTRY_NAMES)}")
+    return os.path.join(settings.ML_REGISTRY_DIR, REGISTRY_NAMES[model_type])
+
+
+def version_path(model_type, version):
+    return os.path.join(model_root(model_type), version)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def pointer_lock(model_type):
+    """Hold model_type's registry lock, waiting for other processes to release it"""
+    root = model_root(model_type)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK), 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def remove_tree(path):
+    """shutil.rmtree for version directories, whose files are read-only
+
+    Windows refuses to delete read-only files, so a failed removal is
+    retried once after making the path writable.
+    """
+    def make_writable(function, failed_path, _):
+        os.chmod(failed_path, stat.S_IWRITE)
+        function(failed_path)
+
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=make_writable)
+    else:
+        shutil.rmtree(path, onerror=make_writable)
+
+
+def write_json(path, data, default=str):
+    """Write a JSON file by renaming a complete temporary copy over it"""
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, default=default)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def publish(model_type, version, metadata, promote_version=True):
+    """Register a new version, yielding the directory to save its artifacts into
+
+    The files written inside the block are recorded in the manifest, made
+    read-only and moved into place together; nothing is registered if the
+    block raises. The version is then served unless promote_version is False.
+    """
+    root = model_root(model_type)
+    os.makedirs(root, exist_ok=True)
+    final_path = os.path.join(root, version)
+    if os.path.exists(final_path):
+        raise FileExistsError(f"{model_type} version {version} is already registered")
+
+    staging = tempfile.mkdtemp(prefix=f'.{version}-', dir=root)
+    try:
+        yield staging
+        files = {
+            name: {'bytes': os.path.getsize(os.path.join(staging, name)), 'sha256': file_digest(os.path.join(staging, name))}
+            for name in sorted(os.listdir(staging))
+        }
+        write_json(os.path.join(staging, MANIFEST), {
+            'model_type': model_type,
+            'version': version,
+            'created_at': timezone.now().isoformat(),
+            'metadata': metadata,
+            'files': files,
+        })
+        for name in os.listdir(staging):
+            os.chmod(os.path.join(staging, name), 0o444)
+        # Fails rather than merging if another run registered the same version
+        os.rename(staging, final_path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if promote_version:
+        promote(model_type, version)
+    prune(model_type)
+
+
+def load_manifest(model_type, version):
+    path = os.path.join(version_path(model_type, version), MANIFEST)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{model_type} version {version} is not registered")
+    with open(path) as f:
+        return json.load(f)
+
+
+def verify(model_type, version):
+    """Check a version's files against its manifest, raising ValueError on a mismatch"""
+    manifest = load_manifest(model_type, version)
+    directory = version_path(model_type, version)
+    for name, expected in manifest['files'].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or file_digest(path) != expected['sha256']:
+            raise ValueError(f"{model_type} version {version}: {name} does not match its manifest")
+    return manifest
+
+
+def pointer(model_type):
+    """Contents of CURRENT: the served version and the ones served before it"""
+    try:
+        with open(os.path.join(model_root(model_type), POINTER)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def current_version(model_type):
+    current = pointer(model_type)
+    return current['version'] if current else None
+
+
+def set_pointer(model_type, version, history):
+    write_json(os.path.join(model_root(model_type), POINTER), {
+        'version': version,
+        'promoted_at': timezone.now().isoformat(),
+        'history': history[:ROLLBACK_DEPTH],
+    })
+
+
+def promote(model_type, version):
+    """Serve a registered version, remembering the current one for rollback"""
+    with pointer_lock(model_type):
+        verify(model_type, version)
+        current = pointer(model_type)
+        history = [current['version'], *current['history']] if current else []
+        set_pointer(model_type, version, [served for served in history if served != version])
+    return version
+
+
+def rollback(model_type):
+    """Serve the version that was served before the current one again"""
+    with pointer_lock(model_type):
+        current = pointer(model_type)
+        if not current or not current['history']:
+            raise ValueError(f"No earlier {model_type} version to roll back to")
+        version, *history = current['history']
+        verify(model_type, version)
+        set_pointer(model_type, version, history)
+    return version
+
+
+def resolve(model_type, version=None):
+    """Directory and manifest of a version, the served one by default"""
+    version = version or current_version(model_type)
+    if version is None:
+        raise FileNotFoundError(f"No {model_type} model has been saved yet; train it first")
+    return version_path(model_type, version), load_manifest(model_type, version)
+
+
+def list_versions(model_type):
+    """Manifests of every registered version, newest first"""
+    root = model_root(model_type)
+    if not os.path.isdir(root):
+        return []
+    manifests = [
+        load_manifest(model_type, name) for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, MANIFEST))
+    ]
+    return sorted(manifests, key=lambda manifest: manifest['created_at'], reverse=True)
+
+
+def prune(model_type, keep=None):
+    """Delete versions beyond the newest keep that are neither served nor in the rollback history
+
+    Versions that cannot be deleted are logged and left for the next prune.
+
+    Args:
+        model_type: Model type whose versions to prune
+        keep: Number of most recent versions kept regardless, defaults to
+              settings.ML_REGISTRY_KEEP
+    """
+    if keep is None:
+        keep = settings.ML_REGISTRY_KEEP
+    removed = []
+    with pointer_lock(model_type):
+        current = pointer(model_type)
+        protected = {current['version'], *current['history']} if current else set()
+        for manifest in list_versions(model_type)[keep:]:
+            if manifest['version'] in protected:
+                continue
+            try:
+                remove_tree(version_path(model_type, manifest['version']))
+            except OSError:
+                logger.exception('Could not delete %s version %s', model_type, manifest['version'])
+            else:
+                removed.append(manifest['version'])
+    return removed
@@ -0,0 +1,68 @@
+import io
+
+import pandas as pd
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def payload_to_frame(data):
+    """Flatten an API payload into a DataFrame for the columnar renderers"""
+    if isinstance(data, dict):
+        # Paginated responses carry their rows under 'data'
+        if isinstance(data.get('data'), list):
+            return pd.DataFrame(data['data'])
+        return pd.json_normalize(data)
+    return pd.DataFrame(list(data))
+
+
+class ArrowRenderer(renderers.BaseRenderer):
+    """Render list payloads as an Apache Arrow IPC stream (requires pyarrow)"""
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import pyarrow as pa
+
+        if data is None:
+            return b''
+
+        table = pa.Table.from_pandas(payload_to_frame(data), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+class ParquetRenderer(renderers.BaseRenderer):
+    """Render list payloads as a Parquet file (requires pyarrow)"""
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        buffer = io.BytesIO()
+        payload_to_frame(data).to_parquet(buffer, index=False, compression='snappy')
+        return buffer.getvalue()
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Render payloads as MessagePack (requires msgpack)"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+
+        # Reuse DRF's encoder for dates, decimals and numpy scalars
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
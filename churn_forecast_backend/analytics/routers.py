@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Alias that reads should go to for the current request, if any
+_read_alias = ContextVar('analytics_read_alias', default=None)
+
+
+@contextmanager
+def use_replica():
+    """Route ORM reads inside the block to the replica when one is configured"""
+    token = _read_alias.set(REPLICA_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica(view_func):
+    """Decorator for read-only view actions that can tolerate replica lag"""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view_func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Send reads from views marked with read_from_replica to the 'replica'
+    alias and everything else, including all writes, to 'default'. Without a
+    replica configured every query stays on 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and alias in settings.DATABASES:
+            return alias
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Allowed everywhere so a local replica can be built with
+        # `migrate --database replica`
+        return None
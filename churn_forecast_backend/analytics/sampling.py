@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import (
+    Avg, BigIntegerField, Case, Count, Exists, ExpressionWrapper, F, IntegerField, OuterRef, Q, Sum, Value, When,
+    Window
+)
+from django.db.models.functions import Cast, RowNumber
+
+from .features import STORED_FEATURES, refresh_customer_features
+from .models import CustomerFeatures, Order, Product
+
+# Training holds a few copies of the frame at once (feature preparation,
+# the split, the scaled arrays), so budget rows at a multiple of their size
+TRAINING_MEMORY_OVERHEAD = 4
+PROBE_ROWS = 1000
+
+CUSTOMER_COLUMNS = ['customer_pk', 'customer_id', *STORED_FEATURES]
+SALES_COLUMNS = ['product_id', 'order_date', 'quantity', 'unit_price']
+
+# Same rule as ChurnPredictionModel.prepare_features, evaluated in SQL so
+# the sample keeps the population's churn rate
+CHURN_LABEL = Case(
+    When(Q(cancellations_count__gt=2) | Q(purchase_frequency__lt=5) | Q(ratings__lt=3.0), then=Value(1)),
+    default=Value(0),
+    output_field=IntegerField()
+)
+
+
+# Seeded pseudo-random order evaluated in SQL (Knuth's multiplicative
+# hashing): multiplying keys by a large odd constant modulo 2**32 scatters
+# consecutive keys over the range, and the seed shifts which rows sort first
+SAMPLE_KEY_MULTIPLIER = 2654435761
+SAMPLE_KEY_MODULUS = 2 ** 32
+
+
+def sample_key(field, seed):
+    """Expression ordering rows by a pseudo-random key of an integer field, reproducible for a seed"""
+    key = (Cast(field, BigIntegerField()) + Value(seed)) * Value(SAMPLE_KEY_MULTIPLIER) % Value(SAMPLE_KEY_MODULUS)
+    return ExpressionWrapper(key, output_field=BigIntegerField())
+
+
+def sample_keys(keys, seed):
+    """sample_key's values for an array of integer keys, to sample frames in memory the same way"""
+    return (np.asarray(keys, dtype=np.int64) + seed) * SAMPLE_KEY_MULTIPLIER % SAMPLE_KEY_MODULUS
+
+
+def proportional_quotas(counts, sample_size):
+    """Split sample_size across strata in proportion to their size, at least one each"""
+    total = sum(counts.values())
+    if total <= sample_size:
+        return dict(counts)
+    return {
+        stratum: min(count, max(1, int(sample_size * count / total)))
+        for stratum, count in counts.items() if count
+    }
+
+
+def training_row_budget(probe, memory_mb=None):
+    """Rows that fit in ML_TRAINING_MEMORY_MB, estimated from a probe frame"""
+    memory_mb = memory_mb or settings.ML_TRAINING_MEMORY_MB
+    if probe.empty:
+        return None
+    row_bytes = probe.memory_usage(deep=True).sum() / len(probe) * TRAINING_MEMORY_OVERHEAD
+    return max(int(memory_mb * 1024 * 1024 // row_bytes), 1)
+
+
+def frames_from_rows(rows, columns, chunk_size, group_of=None):
+    """Group a row iterator into DataFrames of about chunk_size rows
+    
+    With group_of, consecutive rows of the same group are never split across
+    frames, so a frame can run over chunk_size by one group's rows.
+    """
+    batch = []
+    for row in rows:
+        if len(batch) >= chunk_size and (group_of is None or group_of(row) != group_of(batch[-1])):
+            yield pd.DataFrame.from_records(batch, columns=columns)
+            batch = []
+        batch.append(row)
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=columns)
+
+
+# Customers (churn training). Rows come from the feature store, which is
+# brought up to date once before reading.
+
+def customer_rows():
+    return CustomerFeatures.objects.values_list(
+        'customer_id', 'customer__customer_id', *STORED_FEATURES
+    ).order_by('customer_id')
+
+
+def customer_population():
+    refresh_customer_features()
+    return CustomerFeatures.objects.count()
+
+
+def customer_probe():
+    return pd.DataFrame.from_records(list(customer_rows()[:PROBE_ROWS]), columns=CUSTOMER_COLUMNS)
+
+
+def sample_customer_frame(sample_size, chunk_size=None, seed=42):
+    """Stratified (by churn label) sample of the customer feature frame
+
+    Rows are ranked within their stratum by sample_key and cut at the
+    stratum's quota in the query, so only the sampled rows are read.
+    """
+    counts = dict(
+        CustomerFeatures.objects.annotate(stratum=CHURN_LABEL).values_list('stratum').annotate(rows=Count('pk'))
+    )
+    quotas = proportional_quotas(counts, sample_size)
+    if not quotas:
+        return pd.DataFrame(columns=CUSTOMER_COLUMNS)
+
+    within_quota = Q()
+    for stratum, quota in quotas.items():
+        within_quota |= Q(stratum=stratum, stratum_rank__lte=quota)
+    rows = CustomerFeatures.objects.annotate(
+        stratum=CHURN_LABEL,
+        stratum_rank=Window(RowNumber(), partition_by=[CHURN_LABEL], order_by=sample_key('customer_id', seed).asc())
+    ).filter(within_quota).values_list(
+        'customer_id', 'customer__customer_id', *STORED_FEATURES
+    ).order_by('customer_id')
+    return pd.DataFrame.from_records(rows.iterator(chunk_size=chunk_size or 10000), columns=CUSTOMER_COLUMNS)
+
+
+def customer_frames(chunk_size=None):
+    """Callable yielding the customer feature frame in chunks, for incremental training"""
+    chunk_size = chunk_size or 10000
+    return lambda: frames_from_rows(customer_rows().iterator(chunk_size=chunk_size), CUSTOMER_COLUMNS, chunk_size)
+
+
+def customer_categories():
+    """Every value of the categorical churn features, to fit encoders up front"""
+    return {
+        col: list(CustomerFeatures.objects.values_list(col, flat=True).distinct().order_by(col))
+        for col in ('gender', 'country', 'subscription_status')
+    }
+
+
+# Daily product sales (sales training). Orders are summed per product and
+# day in SQL, which is exactly what SalesForecastModel.prepare_sales_data
+# does in pandas, so chunks and samples are already at training grain.
+# Rows come ordered by product and date, and a product's days are always
+# kept together so its lag and rolling features can be computed.
+
+def daily_sales(products=None):
+    orders = Order.objects.all() if products is None else Order.objects.filter(product__in=products)
+    return orders.values('order_date', product_code=F('product__product_id')).annotate(
+        total_quantity=Sum('quantity'),
+        avg_unit_price=Avg('product__unit_price')
+    ).order_by('product_code', 'order_date')
+
+
+def sales_rows(chunk_size=None, products=None):
+    for row in daily_sales(products).iterator(chunk_size=chunk_size or 10000):
+        yield row['product_code'], row['order_date'], row['total_quantity'], row['avg_unit_price']
+
+
+def sales_population():
+    return Order.objects.values('product_id', 'order_date').order_by().distinct().count()
+
+
+def sales_probe():
+    return pd.DataFrame.from_records(
+        [(row['product_code'], row['order_date'], row['total_quantity'], row['avg_unit_price'])
+         for row in daily_sales()[:PROBE_ROWS]],
+        columns=SALES_COLUMNS
+    )
+
+
+def daily_sales_frame(chunk_size=None, products=None):
+    """Daily sales of every product (or the given ones) as one frame"""
+    return pd.DataFrame.from_records(sales_rows(chunk_size, products), columns=SALES_COLUMNS)
+
+
+def sample_sales_frame(sample_size, chunk_size=None, seed=42):
+    """Daily sales of a sample of products, about sample_size rows
+    
+    Whole product histories are sampled rather than single days, so lag
+    and rolling features stay exact and every month stays represented.
+    The products are picked by sample_key in a subquery of the sales query.
+    """
+    products = Product.objects.filter(Exists(Order.objects.filter(product=OuterRef('pk'))))
+    quota = max(1, sample_size * products.count() // max(sales_population(), 1))
+    sampled = products.order_by(sample_key('pk', seed)).values('pk')[:quota]
+    return daily_sales_frame(chunk_size, products=sampled)
+
+
+def sales_frames(chunk_size=None):
+    """Callable yielding daily product sales in chunks, for incremental training"""
+    chunk_size = chunk_size or 10000
+    return lambda: frames_from_rows(sales_rows(chunk_size), SALES_COLUMNS, chunk_size, group_of=lambda row: row[0])
@@ -1,8 +1,13 @@
 from rest_framework import serializers
+from .instrumentation import TimedSerializerMixin
+from .ml_models import ESTIMATOR_BACKENDS, FORECAST_PERIODS, MAX_FORECAST_HORIZON
 from .models import Customer, Product, Order, ChurnPrediction, SalesForecast, ModelPerformance
+from .pipeline import TRAINING_MODES
+from .tuning import SEARCH_SPACES, SEARCH_STRATEGIES, TUNED_MODELS
+from .validation import CV_SCHEMES
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
@@ -39,7 +44,7 @@ class CustomerSerializer(serializers.ModelSerializer):
         return data
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
@@ -72,7 +77,7 @@ class ProductSerializer(serializers.ModelSerializer):
         return data
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.customer_id', read_only=True)
     product_name = serializers.CharField(source='product.product_name', read_only=True)
     total_amount = serializers.ReadOnlyField()
@@ -134,7 +139,7 @@ class OrderSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ChurnPredictionSerializer(serializers.ModelSerializer):
+class ChurnPredictionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer_id = serializers.CharField(source='customer.customer_id', read_only=True)
     customer_age = serializers.IntegerField(source='customer.age', read_only=True)
     customer_gender = serializers.CharField(source='customer.gender', read_only=True)
@@ -143,9 +148,11 @@ class ChurnPredictionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChurnPrediction
         fields = '__all__'
+        # Set to the active version on create; see ChurnPredictionViewSet
+        read_only_fields = ['model_version']
 
 
-class SalesForecastSerializer(serializers.ModelSerializer):
+class SalesForecastSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.product_name', read_only=True)
     product_category = serializers.CharField(source='product.category', read_only=True)
     unit_price = serializers.FloatField(source='product.unit_price', read_only=True)
@@ -155,13 +162,13 @@ class SalesForecastSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ModelPerformanceSerializer(serializers.ModelSerializer):
+class ModelPerformanceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ModelPerformance
         fields = '__all__'
 
 
-class CustomerChurnDataSerializer(serializers.Serializer):
+class CustomerChurnDataSerializer(TimedSerializerMixin, serializers.Serializer):
     customer_id = serializers.CharField()
     age = serializers.IntegerField()
     gender = serializers.CharField()
@@ -175,7 +182,7 @@ class CustomerChurnDataSerializer(serializers.Serializer):
     avg_order_value = serializers.FloatField()
 
 
-class SalesForecastDataSerializer(serializers.Serializer):
+class SalesForecastDataSerializer(TimedSerializerMixin, serializers.Serializer):
     product_id = serializers.CharField()
     product_name = serializers.CharField()
     category = serializers.CharField()
@@ -183,3 +190,34 @@ class SalesForecastDataSerializer(serializers.Serializer):
     forecast_period = serializers.CharField()
     forecast_horizon = serializers.IntegerField()
 
+
+class ForecastRequestSerializer(serializers.Serializer):
+    """Options of a forecast request; at least one period must be forecast"""
+    forecast_period = serializers.ChoiceField(choices=list(FORECAST_PERIODS), default='monthly')
+    forecast_horizon = serializers.IntegerField(default=12, min_value=1, max_value=MAX_FORECAST_HORIZON)
+    top_products = serializers.IntegerField(default=None, allow_null=True, min_value=1)
+
+
+class TrainingRequestSerializer(serializers.Serializer):
+    """Options of a training request; omitted ones fall back to the pipeline defaults"""
+    backend = serializers.ChoiceField(choices=list(ESTIMATOR_BACKENDS), default=None, allow_null=True)
+    params = serializers.DictField(default=None, allow_null=True)
+    n_jobs = serializers.IntegerField(default=None, allow_null=True)
+    mode = serializers.ChoiceField(choices=list(TRAINING_MODES), default=None, allow_null=True)
+    max_rows = serializers.IntegerField(default=None, allow_null=True, min_value=1)
+    cv = serializers.IntegerField(default=None, allow_null=True, min_value=0)
+    cv_scheme = serializers.ChoiceField(choices=list(CV_SCHEMES), default=None, allow_null=True)
+    force = serializers.BooleanField(default=False)
+
+
+class TuneRequestSerializer(serializers.Serializer):
+    """Options of a hyperparameter search request"""
+    model_type = serializers.ChoiceField(choices=list(TUNED_MODELS), default='churn_prediction')
+    backends = serializers.ListField(child=serializers.ChoiceField(choices=list(SEARCH_SPACES)), default=None,
+                                     allow_null=True, allow_empty=False)
+    search = serializers.ChoiceField(choices=list(SEARCH_STRATEGIES), default='random')
+    n_candidates = serializers.IntegerField(default=10, min_value=1)
+    cv = serializers.IntegerField(default=3, min_value=2)
+    n_jobs = serializers.IntegerField(default=None, allow_null=True)
+    refit = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
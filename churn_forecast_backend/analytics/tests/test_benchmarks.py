@@ -0,0 +1,23 @@
+from contextlib import redirect_stdout
+from io import StringIO
+
+from django.test import TestCase
+
+from benchmarks import inference_latency
+
+from ..pipeline import fit_churn, fit_sales
+from .utils import ScratchFilesMixin, create_customers
+
+
+class InferenceLatencyTests(ScratchFilesMixin, TestCase):
+    def test_smoke_run(self):
+        create_customers(40)
+        for fit in (fit_churn, fit_sales):
+            fit(cv=0, params={'n_estimators': 5})
+        with redirect_stdout(StringIO()):
+            results = inference_latency.run([1, 10], repeats=3)['results']
+        self.assertEqual({(row['model'], row['path']) for row in results}, {
+            ('churn_prediction', 'predict()'), ('churn_prediction', 'one-row frame'),
+            ('churn_prediction', 'model only'), ('sales_forecast', 'model only'),
+        })
+        self.assertEqual(sorted({row['rows'] for row in results if row['model'] == 'sales_forecast'}), [1, 10])
@@ -0,0 +1,113 @@
+import json
+import re
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import registry
+from ..models import ChurnPrediction, CustomerFeatures, ModelPerformance, ModelVersion, SalesForecast
+from .utils import ScratchFilesMixin, create_customers
+
+TIMING_LINE = re.compile(r'^  \w+\s+\d+\.\d{3}s$')
+STAGE_RESULT = {'dry_run': False, 'timings': {'load_data': 0.25, 'fit': 1.5}, 'seconds': 1.75}
+
+
+def run(name, *args, **options):
+    """call_command returning the command's output"""
+    out = StringIO()
+    call_command(name, *args, stdout=out, **options)
+    return out.getvalue()
+
+
+class PipelineCommandTests(ScratchFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_customers(40)
+
+    def test_report_lists_the_timings_and_result(self):
+        with mock.patch('analytics.management.commands.score_churn.score_all', return_value=STAGE_RESULT):
+            output = run('score_churn')
+        lines = output.splitlines()
+        self.assertTrue(lines[0].startswith('score_churn finished in 1.75s'))
+        self.assertEqual(lines[1:3], ['  load_data            0.250s', '  fit                  1.500s'])
+        self.assertEqual(json.loads('\n'.join(lines[3:])), {'dry_run': False})
+
+    def test_chunk_size_and_workers_are_passed_through(self):
+        for name, function, args in (
+            ('train_churn', 'fit_churn', ()),
+            ('train_sales', 'fit_sales', ()),
+            ('score_churn', 'score_all', ()),
+            ('tune_model', 'tune_model', ('churn_prediction',)),
+        ):
+            with self.subTest(command=name):
+                with mock.patch(f'analytics.management.commands.{name}.{function}',
+                                return_value=STAGE_RESULT) as stage:
+                    run(name, *args, '--chunk-size', '7', '--workers', '2')
+                self.assertEqual(stage.call_args.kwargs['chunk_size'], 7)
+                self.assertEqual(stage.call_args.kwargs['n_jobs'], 2)
+
+        with mock.patch('analytics.management.commands.generate_forecasts.forecast_all',
+                        return_value=STAGE_RESULT) as forecast_all:
+            run('generate_forecasts', '--workers', '3', '--period', 'daily', '--horizon', '5')
+        self.assertEqual(forecast_all.call_args.kwargs['n_jobs'], 3)
+        self.assertEqual(forecast_all.call_args.kwargs['periods'], [('daily', 5)])
+
+    def test_training_commands_cross_validate_by_default(self):
+        with mock.patch('analytics.management.commands.train_churn.fit_churn', return_value=STAGE_RESULT) as fit:
+            run('train_churn')
+        self.assertEqual(fit.call_args.kwargs['cv'], 5)
+
+    def test_dry_runs_write_nothing(self):
+        output = run('train_churn', '--dry-run', '--cv', '0')
+        self.assertTrue(output.startswith('[dry run] train_churn finished in'))
+        self.assertTrue(any(TIMING_LINE.match(line) for line in output.splitlines()))
+        self.assertIsNone(registry.current_version('churn_prediction'))
+        self.assertFalse(ModelPerformance.objects.exists())
+
+        run('train_churn', '--cv', '0')
+        run('score_churn', '--dry-run')
+        self.assertFalse(ChurnPrediction.objects.exists())
+        self.assertFalse(ModelVersion.objects.exists())
+
+        run('train_sales', '--cv', '0')
+        run('generate_forecasts', '--dry-run', '--horizon', '2')
+        self.assertFalse(SalesForecast.objects.exists())
+
+        # The two training runs above are the only records
+        run('tune_model', 'churn_prediction', '--dry-run', '--backends', 'sgd', '--candidates', '1', '--cv', '2',
+            '--workers', '1')
+        self.assertEqual(ModelPerformance.objects.count(), 2)
+
+    def test_refresh_features(self):
+        self.assertIn('Refreshed features for 40 customers', run('refresh_features', '--chunk-size', '15'))
+        self.assertEqual(CustomerFeatures.objects.count(), 40)
+        self.assertIn('Refreshed features for 0 customers', run('refresh_features'))
+
+
+class ModelVersionsCommandTests(ScratchFilesMixin, TestCase):
+    def publish(self, version):
+        with registry.publish('churn_prediction', version, {'backend': 'sgd'}):
+            pass
+        return version
+
+    def test_lists_versions_and_marks_the_served_one(self):
+        self.publish('v1')
+        self.publish('v2')
+        lines = run('model_versions', 'churn_prediction').splitlines()
+        self.assertEqual([line[:4] for line in lines], ['* v2', '  v1'])
+        self.assertIn('{"backend": "sgd"}', lines[0])
+
+    def test_promote_and_rollback(self):
+        self.publish('v1')
+        self.publish('v2')
+        self.assertIn('Serving churn_prediction v1', run('model_versions', 'churn_prediction', '--rollback'))
+        self.assertIn('Serving churn_prediction v2', run('model_versions', 'churn_prediction', '--promote', 'v2'))
+        self.assertEqual(registry.current_version('churn_prediction'), 'v2')
+
+    def test_errors_become_command_errors(self):
+        with self.assertRaises(CommandError):
+            run('model_versions', 'churn_prediction', '--rollback')
+        with self.assertRaises(CommandError):
+            run('model_versions', 'churn_prediction', '--promote', 'v9')
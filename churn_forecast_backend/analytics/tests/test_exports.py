@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import pipeline
+from ..exports import batched, csv_lines, ndjson_lines
+from ..versioning import activate_version, start_version
+from .utils import create_customers
+
+
+def streamed_text(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ExportEncodingTests(SimpleTestCase):
+    def test_ndjson_lines_are_one_object_per_row(self):
+        lines = list(ndjson_lines(['id', 'price'], [(1, 2.5), (2, None)]))
+        self.assertEqual(lines, ['{"id":1,"price":2.5}\n', '{"id":2,"price":null}\n'])
+
+    def test_csv_lines_start_with_the_header(self):
+        text = ''.join(csv_lines(['id', 'name'], [(1, 'Jacket, blue')]))
+        self.assertEqual(list(csv.reader(io.StringIO(text))), [['id', 'name'], ['1', 'Jacket, blue']])
+
+    def test_batches_join_lines(self):
+        self.assertEqual(list(batched(iter('abcde'), 2)), ['ab', 'cd', 'e'])
+        self.assertEqual(list(batched(iter(''), 2)), [])
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        create_customers(5)
+
+    def test_ndjson_export_streams_every_order(self):
+        response = self.client.get('/api/orders/export/', {'chunk_size': 2})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="orders.ndjson"')
+        rows = [json.loads(line) for line in streamed_text(response).splitlines()]
+        self.assertEqual([row['order_id'] for row in rows], [f'O{index}' for index in range(5)])
+        self.assertEqual(rows[0]['customer_id'], 'C0')
+        self.assertEqual(rows[0]['unit_price'], 40.0)
+
+    def test_csv_export(self):
+        response = self.client.get('/api/orders/export/', {'export_format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(streamed_text(response))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['product_name'], 'Jacket')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/orders/export/', {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ndjson', response.json()['error'])
+
+    def test_invalid_chunk_size_is_rejected(self):
+        response = self.client.get('/api/orders/export/', {'chunk_size': 'many'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ChurnPredictionExportTests(TestCase):
+    def setUp(self):
+        self.customers = create_customers(3)
+        self.active = start_version('churn_prediction')
+        pipeline.write_predictions([customer.pk for customer in self.customers], [0.9, 0.2, 0.1],
+                                   ['High', 'Low', 'Low'], self.active)
+        activate_version(self.active)
+
+    def export(self, **params):
+        response = self.client.get('/api/churn-predictions/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in streamed_text(response).splitlines()]
+
+    def test_only_the_active_version_is_exported(self):
+        building = start_version('churn_prediction')
+        pipeline.write_predictions([self.customers[0].pk], [0.5], ['Medium'], building)
+        rows = self.export()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['model_version'] for row in rows}, {self.active.version})
+
+    def test_risk_level_filter(self):
+        rows = self.export(risk_level='High')
+        self.assertEqual([(row['customer_id'], row['risk_level']) for row in rows], [('C0', 'High')])
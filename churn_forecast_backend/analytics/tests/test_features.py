@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.test import TestCase
+
+from ..features import customer_features, refresh_customer_features, stale_customers
+from ..models import CustomerFeatures, Order, Product
+from .utils import create_customers
+
+
+class FeatureStoreTests(TestCase):
+    def setUp(self):
+        self.customer = create_customers(1)[0]
+        refresh_customer_features()
+
+    def test_fresh_features_are_not_recomputed(self):
+        self.assertFalse(stale_customers().exists())
+        self.assertEqual(refresh_customer_features(), 0)
+
+    def test_saved_order_refreshes_features(self):
+        order = Order.objects.create(order_id='O-new', customer=self.customer, product=Product.objects.get(),
+                                     quantity=3, order_date=date(2024, 6, 1))
+        self.assertTrue(stale_customers().exists())
+        self.assertEqual(customer_features(self.customer)['total_orders'], 2)
+
+        order.quantity = 100
+        order.save()
+        self.assertEqual(refresh_customer_features(), 1)
+        self.assertEqual(CustomerFeatures.objects.get(customer=self.customer).total_orders, 2)
+
+    def test_deleted_order_refreshes_features(self):
+        Order.objects.filter(customer=self.customer).get().delete()
+        self.assertFalse(CustomerFeatures.objects.filter(customer=self.customer).exists())
+        features = customer_features(self.customer)
+        self.assertEqual(features['total_orders'], 0)
+        self.assertEqual(features['avg_order_value'], 0)
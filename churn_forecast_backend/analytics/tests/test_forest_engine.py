@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from ..forest_engine import CompiledForest, compile_forest
+
+
+class CompiledForestTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(400, 6)) * [1, 10, 100, 0.1, 5, 50]
+        self.X[rng.random(self.X.shape) < 0.05] = np.nan
+        self.y = (np.nan_to_num(self.X[:, 0]) + rng.normal(size=400) > 0).astype(int)
+        self.scaler = StandardScaler().fit(self.X)
+
+    def test_classifier_matches_sklearn_predict_proba(self):
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(self.scaler.transform(self.X), self.y)
+        engine = CompiledForest.from_estimator(model, self.scaler)
+        np.testing.assert_array_equal(engine.predict(self.X), model.predict_proba(self.scaler.transform(self.X)))
+
+    def test_regressor_matches_sklearn_predict(self):
+        target = np.nan_to_num(self.X[:, 1]) * 0.5
+        model = RandomForestRegressor(n_estimators=20, random_state=0).fit(self.scaler.transform(self.X), target)
+        engine = CompiledForest.from_estimator(model, self.scaler)
+        np.testing.assert_array_equal(engine.predict(self.X)[:, 0], model.predict(self.scaler.transform(self.X)))
+
+    def test_saved_engine_predicts_the_same(self):
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.scaler.transform(self.X), self.y)
+        engine = compile_forest(model, self.scaler, check_rows=self.X)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'engine.npz')
+            engine.save(path)
+            np.testing.assert_array_equal(CompiledForest.load(path).predict(self.X), engine.predict(self.X))
+
+    def test_only_forests_are_compiled(self):
+        model = HistGradientBoostingClassifier(max_iter=5).fit(self.X, self.y)
+        self.assertIsNone(compile_forest(model, check_rows=self.X))
@@ -0,0 +1,31 @@
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import metrics
+from .utils import ScratchFilesMixin
+
+
+class MetricsTests(ScratchFilesMixin, SimpleTestCase):
+    def test_exposition_sums_every_process(self):
+        metrics.ROWS_SCORED.inc(5, mode='batch')
+        metrics.MODEL_LOAD_SECONDS.observe(0.02, model_type='churn_prediction')
+        # A second worker writes its own file in the same directory
+        with mock.patch.object(metrics.os, 'getpid', return_value=os.getpid() + 1):
+            worker = metrics.MmapStore()
+            worker.add([(metrics.sample_key('ml_rows_scored_total', {'mode': 'batch'}), 7)])
+
+        lines = metrics.exposition().splitlines()
+        self.assertIn('ml_rows_scored_total{mode="batch"} 12.0', lines)
+        self.assertIn('ml_model_load_seconds_bucket{model_type="churn_prediction",le="0.01"} 0.0', lines)
+        self.assertIn('ml_model_load_seconds_bucket{model_type="churn_prediction",le="0.025"} 1.0', lines)
+        self.assertIn('ml_model_load_seconds_bucket{model_type="churn_prediction",le="+Inf"} 1.0', lines)
+        self.assertIn('ml_model_load_seconds_count{model_type="churn_prediction"} 1.0', lines)
+
+    def test_metrics_endpoint(self):
+        metrics.FORECAST_ROWS_WRITTEN.inc(3, source='batch')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('ml_forecast_rows_written_total{source="batch"} 3.0', response.content.decode().splitlines())
@@ -0,0 +1,44 @@
+import json
+
+from django.test import TestCase, override_settings
+
+from .utils import create_customers
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        create_customers(3)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('analytics.performance', 'INFO') as logs:
+            response = self.client.get('/api/customers/')
+        self.assertEqual(response.status_code, 200)
+        timings = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(list(timings), ['db', 'serialize', 'total'])
+        self.assertRegex(timings['db'], r'^dur=\d+\.\d{2};desc="\d+ queries"$')
+
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['method'], line['path'], line['status']), ('GET', '/api/customers/', 200))
+        self.assertGreater(line['db_queries'], 0)
+        self.assertIn('serialize_ms', line)
+
+    def test_streamed_responses_are_recorded_when_they_end(self):
+        with self.assertLogs('analytics.performance', 'INFO') as logs:
+            response = self.client.get('/api/orders/export/', {'export_format': 'csv', 'chunk_size': 1})
+            self.assertRegex(response['Server-Timing'], r'^first_byte;dur=\d+\.\d{2}$')
+            self.assertEqual(logs.records, [])
+            b''.join(response.streaming_content)
+        line = json.loads(logs.records[0].getMessage())
+        # The export's queries run while the body streams
+        self.assertGreater(line['db_queries'], 0)
+
+    @override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_their_sql(self):
+        with self.assertLogs('analytics.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/customers/')
+        self.assertIn('SELECT', json.loads(logs.records[0].getMessage())['sql'])
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION=False)
+    def test_instrumentation_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/customers/'))
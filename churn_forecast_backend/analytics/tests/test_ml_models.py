@@ -0,0 +1,180 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+from sklearn.preprocessing import LabelEncoder
+
+from ..features import customer_feature_frame
+from ..ml_models import (
+    CATEGORICAL_FEATURES, ESTIMATOR_BACKENDS, FORECAST_PERIODS, ChurnPredictionModel, SalesForecastModel,
+    build_estimator, encode_categories, forecast_dates, incremental_estimator
+)
+from ..models import Customer
+from .utils import ScratchFilesMixin, create_customers, sales_orders
+
+
+class UnseenCategoryTests(SimpleTestCase):
+    def setUp(self):
+        self.model = ChurnPredictionModel()
+        self.model.label_encoders = {
+            'gender': LabelEncoder().fit(['Female', 'Male']),
+            'country': LabelEncoder().fit(['India', 'UK', 'USA']),
+            'subscription_status': LabelEncoder().fit(['active', 'paused']),
+        }
+        self.customer = {
+            'age': 30, 'cancellations_count': 1, 'purchase_frequency': 10, 'ratings': 4.5,
+            'last_purchase_date': date(2024, 1, 1), 'gender': 'Male', 'country': 'Germany',
+            'subscription_status': 'active',
+        }
+
+    def test_unseen_values_get_the_reserved_code(self):
+        codes = encode_categories(pd.Series(['UK', 'Germany', 'India']), self.model.label_encoders['country'].classes_)
+        np.testing.assert_array_equal(codes, [1, 3, 0])
+
+    def test_feature_vector_matches_prepare_features(self):
+        X, _ = self.model.prepare_features(pd.DataFrame([self.customer]))
+        np.testing.assert_array_equal(self.model.feature_vector(self.customer), X.to_numpy(dtype=np.float64))
+        self.assertEqual(X['country_encoded'].iloc[0], 3)
+
+    def test_unseen_categories_are_counted(self):
+        df = pd.DataFrame([self.customer, {**self.customer, 'country': 'UK', 'gender': 'Other'}])
+        self.assertEqual(self.model.unseen_categories(df), dict.fromkeys(CATEGORICAL_FEATURES, 0) | {
+            'country': 1, 'gender': 1,
+        })
+
+
+class ForecastIntervalTests(SimpleTestCase):
+    def setUp(self):
+        self.orders = sales_orders()
+        self.X, _ = SalesForecastModel().training_data(self.orders.copy())
+        self.X = self.X.to_numpy(dtype=np.float64)
+
+    def train(self, backend='random_forest', intervals=None, params=None):
+        model = SalesForecastModel()
+        performance = model.train(self.orders.copy(), save=False, backend=backend, intervals=intervals,
+                                  params=params or {'n_estimators': 20})
+        return model, performance
+
+    def assert_bracketed(self, bounds):
+        self.assertTrue((bounds[:, 1] <= bounds[:, 0]).all())
+        self.assertTrue((bounds[:, 0] <= bounds[:, 2]).all())
+        self.assertTrue((bounds[:, 1] < bounds[:, 2]).any())
+
+    def test_tree_quantiles_bracket_the_prediction(self):
+        model, performance = self.train(intervals='trees')
+        self.assertEqual(performance['interval_method'], 'trees')
+        bounds = model.predict_intervals(self.X)
+        np.testing.assert_allclose(bounds[:, 0], model.predict_matrix(self.X))
+        self.assert_bracketed(bounds)
+        self.assertGreater(performance['interval_coverage'], 0.5)
+
+    def test_quantile_models_bracket_the_prediction(self):
+        model, performance = self.train(intervals='quantile')
+        self.assertEqual((performance['interval_method'], len(model.interval_models)), ('quantile', 2))
+        self.assert_bracketed(model.predict_intervals(self.X))
+
+    def test_non_forests_fall_back_to_quantile_models(self):
+        model, _ = self.train(backend='hist_gradient_boosting', intervals='trees', params={'max_iter': 20})
+        self.assertEqual(model.interval_method, 'quantile')
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            self.train(intervals='bootstrap')
+
+    def test_forecast_reports_its_bounds(self):
+        model, _ = self.train(intervals='trees')
+        history = self.orders[self.orders['product_id'] == 'A'].sort_values('order_date')
+        result = model.forecast({'unit_price': 10.0, 'forecast_period': 'daily', 'forecast_horizon': 4,
+                                 'history': history.groupby('order_date', as_index=False).agg(
+                                     quantity=('quantity', 'sum'), unit_price=('unit_price', 'mean'))})
+        self.assertEqual(len(result['predictions']), 4)
+        for prediction, lower, upper in zip(result['predictions'], result['lower_bound'], result['upper_bound']):
+            self.assertLessEqual(lower, prediction)
+            self.assertLessEqual(prediction, upper)
+
+    def test_incrementally_trained_models_have_no_bounds(self):
+        model = SalesForecastModel()
+        daily = model.prepare_sales_data(self.orders.copy())[['product_id', 'order_date', 'quantity', 'unit_price']]
+        model.train_incremental(lambda: iter([daily]), save=False)
+        bounds = model.predict_intervals(self.X)
+        self.assertTrue(np.isnan(bounds[:, 1:]).all())
+        result = model.forecast({'unit_price': 10.0, 'forecast_period': 'daily', 'forecast_horizon': 2})
+        self.assertEqual((result['lower_bound'], result['upper_bound']), ([None, None], [None, None]))
+
+
+class ForecastDatesTests(SimpleTestCase):
+    def test_every_period_has_dates(self):
+        for period in FORECAST_PERIODS:
+            with self.subTest(period=period):
+                self.assertEqual(len(forecast_dates(period, 3, start=date(2024, 1, 1))), 3)
+
+    def test_unknown_period(self):
+        with self.assertRaises(ValueError):
+            forecast_dates('fortnightly', 3)
+
+
+class BuildEstimatorTests(SimpleTestCase):
+    def test_n_jobs_reaches_parallel_backends_only(self):
+        forest, _ = build_estimator('classifier', 'random_forest', n_jobs=3)
+        self.assertEqual(forest.n_jobs, 3)
+        boosting, params = build_estimator('regressor', 'hist_gradient_boosting', n_jobs=3)
+        self.assertNotIn('n_jobs', params)
+        self.assertEqual(boosting.max_iter, ESTIMATOR_BACKENDS['hist_gradient_boosting']['params']['max_iter'])
+
+    def test_params_override_the_backend_defaults(self):
+        estimator, params = build_estimator('regressor', 'sgd', {'alpha': 0.01})
+        self.assertEqual(params, {'random_state': 42, 'alpha': 0.01})
+        self.assertEqual(estimator.alpha, 0.01)
+
+    def test_unknown_backends(self):
+        with self.assertRaisesMessage(ValueError, "Unknown estimator backend 'svm'. Use one of: random_forest"):
+            build_estimator('classifier', 'svm')
+        with self.assertRaisesMessage(ValueError, "Backend 'random_forest' cannot train incrementally"):
+            incremental_estimator('classifier', 'random_forest')
+
+
+class EstimatorBackendTests(ScratchFilesMixin, TestCase):
+    """Every backend trains, saves and predicts through both models"""
+
+    def setUp(self):
+        super().setUp()
+        create_customers(60)
+        self.customers = customer_feature_frame(Customer.objects.all())
+        self.orders = sales_orders()
+
+    def test_churn_model_backends(self):
+        for backend in ESTIMATOR_BACKENDS:
+            with self.subTest(backend=backend):
+                model = ChurnPredictionModel()
+                model.model_version = f'v-{backend}'
+                performance = model.train(self.customers, n_jobs=2, backend=backend)
+                self.assertEqual(performance['backend'], backend)
+                if ESTIMATOR_BACKENDS[backend]['parallel']:
+                    self.assertEqual(model.model.n_jobs, 2)
+
+                loaded = ChurnPredictionModel()
+                probabilities = loaded.predict_proba_batch(self.customers)
+                self.assertEqual(loaded.backend, backend)
+                self.assertEqual(len(probabilities), len(self.customers))
+                self.assertTrue(((probabilities >= 0) & (probabilities <= 1)).all())
+
+    def test_sales_model_backends(self):
+        for backend in ESTIMATOR_BACKENDS:
+            with self.subTest(backend=backend):
+                model = SalesForecastModel()
+                model.model_version = f'v-{backend}'
+                performance = model.train(self.orders.copy(), n_jobs=2, backend=backend)
+                self.assertEqual(performance['backend'], backend)
+                if ESTIMATOR_BACKENDS[backend]['parallel']:
+                    self.assertEqual(model.model.n_jobs, 2)
+
+                loaded = SalesForecastModel()
+                result = loaded.forecast({'unit_price': 10.0, 'forecast_period': 'daily', 'forecast_horizon': 3})
+                self.assertEqual(loaded.backend, backend)
+                self.assertEqual(len(result['predictions']), 3)
+                self.assertTrue(all(prediction >= 0 for prediction in result['predictions']))
+
+    def test_unknown_backend(self):
+        with self.assertRaisesMessage(ValueError, "Unknown estimator backend 'svm'"):
+            ChurnPredictionModel().train(self.customers, save=False, backend='svm')
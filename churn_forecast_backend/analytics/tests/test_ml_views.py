@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from .. import registry
+from ..ml_models import ChurnPredictionModel, SalesForecastModel
+from ..models import Product, SalesForecast
+from ..pipeline import fit_churn, fit_sales
+from .utils import ScratchFilesMixin, create_customers
+
+FIT_RESULT = {'model_version': 'v1', 'performance': {}, 'cached': False}
+
+
+class TrainingRequestTests(SimpleTestCase):
+    def fit(self, data, content_type='application/json'):
+        with mock.patch('analytics.ml_views.fit_churn', return_value=FIT_RESULT) as fit_churn:
+            response = self.client.post('/api/ml-training/fit_churn_model/', data, content_type=content_type)
+        return response, fit_churn
+
+    def test_options_are_cast(self):
+        response, fit_churn = self.fit({'n_jobs': '2', 'max_rows': '500', 'cv': '3', 'backend': 'sgd'})
+        self.assertEqual(response.status_code, 200)
+        options = fit_churn.call_args.kwargs
+        self.assertEqual((options['n_jobs'], options['max_rows'], options['cv']), (2, 500, 3))
+        self.assertEqual(options['backend'], 'sgd')
+
+    def test_omitted_options_use_the_pipeline_defaults(self):
+        response, fit_churn = self.fit({})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fit_churn.call_args.kwargs, {
+            'backend': None, 'params': None, 'n_jobs': None, 'mode': None, 'max_rows': None, 'cv': None,
+            'cv_scheme': None, 'force': False,
+        })
+
+    def test_force_is_parsed_as_a_boolean(self):
+        for value, expected in (('false', False), ('0', False), (False, False), ('true', True), (1, True)):
+            with self.subTest(force=value):
+                response, fit_churn = self.fit({'force': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertIs(fit_churn.call_args.kwargs['force'], expected)
+
+    def test_form_encoded_force(self):
+        response, fit_churn = self.fit('force=false', content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(fit_churn.call_args.kwargs['force'], False)
+
+    def test_invalid_options_are_rejected(self):
+        for data in ({'n_jobs': 'four'}, {'max_rows': 0}, {'cv': -1}, {'mode': 'everything'},
+                     {'backend': 'svm'}, {'params': 'n_estimators=10'}, {'force': 'maybe'}):
+            with self.subTest(data=data):
+                response, fit_churn = self.fit(data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(data)), response.json())
+                fit_churn.assert_not_called()
+
+    def test_sales_training_validates_the_same_options(self):
+        with mock.patch('analytics.ml_views.fit_sales') as fit_sales:
+            response = self.client.post('/api/ml-training/fit_sales_model/', {'cv': 'five'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        fit_sales.assert_not_called()
+
+
+class ForecastRequestTests(TestCase):
+    def post(self, action, data):
+        return self.client.post(f'/api/ml-training/{action}/', data, content_type='application/json')
+
+    def test_forecast_sales_rejects_empty_horizons(self):
+        Product.objects.create(product_id='P1', product_name='Jacket', category='Clothing', unit_price=40.0)
+        for horizon in (0, -3, 'twelve'):
+            with self.subTest(horizon=horizon):
+                response = self.post('forecast_sales', {'product_id': 'P1', 'forecast_horizon': horizon})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('forecast_horizon', response.json())
+        response = self.post('forecast_sales', {'product_id': 'P1', 'forecast_period': 'fortnightly'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('forecast_period', response.json())
+
+    def test_generate_forecasts_validates_its_options(self):
+        with mock.patch('analytics.ml_views.forecast_all') as forecast_all:
+            for data in ({'forecast_horizon': 0}, {'forecast_horizon': 1000}, {'forecast_period': 'hourly'},
+                         {'top_products': 'ten'}):
+                with self.subTest(data=data):
+                    response = self.post('generate_forecasts', data)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(next(iter(data)), response.json())
+            forecast_all.assert_not_called()
+
+    def test_generate_forecasts_passes_the_validated_horizon(self):
+        with mock.patch('analytics.ml_views.forecast_all', return_value={'forecasts_generated': 3}) as forecast_all:
+            response = self.post('generate_forecasts', {'forecast_horizon': '3', 'forecast_period': 'daily'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(forecast_all.call_args.kwargs, {'products': None, 'periods': [('daily', 3)]})
+
+    def test_command_rejects_empty_horizons(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_forecasts', horizon=0)
+
+
+class TuneRequestTests(SimpleTestCase):
+    def tune(self, data):
+        with mock.patch('analytics.ml_views.tune_model', return_value={}) as tune_model:
+            response = self.client.post('/api/ml-training/tune/', data, content_type='application/json')
+        return response, tune_model
+
+    def test_defaults(self):
+        response, tune_model = self.tune({})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tune_model.call_args.kwargs, {
+            'model_type': 'churn_prediction', 'backends': None, 'search': 'random', 'n_candidates': 10, 'cv': 3,
+            'n_jobs': None, 'refit': False, 'dry_run': False,
+        })
+
+    def test_options_are_parsed(self):
+        response, tune_model = self.tune({
+            'model_type': 'sales_forecast', 'backends': ['sgd', 'random_forest'], 'search': 'halving',
+            'n_candidates': '6', 'cv': '4', 'n_jobs': '-1', 'refit': 'false', 'dry_run': 'true',
+        })
+        self.assertEqual(response.status_code, 200)
+        options = tune_model.call_args.kwargs
+        self.assertEqual((options['n_candidates'], options['cv'], options['n_jobs']), (6, 4, -1))
+        self.assertIs(options['refit'], False)
+        self.assertIs(options['dry_run'], True)
+        self.assertEqual(options['backends'], ['sgd', 'random_forest'])
+
+    def test_invalid_options_are_rejected(self):
+        for data in ({'model_type': 'pricing'}, {'backends': ['svm']}, {'backends': []}, {'search': 'grid'},
+                     {'n_candidates': 'ten'}, {'n_candidates': 0}, {'cv': 1}, {'n_jobs': 'all'},
+                     {'refit': 'maybe'}, {'dry_run': 'perhaps'}):
+            with self.subTest(data=data):
+                response, tune_model = self.tune(data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(data)), response.json())
+                tune_model.assert_not_called()
+
+
+class ServedModelTests(ScratchFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_customers(40)
+
+    def post(self, action, data):
+        return self.client.post(f'/api/ml-training/{action}/', data, content_type='application/json')
+
+    def counting_loads(self, model_class):
+        return mock.patch.object(model_class, 'load_model', autospec=True, side_effect=model_class.load_model)
+
+    def test_predictions_reuse_the_loaded_model_until_the_pointer_moves(self):
+        first = fit_churn(cv=0, backend='sgd')['model_version']
+        with self.counting_loads(ChurnPredictionModel) as load_model:
+            for _ in range(2):
+                self.assertEqual(self.post('predict_churn', {'customer_id': 'C1'}).status_code, 200)
+            self.assertEqual(load_model.call_count, 1)
+
+            fit_churn(cv=0, backend='random_forest', params={'n_estimators': 5})
+            self.post('predict_churn', {'customer_id': 'C1'})
+            self.assertEqual(load_model.call_count, 2)
+
+            registry.rollback('churn_prediction')
+            self.post('predict_churn', {'customer_id': 'C1'})
+            self.post('predict_churn', {'customer_id': 'C2'})
+            self.assertEqual(load_model.call_count, 3)
+            self.assertEqual(load_model.call_args.args[1], first)
+
+    def test_forecasts_reuse_the_loaded_model(self):
+        version = fit_sales(cv=0, backend='sgd')['model_version']
+        with self.counting_loads(SalesForecastModel) as load_model:
+            for _ in range(2):
+                response = self.post('forecast_sales', {'product_id': 'P1', 'forecast_horizon': 2})
+                self.assertEqual(response.status_code, 200)
+            self.assertEqual(load_model.call_count, 1)
+        self.assertEqual(set(SalesForecast.objects.values_list('model_version', flat=True)), {version})
@@ -0,0 +1,39 @@
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+
+from .. import pipeline, registry
+from ..models import ModelPerformance
+from .utils import ScratchFilesMixin, create_customers
+
+
+class FitStageTests(ScratchFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_customers(60)
+
+    def test_fit_churn_publishes_records_and_caches(self):
+        result = pipeline.fit_churn(n_jobs=2, cv=2, force=True)
+        self.assertEqual(registry.current_version('churn_prediction'), result['model_version'])
+        self.assertTrue(ModelPerformance.objects.filter(model_version=result['model_version']).exists())
+        self.assertTrue(os.path.exists(os.path.join(settings.ML_REGISTRY_DIR, 'churn', 'training.json')))
+        self.assertEqual(len(result['cross_validation']['folds']), 2)
+
+        cached = pipeline.fit_churn(n_jobs=2, cv=2)
+        self.assertTrue(cached['cached'])
+        self.assertEqual(cached['model_version'], result['model_version'])
+
+    def test_runs_skip_cross_validation_by_default(self):
+        result = pipeline.fit_churn(force=True)
+        self.assertIsNone(result['cross_validation'])
+        self.assertEqual(ModelPerformance.objects.get().evaluation, 'holdout')
+
+    def test_failed_cross_validation_keeps_the_served_model(self):
+        served = pipeline.fit_churn(cv=0, force=True)['model_version']
+        with mock.patch.object(pipeline, 'cross_validate_frame', side_effect=RuntimeError('fold failed')):
+            with self.assertRaises(RuntimeError):
+                pipeline.fit_churn(cv=2, force=True)
+        self.assertEqual(registry.current_version('churn_prediction'), served)
+        self.assertEqual(ModelPerformance.objects.count(), 1)
@@ -0,0 +1,102 @@
+import os
+import stat
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import registry
+from .utils import ScratchFilesMixin
+
+
+class RegistryTests(ScratchFilesMixin, SimpleTestCase):
+    def publish(self, content):
+        version = f'v{content}'
+        with registry.publish('churn_prediction', version, {'backend': 'random_forest'}) as directory:
+            with open(os.path.join(directory, 'model.pkl'), 'w') as f:
+                f.write(content)
+        return version
+
+    def test_publish_promote_and_rollback(self):
+        first, second = self.publish('1'), self.publish('2')
+        self.assertEqual(registry.current_version('churn_prediction'), second)
+        self.assertEqual(registry.rollback('churn_prediction'), first)
+        self.assertEqual(registry.current_version('churn_prediction'), first)
+        registry.promote('churn_prediction', second)
+        directory, manifest = registry.resolve('churn_prediction')
+        self.assertEqual(manifest['version'], second)
+        with open(os.path.join(directory, 'model.pkl')) as f:
+            self.assertEqual(f.read(), '2')
+
+    def test_failed_publish_registers_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with registry.publish('churn_prediction', 'v1', {}):
+                raise RuntimeError
+        self.assertEqual(registry.list_versions('churn_prediction'), [])
+        self.assertIsNone(registry.current_version('churn_prediction'))
+
+    def test_unpromoted_version_is_not_served(self):
+        served = self.publish('1')
+        with registry.publish('churn_prediction', 'v2', {}, promote_version=False):
+            pass
+        self.assertEqual(registry.current_version('churn_prediction'), served)
+
+    def test_verify_detects_modified_files(self):
+        version = self.publish('1')
+        path = os.path.join(registry.version_path('churn_prediction', version), 'model.pkl')
+        os.chmod(path, 0o644)
+        with open(path, 'w') as f:
+            f.write('tampered')
+        with self.assertRaises(ValueError):
+            registry.promote('churn_prediction', version)
+
+    def test_prune_keeps_served_and_rollback_versions(self):
+        versions = [self.publish(str(index)) for index in range(4)]
+        registry.set_pointer('churn_prediction', versions[-1], [])
+        self.assertEqual(sorted(registry.prune('churn_prediction', keep=2)), versions[:2])
+
+    def test_promotion_waits_for_the_lock(self):
+        first, second = self.publish('1'), self.publish('2')
+        promoted = threading.Event()
+
+        def promote():
+            registry.promote('churn_prediction', first)
+            promoted.set()
+
+        with registry.pointer_lock('churn_prediction'):
+            thread = threading.Thread(target=promote)
+            thread.start()
+            self.assertFalse(promoted.wait(0.2))
+            self.assertEqual(registry.current_version('churn_prediction'), second)
+        thread.join(5)
+        self.assertTrue(promoted.is_set())
+        self.assertEqual(registry.pointer('churn_prediction')['history'][0], second)
+
+    def test_prune_logs_versions_it_cannot_delete(self):
+        versions = [self.publish(str(index)) for index in range(3)]
+        registry.set_pointer('churn_prediction', versions[-1], [])
+        with mock.patch.object(registry, 'remove_tree', side_effect=PermissionError('in use')):
+            with self.assertLogs('analytics.registry', 'ERROR') as logs:
+                self.assertEqual(registry.prune('churn_prediction', keep=1), [])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(len(registry.list_versions('churn_prediction')), 3)
+
+
+class RemoveTreeTests(ScratchFilesMixin, SimpleTestCase):
+    def test_read_only_files_are_made_writable_and_retried(self):
+        directory = os.path.join(self.scratch, 'v1')
+        os.makedirs(directory)
+        path = os.path.join(directory, 'model.pkl')
+        open(path, 'w').close()
+        os.chmod(path, 0o444)
+        unlink = os.unlink
+
+        def windows_unlink(name, *, dir_fd=None):
+            # Windows refuses to delete read-only files
+            if not os.stat(name, dir_fd=dir_fd).st_mode & stat.S_IWRITE:
+                raise PermissionError(name)
+            unlink(name, dir_fd=dir_fd)
+
+        with mock.patch('os.unlink', windows_unlink):
+            registry.remove_tree(directory)
+        self.assertFalse(os.path.exists(directory))
@@ -0,0 +1,139 @@
+import io
+import json
+from datetime import date
+from importlib.util import find_spec
+from unittest import skipUnless
+
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+
+from ..middleware import compress_sequence_brotli
+from ..models import Product
+from ..renderers import ArrowRenderer, MessagePackRenderer, ParquetRenderer, payload_to_frame
+from .utils import create_customers
+
+ROWS = [
+    {'product_id': 'P1', 'unit_price': 40.0, 'first_order': date(2024, 1, 1)},
+    {'product_id': 'P2', 'unit_price': 12.5, 'first_order': date(2024, 2, 1)},
+]
+
+
+def create_products(count):
+    """Enough products for a list response over the compression threshold"""
+    for index in range(count):
+        Product.objects.create(product_id=f'R{index}', product_name='Winter jacket', category='Clothing',
+                               unit_price=40.0)
+
+
+class PayloadFrameTests(SimpleTestCase):
+    def test_lists_become_rows(self):
+        self.assertEqual(payload_to_frame(ROWS)['product_id'].tolist(), ['P1', 'P2'])
+
+    def test_paginated_payloads_use_their_data(self):
+        df = payload_to_frame({'data': ROWS, 'page': 1, 'has_next': False})
+        self.assertEqual(list(df.columns), ['product_id', 'unit_price', 'first_order'])
+        self.assertEqual(len(df), 2)
+
+    def test_other_dicts_become_one_flattened_row(self):
+        df = payload_to_frame({'total': 3, 'risk': {'High': 1}})
+        self.assertEqual(df.to_dict('records'), [{'total': 3, 'risk.High': 1}])
+
+
+@skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+class ColumnarRendererTests(SimpleTestCase):
+    def test_arrow_stream_round_trips(self):
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(ArrowRenderer().render(ROWS)).read_all()
+        self.assertEqual(table.column('product_id').to_pylist(), ['P1', 'P2'])
+        self.assertEqual(table.column('unit_price').to_pylist(), [40.0, 12.5])
+
+    def test_parquet_round_trips(self):
+        df = pd.read_parquet(io.BytesIO(ParquetRenderer().render(ROWS)))
+        self.assertEqual(df['product_id'].tolist(), ['P1', 'P2'])
+        self.assertEqual(df['first_order'].tolist(), [date(2024, 1, 1), date(2024, 2, 1)])
+
+    def test_empty_payloads_render_nothing(self):
+        self.assertEqual(ArrowRenderer().render(None), b'')
+        self.assertEqual(ParquetRenderer().render(None), b'')
+
+
+@skipUnless(find_spec('msgpack'), 'msgpack is not installed')
+class MessagePackRendererTests(SimpleTestCase):
+    def test_dates_are_encoded_like_json(self):
+        import msgpack
+
+        payload = msgpack.unpackb(MessagePackRenderer().render({'data': ROWS}))
+        self.assertEqual(payload['data'][0], {'product_id': 'P1', 'unit_price': 40.0, 'first_order': '2024-01-01'})
+
+
+class RendererSelectionTests(TestCase):
+    def setUp(self):
+        create_products(20)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_format_parameter_selects_parquet(self):
+        response = self.client.get('/api/products/', {'format': 'parquet'}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        # Already compressed, so passed through as is
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(pd.read_parquet(io.BytesIO(response.content))), 20)
+
+    @skipUnless(find_spec('msgpack'), 'msgpack is not installed')
+    def test_accept_header_selects_msgpack(self):
+        import msgpack
+
+        response = self.client.get('/api/products/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(len(msgpack.unpackb(response.content)), 20)
+
+    def test_json_stays_the_default(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        create_products(20)
+
+    def test_gzip_without_brotli_support(self):
+        response = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_responses_are_not_compressed(self):
+        Product.objects.all().delete()
+        response = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(find_spec('brotli'), 'brotli is not installed')
+    def test_brotli_when_accepted(self):
+        import brotli
+
+        response = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))), 20)
+
+    @skipUnless(find_spec('brotli'), 'brotli is not installed')
+    def test_streamed_exports_are_brotli_compressed(self):
+        import brotli
+
+        create_customers(3)
+        response = self.client.get('/api/orders/export/', {'chunk_size': 1}, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        lines = brotli.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['order_id'] for line in lines], ['O0', 'O1', 'O2'])
+
+
+@skipUnless(find_spec('brotli'), 'brotli is not installed')
+class BrotliStreamTests(SimpleTestCase):
+    def test_every_chunk_is_flushed_as_it_arrives(self):
+        import brotli
+
+        chunks = [b'{"row": 1}\n' * 50, b'{"row": 2}\n' * 50]
+        stream = compress_sequence_brotli(iter(chunks), quality=4)
+        decompressor = brotli.Decompressor()
+        self.assertEqual(decompressor.process(next(stream)), chunks[0])
+        self.assertEqual(decompressor.process(next(stream)), chunks[1])
+        self.assertEqual(decompressor.process(b''.join(stream)), b'')
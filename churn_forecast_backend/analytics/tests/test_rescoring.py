@@ -0,0 +1,96 @@
+from datetime import date
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import pipeline
+from ..features import refresh_customer_features
+from ..ml_models import ChurnPredictionModel
+from ..models import ChurnPrediction, Order, Product
+from ..versioning import activate_version, start_version
+from .utils import create_customers
+
+
+def loaded_model(version):
+    """Patch ChurnPredictionModel.load_model to load a model saved as version"""
+    def load_model(model, version_to_load=None):
+        model.model_version = version
+    return mock.patch.object(ChurnPredictionModel, 'load_model', load_model)
+
+
+class RescoreChangedCustomersTests(TestCase):
+    def setUp(self):
+        self.customers = create_customers(3)
+        refresh_customer_features()
+        self.version = start_version('churn_prediction', artifact_version='v-model')
+        pipeline.write_predictions([customer.pk for customer in self.customers], [0.1, 0.1, 0.1], ['Low'] * 3,
+                                   self.version)
+        self.version.high_threshold, self.version.medium_threshold = 0.8, 0.5
+        self.version.scored_at = timezone.now()
+        self.version.save()
+        activate_version(self.version)
+        self.model = mock.Mock(spec=['predict_proba_batch'])
+        self.model.predict_proba_batch.side_effect = lambda df: np.full(len(df), 0.9)
+
+    def predictions(self):
+        return dict(ChurnPrediction.objects.filter(model_version=self.version.version).values_list(
+            'customer__customer_id', 'risk_level'
+        ))
+
+    def test_unchanged_customers_are_not_rescored(self):
+        self.assertEqual(pipeline.rescore_changed_customers(self.model, self.version), 0)
+        self.model.predict_proba_batch.assert_not_called()
+
+    def test_changed_customers_and_orders_are_rescored(self):
+        customer = self.customers[0]
+        customer.ratings = 1.0
+        customer.save()
+        Order.objects.create(order_id='O-new', customer=self.customers[1], product=Product.objects.get(),
+                             quantity=2, order_date=date(2024, 6, 1))
+
+        self.assertEqual(pipeline.rescore_changed_customers(self.model, self.version), 2)
+        # Tiered with the version's persisted thresholds, one prediction per customer
+        self.assertEqual(self.predictions(), {'C0': 'High', 'C1': 'High', 'C2': 'Low'})
+        self.assertEqual(ChurnPrediction.objects.count(), 3)
+
+        # The run moves the version's cut-off forward
+        self.assertEqual(pipeline.rescore_changed_customers(self.model, self.version), 0)
+
+    def test_deleted_orders_mark_customers_changed(self):
+        Order.objects.filter(customer=self.customers[2]).delete()
+        changed = pipeline.changed_customers(self.version.scored_at)
+        self.assertEqual(list(changed.values_list('customer_id', flat=True)), ['C2'])
+
+
+class RescoreChurnViewTests(TestCase):
+    def setUp(self):
+        create_customers(2)
+        self.version = start_version('churn_prediction', artifact_version='v-model')
+        self.version.scored_at = timezone.now()
+        self.version.save()
+
+    def rescore(self):
+        return self.client.post('/api/ml-training/rescore_churn/')
+
+    def test_no_active_version(self):
+        self.assertEqual(self.rescore().status_code, 400)
+
+    def test_retrained_model_conflicts(self):
+        activate_version(self.version)
+        with loaded_model('v-retrained'):
+            response = self.rescore()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('score_churn', response.json()['error'])
+
+    def test_rescores_with_the_scoring_model(self):
+        activate_version(self.version)
+        with loaded_model('v-model'), mock.patch.object(
+            ChurnPredictionModel, 'predict_proba_batch', lambda model, df: np.full(len(df), 0.2)
+        ):
+            response = self.rescore()
+        self.assertEqual(response.status_code, 200)
+        # Neither customer has stored features yet, so both count as changed
+        self.assertEqual(response.json()['customers_rescored'], 2)
+        self.assertEqual(ChurnPrediction.objects.active().count(), 2)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..models import Customer
+from ..routers import REPLICA_ALIAS, ReplicaRouter, read_from_replica, use_replica
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def with_replica(self):
+        patcher = mock.patch.dict(settings.DATABASES, {REPLICA_ALIAS: settings.DATABASES['default']})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_stay_on_default_without_a_replica(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    def test_marked_reads_go_to_the_replica(self):
+        self.with_replica()
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Customer), REPLICA_ALIAS)
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    def test_writes_always_go_to_default(self):
+        self.with_replica()
+        with use_replica():
+            self.assertEqual(self.router.db_for_write(Customer), 'default')
+
+    def test_decorated_views_read_from_the_replica(self):
+        self.with_replica()
+
+        @read_from_replica
+        def view(request):
+            return self.router.db_for_read(Customer)
+
+        self.assertEqual(view(None), REPLICA_ALIAS)
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    def test_routing_is_reset_when_the_view_raises(self):
+        self.with_replica()
+
+        @read_from_replica
+        def view(request):
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            view(None)
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
@@ -0,0 +1,125 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase
+
+from ..features import refresh_customer_features
+from ..models import CustomerFeatures, Order, Product
+from ..pipeline import NoTrainingData, training_frame
+from ..sampling import (
+    CHURN_LABEL, CUSTOMER_COLUMNS, proportional_quotas, sample_customer_frame, sample_key, sample_keys,
+    sample_sales_frame
+)
+from .utils import ScratchFilesMixin, create_customers
+
+
+class ProportionalQuotaTests(SimpleTestCase):
+    def test_small_populations_are_kept_whole(self):
+        self.assertEqual(proportional_quotas({0: 30, 1: 10}, 50), {0: 30, 1: 10})
+
+    def test_quotas_follow_stratum_sizes(self):
+        self.assertEqual(proportional_quotas({0: 900, 1: 100}, 100), {0: 90, 1: 10})
+
+    def test_every_stratum_keeps_a_row(self):
+        self.assertEqual(proportional_quotas({0: 9990, 1: 10, 2: 0}, 100), {0: 99, 1: 1})
+
+
+class SampleKeyTests(SimpleTestCase):
+    def test_keys_scatter_consecutive_rows(self):
+        order = np.argsort(sample_keys(np.arange(1, 101), seed=42))
+        self.assertFalse((np.diff(order) == 1).all())
+        self.assertEqual(sorted(order.tolist()), list(range(100)))
+
+    def test_seeds_pick_different_rows(self):
+        first = set(np.argsort(sample_keys(np.arange(1000), seed=1))[:100])
+        second = set(np.argsort(sample_keys(np.arange(1000), seed=2))[:100])
+        self.assertLess(len(first & second), 50)
+
+
+class CustomerSampleTests(TestCase):
+    def setUp(self):
+        create_customers(60)
+        refresh_customer_features()
+        self.counts = dict(
+            CustomerFeatures.objects.annotate(stratum=CHURN_LABEL).values_list('stratum').annotate(rows=Count('pk'))
+        )
+
+    def test_sql_keys_match_the_in_memory_ones(self):
+        keyed = CustomerFeatures.objects.annotate(key=sample_key('customer_id', 7)).values_list('customer_id', 'key')
+        pks, keys = zip(*keyed)
+        np.testing.assert_array_equal(keys, sample_keys(pks, 7))
+
+    def test_each_stratum_is_cut_at_its_quota(self):
+        df = sample_customer_frame(20)
+        self.assertEqual(list(df.columns), CUSTOMER_COLUMNS)
+        quotas = proportional_quotas(self.counts, 20)
+        labels = dict(CustomerFeatures.objects.annotate(stratum=CHURN_LABEL).values_list('customer_id', 'stratum'))
+        sampled = [labels[pk] for pk in df['customer_pk']]
+        self.assertEqual({stratum: sampled.count(stratum) for stratum in quotas}, quotas)
+        self.assertEqual(df['customer_pk'].tolist(), sorted(df['customer_pk']))
+
+    def test_samples_are_the_lowest_keys_of_each_stratum(self):
+        df = sample_customer_frame(20, seed=3)
+        rows = CustomerFeatures.objects.annotate(stratum=CHURN_LABEL).values_list('customer_id', 'stratum')
+        expected = set()
+        for stratum, quota in proportional_quotas(self.counts, 20).items():
+            pks = np.array([pk for pk, label in rows if label == stratum])
+            expected.update(pks[np.argsort(sample_keys(pks, 3))[:quota]].tolist())
+        self.assertEqual(set(df['customer_pk']), expected)
+
+    def test_samples_are_reproducible(self):
+        self.assertEqual(sample_customer_frame(20, seed=1)['customer_pk'].tolist(),
+                         sample_customer_frame(20, seed=1)['customer_pk'].tolist())
+        self.assertNotEqual(sample_customer_frame(20, seed=1)['customer_pk'].tolist(),
+                            sample_customer_frame(20, seed=2)['customer_pk'].tolist())
+
+    def test_empty_table(self):
+        CustomerFeatures.objects.all().delete()
+        self.assertTrue(sample_customer_frame(20).empty)
+
+
+class SalesSampleTests(TestCase):
+    def setUp(self):
+        customer = create_customers(1)[0]
+        Order.objects.all().delete()
+        for product_index in range(6):
+            product = Product.objects.create(product_id=f'S{product_index}', product_name='Boots',
+                                             category='Shoes', unit_price=60.0)
+            for day in range(5):
+                Order.objects.create(order_id=f'S{product_index}-{day}', customer=customer, product=product,
+                                     quantity=day + 1, order_date=date(2024, 1, 1) + timedelta(days=day))
+
+    def test_whole_histories_of_sampled_products(self):
+        df = sample_sales_frame(10)
+        products = df['product_id'].unique()
+        # 10 of 30 daily rows is a third of the 6 products with orders
+        self.assertEqual(len(products), 2)
+        self.assertEqual(len(df), 10)
+        for _, history in df.groupby('product_id'):
+            self.assertEqual(history['quantity'].tolist(), [1, 2, 3, 4, 5])
+
+    def test_products_are_picked_by_their_keys(self):
+        pks = np.array(Product.objects.filter(orders__isnull=False).distinct().values_list('pk', flat=True))
+        expected = pks[np.argsort(sample_keys(pks, 5))[:2]]
+        self.assertEqual(
+            set(sample_sales_frame(10, seed=5)['product_id']),
+            set(Product.objects.filter(pk__in=expected.tolist()).values_list('product_id', flat=True))
+        )
+
+
+class EmptyPopulationTests(ScratchFilesMixin, TestCase):
+    def test_sampling_nothing_is_a_clear_error(self):
+        for model_type in ('churn_prediction', 'sales_forecast'):
+            for mode in ('sample', 'full', None):
+                with self.subTest(model_type=model_type, mode=mode):
+                    with self.assertRaises(NoTrainingData):
+                        training_frame(model_type, mode=mode)
+
+    def test_training_views_answer_400(self):
+        for action in ('fit_churn_model', 'fit_sales_model'):
+            with self.subTest(action=action):
+                response = self.client.post(f'/api/ml-training/{action}/', {'mode': 'sample'},
+                                            content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('to train', response.json()['error'])
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import pipeline
+from ..ml_models import (
+    RISK_THRESHOLD_FLOORS, ProbabilityHistogram, assign_risk_levels, compute_risk_thresholds
+)
+from ..models import ChurnPrediction
+from ..versioning import start_version
+from .utils import create_customers
+
+
+class RiskThresholdTests(SimpleTestCase):
+    def test_thresholds_are_population_percentiles(self):
+        thresholds = compute_risk_thresholds(np.linspace(0.5, 1.0, 101))
+        self.assertAlmostEqual(thresholds['high'], 0.95)
+        self.assertAlmostEqual(thresholds['medium'], 0.85)
+
+    def test_floors_apply_to_low_risk_populations(self):
+        self.assertEqual(compute_risk_thresholds(np.linspace(0, 0.3, 101)), RISK_THRESHOLD_FLOORS)
+
+    def test_levels_are_assigned_at_the_thresholds(self):
+        levels = assign_risk_levels([0.9, 0.8, 0.79, 0.6, 0.1], {'high': 0.8, 'medium': 0.6})
+        self.assertEqual(levels.tolist(), ['High', 'High', 'Medium', 'Medium', 'Low'])
+
+
+class ProbabilityHistogramTests(SimpleTestCase):
+    def test_percentiles_are_within_one_bin(self):
+        probabilities = np.random.default_rng(0).beta(2, 5, size=50000)
+        sketch = ProbabilityHistogram(bins=1000)
+        for chunk in np.array_split(probabilities, 7):
+            sketch.update(chunk)
+        self.assertEqual(sketch.total, 50000)
+        for q in (10, 50, 70, 90, 99):
+            # The lower edge of the bin holding the exact percentile
+            self.assertAlmostEqual(sketch.percentile(q), np.percentile(probabilities, q), delta=2 / sketch.bins)
+
+    def test_certain_churners_fall_in_the_last_bin(self):
+        sketch = ProbabilityHistogram(bins=10)
+        sketch.update([1.0, 1.0, 0.0])
+        self.assertEqual(sketch.percentile(90), 0.9)
+        self.assertEqual(sketch.percentile(0), 0.0)
+
+    def test_thresholds_match_the_exact_ones(self):
+        probabilities = np.random.default_rng(1).uniform(0.4, 1.0, size=20000)
+        sketch = ProbabilityHistogram()
+        sketch.update(probabilities)
+        exact = compute_risk_thresholds(probabilities)
+        for level, threshold in sketch.risk_thresholds().items():
+            self.assertAlmostEqual(threshold, exact[level], delta=2 / sketch.bins)
+
+
+class FixedProbabilities:
+    """Churn model stand-in scoring each customer by its position"""
+
+    def __init__(self, probabilities):
+        self.probabilities = dict(probabilities)
+
+    def predict_proba_batch(self, df):
+        return np.array([self.probabilities[pk] for pk in df['customer_pk']])
+
+
+class ScoreCustomersTests(TestCase):
+    def setUp(self):
+        customers = create_customers(20)
+        self.df = pd.DataFrame({'customer_pk': [customer.pk for customer in customers]})
+        self.probabilities = np.linspace(0.05, 1.0, 20)
+        self.model = FixedProbabilities(zip(self.df['customer_pk'], self.probabilities))
+
+    def score(self):
+        version = start_version('churn_prediction')
+        created, thresholds = pipeline.score_customers(self.model, self.df, version, chunk_size=6)
+        self.assertEqual(created, 20)
+        version.refresh_from_db()
+        self.assertEqual(version.risk_thresholds, thresholds)
+        levels = dict(ChurnPrediction.objects.filter(model_version=version.version).values_list(
+            'churn_probability', 'risk_level'
+        ))
+        return thresholds, [levels[p] for p in sorted(levels)]
+
+    def test_exact_percentiles(self):
+        thresholds, levels = self.score()
+        self.assertEqual(thresholds, compute_risk_thresholds(self.probabilities))
+        self.assertEqual(levels, ['Low'] * 14 + ['Medium'] * 4 + ['High'] * 2)
+
+    @override_settings(CHURN_EXACT_PERCENTILE_LIMIT=10)
+    def test_streamed_histogram_tiers_rows_in_the_database(self):
+        thresholds, levels = self.score()
+        sketch = ProbabilityHistogram()
+        sketch.update(self.probabilities)
+        self.assertEqual(thresholds, sketch.risk_thresholds())
+        # The UPDATE tiers rows as the NumPy assignment would
+        self.assertEqual(levels, assign_risk_levels(self.probabilities, thresholds).tolist())
@@ -0,0 +1,60 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from ..ml_models import SalesForecastModel
+from ..time_series import SALES_FEATURES, SalesHistory, recursive_forecast
+from .utils import sales_orders
+
+
+class HistoryFeatureParityTests(SimpleTestCase):
+    """Training features (add_history_features) must be the ones forecasting builds (SalesHistory)"""
+
+    def setUp(self):
+        self.sales_data = SalesForecastModel().prepare_sales_data(sales_orders())
+
+    def test_columns_match(self):
+        history = SalesHistory.from_frame(self.sales_data)
+        self.assertEqual(history.features(pd.Timestamp('2024-06-01')).shape[1], len(SALES_FEATURES))
+        self.assertTrue(set(SALES_FEATURES) <= set(self.sales_data.columns))
+
+    def test_history_of_earlier_days_gives_the_training_row(self):
+        for index, row in self.sales_data.iterrows():
+            earlier = self.sales_data[(self.sales_data['product_id'] == row['product_id'])
+                                      & (self.sales_data['order_date'] < row['order_date'])]
+            history = SalesHistory.from_frame(earlier, product_ids=[row['product_id']],
+                                              unit_prices=[row['unit_price']])
+            np.testing.assert_allclose(history.features(row['order_date'])[0],
+                                       row[SALES_FEATURES].to_numpy(dtype=float), err_msg=str(index))
+
+    def test_appended_observations_give_the_training_rows(self):
+        for product_id, rows in self.sales_data.groupby('product_id'):
+            history = SalesHistory.from_frame(rows.iloc[:1], product_ids=[product_id])
+            for _, row in rows.iloc[1:].iterrows():
+                np.testing.assert_allclose(history.features(row['order_date'])[0],
+                                           row[SALES_FEATURES].to_numpy(dtype=float))
+                history.append(row['order_date'], np.array([row['quantity']], dtype=float))
+
+
+class RecursiveForecastTests(SimpleTestCase):
+    def setUp(self):
+        self.history = SalesHistory.from_frame(SalesForecastModel().prepare_sales_data(sales_orders()))
+
+    def test_predictions_are_fed_back(self):
+        dates = pd.date_range('2024-06-01', periods=3, freq='D')
+        forecasts = recursive_forecast(lambda X: X[:, [SALES_FEATURES.index('lag_1')]] + 1, self.history, dates)
+        self.assertEqual(forecasts.shape, (3, 3, 1))
+        np.testing.assert_array_equal(np.diff(forecasts[:, :, 0], axis=1), 1)
+
+    def test_empty_horizon_keeps_the_output_width(self):
+        forecasts = recursive_forecast(lambda X: X[:, :3], self.history, [], n_outputs=3)
+        self.assertEqual(forecasts.shape, (3, 0, 3))
+
+    def test_model_forecast_of_no_periods(self):
+        model = SalesForecastModel()
+        model.model = mock.Mock(n_features_in_=len(SALES_FEATURES))
+        result = model.forecast({'unit_price': 10.0, 'forecast_horizon': 0})
+        self.assertEqual((result['dates'], result['predictions'], result['lower_bound'], result['upper_bound']),
+                         ([], [], [], []))
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.test import TestCase
+
+from ..models import Order, Product
+from .utils import create_customers
+
+
+class SalesTrendTests(TestCase):
+    def setUp(self):
+        customer = create_customers(1)[0]
+        Order.objects.all().delete()
+        product = Product.objects.get()
+        # Wednesday and Sunday of one ISO week, the next Monday, and a later quarter
+        for index, (order_date, quantity) in enumerate([
+            (date(2024, 1, 3), 1), (date(2024, 1, 7), 2), (date(2024, 1, 8), 3), (date(2024, 5, 20), 4),
+        ]):
+            Order.objects.create(order_id=f'T{index}', customer=customer, product=product, quantity=quantity,
+                                 order_date=order_date)
+
+    def trend(self, granularity=None):
+        params = {'granularity': granularity} if granularity else {}
+        response = self.client.get('/api/products/sales_analytics/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def buckets(self, data):
+        return [(row['period'][:10], row['total_quantity']) for row in data['sales_trend']]
+
+    def test_weeks_start_on_monday(self):
+        data = self.trend('week')
+        self.assertEqual(self.buckets(data), [('2024-01-01', 3), ('2024-01-08', 3), ('2024-05-20', 4)])
+        self.assertNotIn('monthly_sales_trend', data)
+
+    def test_quarters(self):
+        self.assertEqual(self.buckets(self.trend('quarter')), [('2024-01-01', 6), ('2024-04-01', 4)])
+
+    def test_month_is_the_default_and_keeps_the_original_shape(self):
+        data = self.trend()
+        self.assertEqual(data['granularity'], 'month')
+        self.assertEqual(self.buckets(data), [('2024-01-01', 6), ('2024-05-01', 4)])
+        self.assertEqual(
+            [(row['year_month'], row['total_quantity']) for row in data['monthly_sales_trend']],
+            [('2024-01', 6), ('2024-05', 4)]
+        )
+        self.assertEqual(data['monthly_sales_trend'][0]['total_revenue'], 240.0)
+
+    def test_unknown_granularity_is_rejected(self):
+        response = self.client.get('/api/products/sales_analytics/', {'granularity': 'day'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('week, month, quarter', response.json()['error'])
@@ -0,0 +1,75 @@
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Customer, ModelPerformance
+from ..tuning import SEARCH_SPACES, data_fingerprint, sample_candidates, tune_model
+from .utils import ScratchFilesMixin, create_customers
+
+
+class SampleCandidatesTests(SimpleTestCase):
+    def test_candidates_are_spread_over_the_backends(self):
+        candidates = sample_candidates(['sgd', 'random_forest'], 4, seed=0)
+        self.assertEqual([c['backend'] for c in candidates], ['sgd', 'sgd', 'random_forest', 'random_forest'])
+        for candidate in candidates:
+            self.assertLessEqual(set(candidate['params']), set(SEARCH_SPACES[candidate['backend']]))
+
+    def test_candidates_are_reproducible(self):
+        self.assertEqual(sample_candidates(['sgd'], 3, seed=1), sample_candidates(['sgd'], 3, seed=1))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            sample_candidates(['svm'], 2, seed=0)
+
+    def test_fingerprint_follows_the_data(self):
+        X, y = np.arange(6.0).reshape(3, 2), np.array([0, 1, 0])
+        self.assertEqual(data_fingerprint(X, y), data_fingerprint(X.copy(), y.copy()))
+        self.assertNotEqual(data_fingerprint(X, y), data_fingerprint(X, 1 - y))
+
+
+class TuneModelTests(ScratchFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_customers(60)
+
+    def tune(self, **options):
+        return tune_model('churn_prediction', **{
+            'backends': ['sgd'], 'n_candidates': 2, 'cv': 2, 'n_jobs': 1, 'dry_run': True, **options
+        })
+
+    def test_random_search_scores_every_candidate(self):
+        result = self.tune()
+        self.assertEqual(result['rounds'], [{'candidates': 2, 'rows': 60, 'folds': 4, 'cached_folds': 0}])
+        self.assertEqual([winner['backend'] for winner in result['winners']], ['sgd'])
+        self.assertEqual(result['best']['score'], result['winners'][0]['score'])
+        self.assertFalse(ModelPerformance.objects.exists())
+
+    def test_repeated_search_reuses_the_cached_folds(self):
+        first = self.tune()
+        second = self.tune()
+        self.assertEqual(second['rounds'][0]['cached_folds'], second['rounds'][0]['folds'])
+        self.assertEqual(second['best'], first['best'])
+
+        # Changed data invalidates every fold
+        Customer.objects.filter(customer_id='C0').delete()
+        changed = self.tune()
+        self.assertEqual(changed['rounds'][0]['cached_folds'], 0)
+        self.assertNotEqual(changed['data_fingerprint'], first['data_fingerprint'])
+
+    def test_halving_keeps_the_best_third(self):
+        result = self.tune(search='halving', n_candidates=9)
+        self.assertEqual([round_['candidates'] for round_ in result['rounds']], [9, 3])
+        # Small populations are searched on every row, so survivors reuse their folds
+        self.assertEqual(result['rounds'][1]['cached_folds'], result['rounds'][1]['folds'])
+
+    def test_winners_are_recorded(self):
+        result = self.tune(dry_run=False)
+        performance = ModelPerformance.objects.get()
+        self.assertEqual(performance.model_version, result['search_version'])
+        self.assertEqual(performance.evaluation, 'search')
+        self.assertEqual(len(performance.fold_metrics), 2)
+        # Each of the two folds holds out half of the 60 customers
+        self.assertEqual(performance.test_data_size, 30)
+
+    def test_unknown_search(self):
+        with self.assertRaises(ValueError):
+            self.tune(search='grid')
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..validation import cross_validate, fold_splits
+
+
+class ValidationWorkerTests(SimpleTestCase):
+    def test_validation_imports_without_django(self):
+        env = {name: value for name, value in os.environ.items() if name != 'DJANGO_SETTINGS_MODULE'}
+        result = subprocess.run([sys.executable, '-c', 'import analytics.validation'], cwd=settings.BASE_DIR,
+                                env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_folds_run_in_worker_processes(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, 4))
+        y = (X[:, 0] > 0).astype(int)
+        result = cross_validate(X, y, 'classifier', 'random_forest', {'n_estimators': 5}, n_splits=2, n_jobs=2)
+        self.assertEqual(len(result['folds']), 2)
+        self.assertGreater(result['mean']['accuracy'], 0.5)
+
+    def test_time_series_folds_validate_on_later_rows(self):
+        for train, test in fold_splits(np.zeros(50), 'regressor', 3, 50, seed=0, scheme='time_series'):
+            self.assertLess(train.max(), test.min())
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            fold_splits(np.zeros(10), 'classifier', 2, 10, seed=0, scheme='bootstrap')
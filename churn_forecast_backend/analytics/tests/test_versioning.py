@@ -0,0 +1,82 @@
+from django.test import TestCase
+
+from .. import pipeline
+from ..models import ChurnPrediction, ModelVersion
+from ..versioning import activate_version, active_or_new_version, collect_old_versions, fail_version, start_version
+from .utils import create_customers
+
+
+class PredictionSwapTests(TestCase):
+    def setUp(self):
+        self.customer = create_customers(1)[0]
+
+    def write(self, probability, activate=True):
+        version = start_version('churn_prediction')
+        pipeline.write_predictions([self.customer.pk], [probability], ['Low'], version)
+        if activate:
+            activate_version(version)
+        return version
+
+    def test_active_returns_only_the_active_version(self):
+        first = self.write(0.1)
+        self.assertEqual(list(ChurnPrediction.objects.active().values_list('model_version', flat=True)),
+                         [first.version])
+        second = self.write(0.2)
+        self.assertEqual(list(ChurnPrediction.objects.active().values_list('churn_probability', flat=True)), [0.2])
+        first.refresh_from_db()
+        self.assertEqual(first.status, ModelVersion.STATUS_RETIRED)
+        self.assertEqual(ChurnPrediction.objects.filter(model_version=second.version).count(), 1)
+
+    def test_unfinished_versions_are_not_visible(self):
+        first = self.write(0.1)
+        building = self.write(0.5, activate=False)
+        self.assertEqual(list(ChurnPrediction.objects.active().values_list('model_version', flat=True)),
+                         [first.version])
+        fail_version(building)
+        self.assertEqual(ChurnPrediction.objects.active().count(), 1)
+
+    def test_collection_keeps_the_active_and_building_versions(self):
+        retired = self.write(0.1)
+        failed = self.write(0.2, activate=False)
+        fail_version(failed)
+        active = self.write(0.3)
+        building = self.write(0.4, activate=False)
+        self.assertEqual(collect_old_versions('churn_prediction', keep=1), 2)
+        self.assertEqual(
+            set(ChurnPrediction.objects.values_list('model_version', flat=True)),
+            {active.version, building.version}
+        )
+        self.assertTrue(ModelVersion.objects.filter(pk=retired.pk).exists())
+
+
+class CreatedPredictionTests(TestCase):
+    def setUp(self):
+        self.customer = create_customers(1)[0]
+
+    def create(self, **data):
+        response = self.client.post('/api/churn-predictions/', {
+            'customer': self.customer.pk, 'churn_probability': 0.7, 'risk_level': 'Medium', **data
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def test_created_predictions_join_the_active_version(self):
+        active = start_version('churn_prediction')
+        activate_version(active)
+        created = self.create(model_version='v1.0')
+        self.assertEqual(created['model_version'], active.version)
+        self.assertEqual(len(self.client.get('/api/churn-predictions/').json()), 1)
+
+    def test_a_version_is_activated_when_none_is_active(self):
+        created = self.create()
+        self.assertEqual(created['model_version'], active_or_new_version('churn_prediction').version)
+        self.assertEqual(ChurnPrediction.objects.active().count(), 1)
+        self.assertEqual(collect_old_versions('churn_prediction'), 0)
+
+    def test_created_predictions_are_replaced_by_the_next_scoring_run(self):
+        self.create()
+        scored = start_version('churn_prediction')
+        pipeline.write_predictions([self.customer.pk], [0.2], ['Low'], scored)
+        activate_version(scored)
+        self.assertEqual(collect_old_versions('churn_prediction'), 1)
+        self.assertEqual(list(ChurnPrediction.objects.values_list('model_version', flat=True)), [scored.version])
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import override_settings
+
+from .. import metrics, ml_models
+from ..models import Customer, Order, Product
+
+
+class ScratchFilesMixin:
+    """Point the model registry and metrics files at a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        self.scratch = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.scratch, ignore_errors=True)
+        overrides = override_settings(
+            ML_REGISTRY_DIR=os.path.join(self.scratch, 'registry'),
+            ML_TUNING_CACHE_DIR=os.path.join(self.scratch, 'tuning_cache'),
+            METRICS_DIR=os.path.join(self.scratch, 'metrics'),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patcher = mock.patch.object(metrics, 'store', metrics.MmapStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(ml_models.SERVED_MODELS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+def create_customers(count, seed=0):
+    """Customers with one order each, varied enough for both churn labels"""
+    rng = np.random.default_rng(seed)
+    product = Product.objects.create(product_id='P1', product_name='Jacket', category='Clothing', unit_price=40.0)
+    customers = []
+    for index in range(count):
+        customer = Customer.objects.create(
+            customer_id=f'C{index}', age=int(rng.integers(18, 70)), gender=['Male', 'Female'][index % 2],
+            country=['UK', 'USA', 'India'][index % 3], signup_date=date(2022, 1, 1),
+            last_purchase_date=date(2024, 1, 1) + timedelta(days=int(rng.integers(0, 300))),
+            cancellations_count=int(rng.integers(0, 6)), subscription_status=['active', 'paused'][index % 2],
+            purchase_frequency=int(rng.integers(1, 50)), ratings=float(rng.uniform(2, 5)),
+        )
+        Order.objects.create(order_id=f'O{index}', customer=customer, product=product, quantity=int(rng.integers(1, 9)),
+                             order_date=customer.last_purchase_date)
+        customers.append(customer)
+    return customers
+
+
+def sales_orders(seed=0):
+    """Orders of three products on irregular days over several months, some days with two orders"""
+    rng = np.random.default_rng(seed)
+    orders = []
+    for product_id, unit_price in (('A', 10.0), ('B', 25.0), ('C', 4.0)):
+        days = np.sort(rng.choice(120, size=30, replace=False))
+        for day in np.concatenate([days, days[::4]]):
+            orders.append({
+                'product_id': product_id, 'order_date': pd.Timestamp('2024-01-01') + pd.Timedelta(days=int(day)),
+                'quantity': int(rng.integers(1, 9)), 'unit_price': unit_price,
+            })
+    return pd.DataFrame(orders).sample(frac=1, random_state=seed, ignore_index=True)
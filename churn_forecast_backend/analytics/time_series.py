@@ -0,0 +1,200 @@
+"""
+Per-product time-series features for the sales model.
+
+A training row is one product's sales on one day. Besides the calendar and
+price it carries the product's own history: its last quantities (lags),
+rolling means over its last observations and its mean overall and in the
+same month (seasonality). History counts observations (days with sales)
+rather than calendar days and only ever looks back, so the features built
+over the whole order history in one grouped pass are the ones
+recursive_forecast builds step by step from its own predictions.
+"""
+import numpy as np
+import pandas as pd
+
+CALENDAR_FEATURES = ['year', 'month', 'day_of_week', 'day_of_year', 'unit_price']
+SALES_LAGS = (1, 2, 3, 7)
+SALES_WINDOWS = (7, 28)
+HISTORY_FEATURES = [
+    *(f'lag_{lag}' for lag in SALES_LAGS),
+    *(f'rolling_mean_{window}' for window in SALES_WINDOWS),
+    'history_length', 'days_since_last', 'product_mean', 'month_mean',
+]
+SALES_FEATURES = CALENDAR_FEATURES + HISTORY_FEATURES
+
+# Most recent observations per product the forecaster keeps
+HISTORY_DEPTH = max(*SALES_LAGS, *SALES_WINDOWS)
+
+
+def prior_mean(values, keys):
+    """Mean of the earlier values in each row's group, 0 for a group's first row"""
+    grouped = values.groupby(keys)
+    count = grouped.cumcount()
+    return ((grouped.cumsum() - values) / count.where(count > 0)).fillna(0.0)
+
+
+def add_history_features(sales_data):
+    """Add HISTORY_FEATURES to daily product sales sorted by product and date
+
+    Every feature is a grouped shift or cumulative sum over the frame, with
+    no Python loop over products.
+    """
+    product = sales_data['product_id']
+    quantity = sales_data['quantity'].astype(float)
+    by_product = quantity.groupby(product)
+
+    for lag in SALES_LAGS:
+        sales_data[f'lag_{lag}'] = by_product.shift(lag).fillna(0.0)
+
+    # Sum and number of the product's earlier observations; a window's sum
+    # is the difference between two of these running sums
+    count = by_product.cumcount()
+    before = by_product.cumsum() - quantity
+    for window in SALES_WINDOWS:
+        dropped = before.groupby(product).shift(window).fillna(0.0)
+        sales_data[f'rolling_mean_{window}'] = ((before - dropped) / count.clip(upper=window).where(count > 0)).fillna(0.0)
+
+    sales_data['history_length'] = count
+    previous_date = sales_data['order_date'].groupby(product).shift(1)
+    sales_data['days_since_last'] = (sales_data['order_date'] - previous_date).dt.days.fillna(0)
+    sales_data['product_mean'] = (before / count.where(count > 0)).fillna(0.0)
+    sales_data['month_mean'] = prior_mean(quantity, [product, sales_data['month']])
+    return sales_data
+
+
+class SalesHistory:
+    """Recent sales of a set of products, extended with forecasts step by step
+
+    Holds per product the last HISTORY_DEPTH quantities (oldest first, NaN
+    before the first observation) and running totals, all as arrays indexed
+    by product, so features for every product are built in one pass.
+    """
+
+    def __init__(self, product_ids, recent, count, total, month_total, month_count, last_date, unit_price):
+        self.product_ids = product_ids
+        self.recent = recent
+        self.count = count
+        self.total = total
+        self.month_total = month_total
+        self.month_count = month_count
+        self.last_date = last_date
+        self.unit_price = unit_price
+
+    @classmethod
+    def from_frame(cls, sales_data, product_ids=None, unit_prices=None):
+        """History of daily product sales, sorted by product and date
+
+        Args:
+            sales_data: Frame with product_id, order_date, quantity and unit_price
+            product_ids: Products to track, defaults to those in sales_data;
+                         products without sales start with an empty history
+            unit_prices: Prices to forecast at, defaults to each product's last price
+        """
+        if product_ids is None:
+            product_ids = sales_data['product_id'].unique().tolist()
+        n_products = len(product_ids)
+        codes = pd.Categorical(sales_data['product_id'], categories=product_ids).codes
+        sales_data = sales_data[codes >= 0]
+        codes = codes[codes >= 0]
+        quantity = sales_data['quantity'].to_numpy(dtype=float)
+        months = pd.to_datetime(sales_data['order_date']).dt.month.to_numpy() - 1
+
+        recent = np.full((n_products, HISTORY_DEPTH), np.nan)
+        from_end = sales_data.groupby('product_id').cumcount(ascending=False).to_numpy()
+        tail = from_end < HISTORY_DEPTH
+        recent[codes[tail], HISTORY_DEPTH - 1 - from_end[tail]] = quantity[tail]
+
+        month_total = np.zeros((n_products, 12))
+        month_count = np.zeros((n_products, 12))
+        np.add.at(month_total, (codes, months), quantity)
+        np.add.at(month_count, (codes, months), 1)
+
+        last = from_end == 0
+        last_date = np.full(n_products, np.datetime64('NaT'), dtype='datetime64[D]')
+        last_date[codes[last]] = pd.to_datetime(sales_data['order_date']).to_numpy()[last].astype('datetime64[D]')
+        if unit_prices is None:
+            unit_prices = np.zeros(n_products)
+            unit_prices[codes[last]] = sales_data['unit_price'].to_numpy(dtype=float)[last]
+
+        return cls(
+            product_ids=list(product_ids),
+            recent=recent,
+            count=np.bincount(codes, minlength=n_products).astype(float),
+            total=np.bincount(codes, weights=quantity, minlength=n_products).astype(float),
+            month_total=month_total,
+            month_count=month_count,
+            last_date=last_date,
+            unit_price=np.asarray(unit_prices, dtype=float),
+        )
+
+    def copy(self):
+        return SalesHistory(
+            list(self.product_ids), self.recent.copy(), self.count.copy(), self.total.copy(),
+            self.month_total.copy(), self.month_count.copy(), self.last_date.copy(), self.unit_price.copy()
+        )
+
+    def features(self, date):
+        """SALES_FEATURES for every product's next observation, on date"""
+        date = pd.Timestamp(date).normalize()
+        columns = [
+            np.full(len(self.product_ids), date.year, dtype=float),
+            np.full(len(self.product_ids), date.month, dtype=float),
+            np.full(len(self.product_ids), date.dayofweek, dtype=float),
+            np.full(len(self.product_ids), date.dayofyear, dtype=float),
+            self.unit_price,
+        ]
+        columns.extend(np.nan_to_num(self.recent[:, -lag]) for lag in SALES_LAGS)
+        for window in SALES_WINDOWS:
+            values = self.recent[:, -window:]
+            seen = (~np.isnan(values)).sum(axis=1)
+            columns.append(np.divide(np.nansum(values, axis=1), seen, out=np.zeros(len(seen)), where=seen > 0))
+        days = (np.datetime64(date.date(), 'D') - self.last_date).astype(np.int64)
+        month = date.month - 1
+        columns.extend([
+            self.count,
+            np.where(np.isnat(self.last_date), 0, days).astype(float),
+            np.divide(self.total, self.count, out=np.zeros(len(self.count)), where=self.count > 0),
+            np.divide(self.month_total[:, month], self.month_count[:, month], out=np.zeros(len(self.count)),
+                      where=self.month_count[:, month] > 0),
+        ])
+        return np.column_stack(columns)
+
+    def append(self, date, quantities):
+        """Record every product's quantity on date as its latest observation"""
+        date = pd.Timestamp(date).normalize()
+        self.recent[:, :-1] = self.recent[:, 1:]
+        self.recent[:, -1] = quantities
+        self.count += 1
+        self.total += quantities
+        self.month_total[:, date.month - 1] += quantities
+        self.month_count[:, date.month - 1] += 1
+        self.last_date[:] = np.datetime64(date.date(), 'D')
+
+
+def recursive_forecast(predict, history, dates, n_outputs=1):
+    """Forecast every product in history over dates, one step at a time
+
+    Each step predicts all products in one batch and feeds the point
+    predictions back as their latest observation, so the loop runs once per
+    date rather than once per product. history is extended in place.
+
+    Args:
+        predict: Callable mapping a SALES_FEATURES matrix to an array of
+                 shape (rows, outputs) whose first column is the point
+                 prediction (further columns, such as interval bounds, are
+                 passed through)
+        history: SalesHistory of the products to forecast
+        dates: Forecast dates, in order
+        n_outputs: Columns predict returns, the width of an empty forecast
+
+    Returns:
+        Array of non-negative outputs, shape (products, dates, outputs)
+    """
+    steps = []
+    for date in dates:
+        outputs = np.maximum(predict(history.features(date)), 0)
+        steps.append(outputs)
+        history.append(date, outputs[:, 0])
+    if not steps:
+        return np.empty((len(history.product_ids), 0, n_outputs))
+    return np.stack(steps, axis=1)
@@ -0,0 +1,97 @@
+"""
+Skipping fit stages whose input has not changed since the saved model.
+
+A fit stage fingerprints its input cheaply, with one aggregate query per
+source table (row count, latest updated_at, sums and date ranges of the
+columns the features are built from) hashed together with the training
+options, the settings that fill in their defaults and the feature schema.
+The fingerprint and result of the last fit are saved in the model type's
+registry directory (<ML_REGISTRY_DIR>/<name>/training.json); when a new
+run's fingerprint matches and that model is still the one served, the
+stored result is returned instead of refitting.
+"""
+import json
+import os
+
+import joblib
+from django.conf import settings
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from .features import FEATURE_SCHEMA_VERSION
+from .ml_models import CHURN_FEATURES
+from .models import Customer, Order, Product
+from .registry import current_version, model_root, write_json
+from .time_series import SALES_FEATURES
+
+# Per model type: (table, aggregates) whose values change with the input data
+FINGERPRINT_SOURCES = {
+    'churn_prediction': [
+        (Customer, {
+            'age': Sum('age'), 'cancellations': Sum('cancellations_count'),
+            'purchase_frequency': Sum('purchase_frequency'), 'ratings': Sum('ratings'),
+            'last_purchase': Max('last_purchase_date'),
+        }),
+        (Order, {'quantity': Sum('quantity'), 'last_order': Max('order_date')}),
+    ],
+    'sales_forecast': [
+        (Order, {'quantity': Sum('quantity'), 'first_order': Min('order_date'), 'last_order': Max('order_date')}),
+        (Product, {'unit_price': Sum('unit_price')}),
+    ],
+}
+
+
+def training_fingerprint(model_type, **options):
+    """Hash of a fit stage's input data and options
+
+    Args:
+        model_type: 'churn_prediction' or 'sales_forecast'
+        options: The fit stage's arguments that change the model (backend,
+                 params, mode, ...), None meaning the configured default
+    """
+    state = {
+        'model_type': model_type,
+        'options': options,
+        'defaults': {
+            name: getattr(settings, name)
+            for name in ('ML_TRAINING_BACKEND', 'ML_TRAINING_MEMORY_MB', 'ML_CV_FOLDS', 'ML_FORECAST_INTERVALS')
+        },
+        'features': CHURN_FEATURES if model_type == 'churn_prediction' else SALES_FEATURES,
+        'feature_schema': FEATURE_SCHEMA_VERSION,
+        'tables': [
+            model.objects.aggregate(rows=Count('pk'), updated=Max('updated_at'), **aggregates)
+            for model, aggregates in FINGERPRINT_SOURCES[model_type]
+        ],
+    }
+    if model_type == 'churn_prediction':
+        # Churn features count days up to today, so the model changes daily
+        state['today'] = timezone.localdate()
+    return joblib.hash(state)
+
+
+TRAINING_RECORD = 'training.json'
+
+
+def record_path(model_type):
+    return os.path.join(model_root(model_type), TRAINING_RECORD)
+
+
+def cached_training(model_type, fingerprint):
+    """Result of the last fit if it had this fingerprint and its model is still the one served"""
+    try:
+        with open(record_path(model_type)) as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if record['data_fingerprint'] != fingerprint:
+        return None
+    if record['result']['model_version'] != current_version(model_type):
+        return None
+    return record['result']
+
+
+def save_training_record(model_type, fingerprint, result):
+    """Remember a fit's fingerprint and result for later runs, replacing the file atomically"""
+    os.makedirs(model_root(model_type), exist_ok=True)
+    write_json(record_path(model_type), {'data_fingerprint': fingerprint, 'result': result},
+               default=lambda value: value.item() if hasattr(value, 'item') else str(value))
@@ -0,0 +1,198 @@
+import math
+
+import joblib
+import numpy as np
+from django.conf import settings
+from joblib import Memory, Parallel, delayed
+from sklearn.model_selection import ParameterSampler
+
+from .metrics import CACHE_REQUESTS
+from .pipeline import StageTimer, feature_matrix, fit_churn, fit_sales, record_performance, training_frame
+from .validation import evaluate_fold, fold_splits, summarize_folds
+from .versioning import new_model_version
+
+# Values sampled for each backend. The churn classifier and sales regressor
+# share a space; keys a backend's estimator does not accept are not listed.
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 0.5, 1.0],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_leaf_nodes': [15, 31, 63],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+    'sgd': {
+        'alpha': [1e-5, 1e-4, 1e-3, 1e-2],
+        'penalty': ['l2', 'l1', 'elasticnet'],
+    },
+}
+SEARCH_STRATEGIES = ('random', 'halving')
+
+# Per model type: estimator task and the metric candidates are ranked by
+TUNED_MODELS = {
+    'churn_prediction': {'task': 'classifier', 'score': 'f1_score'},
+    'sales_forecast': {'task': 'regressor', 'score': 'r2_score'},
+}
+
+# Successive halving keeps the best 1/HALVING_FACTOR candidates each round
+# and gives the survivors HALVING_FACTOR times more rows
+HALVING_FACTOR = 3
+MIN_HALVING_ROWS = 200
+
+
+def fold_cache():
+    """On-disk cache of fold results, shared by every worker process"""
+    return Memory(location=settings.ML_TUNING_CACHE_DIR, verbose=0)
+
+
+def data_fingerprint(X, y):
+    """Hash identifying the training data, so cached folds are only reused for the same rows"""
+    return joblib.hash((X, y))
+
+
+def sample_candidates(backends, n_candidates, seed):
+    """Random hyperparameter sets, spread evenly over the backends"""
+    candidates = []
+    per_backend = max(1, math.ceil(n_candidates / len(backends)))
+    for backend in backends:
+        if backend not in SEARCH_SPACES:
+            raise ValueError(f"No search space for backend '{backend}'. Use one of: {', '.join(SEARCH_SPACES)}")
+        for params in ParameterSampler(SEARCH_SPACES[backend], per_backend, random_state=seed):
+            candidates.append({'backend': backend, 'params': params})
+    return candidates
+
+
+def evaluate_candidates(candidates, X, y, fingerprint, task, score, cv, n_rows, seed, n_jobs):
+    """Cross-validate every candidate on the first n_rows, folds spread over a process pool"""
+    cached_evaluate = fold_cache().cache(evaluate_fold, ignore=['X', 'y', 'train_index', 'test_index'])
+    splits = fold_splits(y, task, cv, n_rows, seed)
+    tasks = [
+        (candidate, (*splits[fold], fingerprint, task, candidate['backend'], candidate['params'], fold, cv, n_rows, seed))
+        for candidate in candidates for fold in range(cv)
+    ]
+    cached = sum(cached_evaluate.check_call_in_cache(X, y, *args) for _, args in tasks)
+    results = Parallel(n_jobs=n_jobs)(delayed(cached_evaluate)(X, y, *args) for _, args in tasks)
+    CACHE_REQUESTS.inc(cached, cache='tuning_folds', result='hit')
+    CACHE_REQUESTS.inc(len(tasks) - cached, cache='tuning_folds', result='miss')
+
+    for candidate in candidates:
+        candidate['folds'] = []
+    for (candidate, _), result in zip(tasks, results):
+        candidate['folds'].append(result)
+    for candidate in candidates:
+        candidate['rows'] = n_rows
+        candidate['metrics'], _ = summarize_folds(candidate['folds'])
+        candidate['score'] = candidate['metrics'][score]
+    return cached, len(tasks)
+
+
+def tune_model(model_type, backends=None, search='random', n_candidates=10, cv=3, n_jobs=None,
+               seed=42, refit=False, dry_run=False, max_rows=None, chunk_size=None):
+    """Stage: hyperparameter search for the churn or sales model
+
+    Candidates are cross-validated on a process pool. Fold results are cached
+    on disk by (data fingerprint, backend, params, fold), so repeating or
+    widening a search over unchanged data only fits new work. The best
+    candidate per backend is recorded in ModelPerformance.
+
+    Args:
+        model_type: 'churn_prediction' or 'sales_forecast'
+        backends: Backends to search, defaults to ML_TRAINING_BACKEND
+        search: 'random' (every candidate on all rows) or 'halving'
+                (successive halving, starting all candidates on few rows)
+        n_candidates: Hyperparameter sets sampled in total
+        cv: Folds per candidate
+        n_jobs: Worker processes (-1 for all cores), defaults to ML_TRAINING_JOBS
+        refit: Train and save the overall winner with the fit stage
+        dry_run: Search without recording winners or refitting
+    """
+    if model_type not in TUNED_MODELS:
+        raise ValueError(f"Unknown model type '{model_type}'. Use one of: {', '.join(TUNED_MODELS)}")
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search '{search}'. Use one of: {', '.join(SEARCH_STRATEGIES)}")
+    spec = TUNED_MODELS[model_type]
+    backends = backends or [settings.ML_TRAINING_BACKEND]
+    n_jobs = settings.ML_TRAINING_JOBS if n_jobs is None else n_jobs
+
+    timer = StageTimer()
+    with timer.step('load_data'):
+        df, mode, population = training_frame(model_type, max_rows=max_rows, chunk_size=chunk_size)
+        X, y = feature_matrix(model_type, df)
+        # Shuffle once so any prefix is a random subset for halving rounds
+        order = np.random.default_rng(seed).permutation(len(X))
+        X, y = X[order], y[order]
+        fingerprint = data_fingerprint(X, y)
+
+    candidates = sample_candidates(backends, n_candidates, seed)
+    rounds = []
+    with timer.step('search'):
+        if search == 'halving':
+            n_rounds = max(1, math.ceil(math.log(len(candidates), HALVING_FACTOR)))
+            survivors = candidates
+            for remaining in reversed(range(n_rounds)):
+                # The last round always sees every row
+                n_rows = max(min(len(X), MIN_HALVING_ROWS), len(X) // HALVING_FACTOR ** remaining)
+                cached, total = evaluate_candidates(survivors, X, y, fingerprint, spec['task'], spec['score'],
+                                                    cv, n_rows, seed, n_jobs)
+                rounds.append({'candidates': len(survivors), 'rows': n_rows, 'folds': total, 'cached_folds': cached})
+                if remaining:
+                    survivors = sorted(survivors, key=lambda c: c['score'], reverse=True)
+                    survivors = survivors[:max(1, math.ceil(len(survivors) / HALVING_FACTOR))]
+            finalists = survivors
+        else:
+            cached, total = evaluate_candidates(candidates, X, y, fingerprint, spec['task'], spec['score'],
+                                                cv, len(X), seed, n_jobs)
+            rounds.append({'candidates': len(candidates), 'rows': len(X), 'folds': total, 'cached_folds': cached})
+            finalists = candidates
+
+    # Candidates that did not reach the last round were scored on fewer rows
+    full_rows = max(candidate['rows'] for candidate in finalists)
+    finalists = [candidate for candidate in finalists if candidate['rows'] == full_rows]
+    winners = {}
+    for candidate in sorted(finalists, key=lambda c: c['score'], reverse=True):
+        winners.setdefault(candidate['backend'], candidate)
+
+    search_version = new_model_version()
+    if not dry_run:
+        with timer.step('record'):
+            for winner in winners.values():
+                record_performance(model_type, search_version, {
+                    **winner['metrics'],
+                    # Rows each fold held out, not the rows searched over
+                    'test_size': round(np.mean([fold['test_size'] for fold in winner['folds']])),
+                    'backend': winner['backend'],
+                    'params': winner['params'],
+                }, training_seconds=winner['metrics']['fit_seconds'], evaluation='search',
+                   fold_metrics=winner['folds'])
+
+    best = max(winners.values(), key=lambda c: c['score'])
+    result = {
+        'search_version': search_version,
+        'model_type': model_type,
+        'search': search,
+        'training_mode': mode,
+        'population_rows': population,
+        'data_fingerprint': fingerprint,
+        'rounds': rounds,
+        'winners': [
+            {'backend': w['backend'], 'params': w['params'], 'score': w['score'], 'metrics': w['metrics']}
+            for w in winners.values()
+        ],
+        'best': {'backend': best['backend'], 'params': best['params'], 'score': best['score']},
+        'dry_run': dry_run,
+    }
+
+    if refit and not dry_run:
+        fit = fit_churn if model_type == 'churn_prediction' else fit_sales
+        with timer.step('refit'):
+            refit_result = fit(n_jobs=n_jobs, chunk_size=chunk_size, backend=best['backend'],
+                               params=best['params'], max_rows=max_rows)
+        result['refit'] = {'model_version': refit_result['model_version'], 'performance': refit_result['performance']}
+
+    result.update({'timings': timer.timings, 'seconds': timer.seconds})
+    return result
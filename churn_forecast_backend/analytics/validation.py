@@ -0,0 +1,101 @@
+"""
+Cross-validation folds evaluated in worker processes.
+
+This module must not import Django models: joblib's process pool unpickles
+evaluate_fold in fresh interpreters where Django is not set up.
+"""
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, precision_score, r2_score, recall_score
+from sklearn.model_selection import KFold, StratifiedKFold, TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .ml_models import build_estimator
+
+# kfold shuffles rows (stratified by class for classifiers); time_series
+# expects rows in time order and always validates on later rows than it
+# trains on
+CV_SCHEMES = ('kfold', 'time_series')
+
+
+def fold_metrics(task, y_true, y_pred):
+    if task == 'classifier':
+        return {
+            'accuracy': accuracy_score(y_true, y_pred),
+            'precision': precision_score(y_true, y_pred, zero_division=0),
+            'recall': recall_score(y_true, y_pred, zero_division=0),
+            'f1_score': f1_score(y_true, y_pred, zero_division=0),
+        }
+    return {'mse': mean_squared_error(y_true, y_pred), 'r2_score': r2_score(y_true, y_pred)}
+
+
+def fold_splits(y, task, n_splits, n_rows, seed, scheme='kfold'):
+    """(train, test) index pairs over the first n_rows, computed once and shared by every candidate"""
+    if scheme not in CV_SCHEMES:
+        raise ValueError(f"Unknown cross-validation scheme '{scheme}'. Use one of: {', '.join(CV_SCHEMES)}")
+    if scheme == 'time_series':
+        splitter = TimeSeriesSplit(n_splits=n_splits)
+    elif task == 'classifier':
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    else:
+        splitter = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(n_rows), y[:n_rows]))
+
+
+def evaluate_fold(X, y, train_index, test_index, fingerprint, task, backend, params, fold, n_splits, n_rows,
+                  seed, scheme='kfold'):
+    """Fit one candidate on one fold and score it on the held-out part
+
+    X, y and the fold indices are excluded from the cache key; fingerprint,
+    fold, n_splits, n_rows, seed and scheme determine them. Successive
+    halving rounds use the first n_rows of pre-shuffled data.
+    """
+    estimator, _ = build_estimator(task, backend, params, n_jobs=1)
+    model = make_pipeline(StandardScaler(), estimator)
+    start = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X[test_index])
+    score_seconds = time.perf_counter() - start
+
+    return {
+        **fold_metrics(task, y[test_index], y_pred),
+        'fold': fold,
+        'fit_seconds': fit_seconds,
+        'score_seconds': score_seconds,
+        'train_size': len(train_index),
+        'test_size': len(test_index),
+    }
+
+
+def summarize_folds(folds):
+    """Mean and standard deviation of each fold metric"""
+    keys = [key for key in folds[0] if key not in ('fold', 'train_size', 'test_size')]
+    return (
+        {key: float(np.mean([fold[key] for fold in folds])) for key in keys},
+        {key: float(np.std([fold[key] for fold in folds])) for key in keys},
+    )
+
+
+def cross_validate(X, y, task, backend, params, n_splits=5, scheme='kfold', n_jobs=None, seed=42):
+    """Cross-validate one configuration with its folds fitted in parallel
+
+    The feature matrix is built once by the caller and shared by every fold
+    (joblib memory-maps large arrays for the worker processes).
+
+    Returns:
+        Dict with the scheme, per-fold metrics and timings, and their mean/std
+    """
+    splits = fold_splits(y, task, n_splits, len(X), seed, scheme)
+    folds = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(X, y, train_index, test_index, None, task, backend, params,
+                               fold, n_splits, len(X), seed, scheme)
+        for fold, (train_index, test_index) in enumerate(splits)
+    )
+    mean, std = summarize_folds(folds)
+    return {'scheme': scheme, 'n_splits': n_splits, 'folds': folds, 'mean': mean, 'std': std}
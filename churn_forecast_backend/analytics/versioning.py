@@ -0,0 +1,122 @@
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import ChurnPrediction, ModelVersion
+
+# Rows written per model type, keyed by the ModelVersion.model_type they belong to
+VERSIONED_ROWS = {
+    'churn_prediction': ChurnPrediction,
+}
+
+
+def new_model_version():
+    """Generate a unique, time-ordered version string for a training or scoring run"""
+    return f"v{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def start_version(model_type, artifact_version=''):
+    """Register a version whose rows are about to be written"""
+    return ModelVersion.objects.create(
+        model_type=model_type,
+        version=new_model_version(),
+        artifact_version=artifact_version,
+        status=ModelVersion.STATUS_BUILDING
+    )
+
+
+def active_or_new_version(model_type):
+    """The active version that rows written outside a scoring run belong to
+
+    Registers and activates an empty version when none is active yet, so
+    rows created through the API are shown with the active set and
+    collected with it once a scoring run replaces it.
+    """
+    model_version = ModelVersion.objects.filter(model_type=model_type, status=ModelVersion.STATUS_ACTIVE).first()
+    if model_version is not None:
+        return model_version
+    try:
+        with transaction.atomic():
+            return ModelVersion.objects.create(
+                model_type=model_type,
+                version=new_model_version(),
+                status=ModelVersion.STATUS_ACTIVE,
+                activated_at=timezone.now()
+            )
+    except IntegrityError:
+        # Another request activated one first
+        return ModelVersion.objects.get(model_type=model_type, status=ModelVersion.STATUS_ACTIVE)
+
+
+def activate_version(model_version):
+    """Make a fully written version the one readers see, in one transaction
+
+    Readers filter on the active version, so they switch from the old rows to
+    the new ones atomically and never see a partially built set.
+    """
+    with transaction.atomic():
+        ModelVersion.objects.select_for_update().filter(
+            model_type=model_version.model_type,
+            status=ModelVersion.STATUS_ACTIVE
+        ).exclude(pk=model_version.pk).update(status=ModelVersion.STATUS_RETIRED)
+
+        model_version.status = ModelVersion.STATUS_ACTIVE
+        model_version.activated_at = timezone.now()
+        model_version.save(update_fields=['status', 'activated_at'])
+
+    return model_version
+
+
+def fail_version(model_version):
+    """Mark a version whose build did not finish so its rows get collected"""
+    ModelVersion.objects.filter(pk=model_version.pk).update(status=ModelVersion.STATUS_FAILED)
+
+
+def collect_old_versions(model_type, keep=None, batch_size=5000):
+    """Delete rows of retired and failed versions in small batches
+
+    Args:
+        model_type: ModelVersion.model_type whose rows to collect
+        keep: Number of most recently activated versions (including the active
+              one) whose rows are kept, defaults to settings.MODEL_VERSIONS_TO_KEEP
+        batch_size: Rows deleted per statement, to keep write locks short
+    """
+    if keep is None:
+        keep = getattr(settings, 'MODEL_VERSIONS_TO_KEEP', 1)
+    row_model = VERSIONED_ROWS[model_type]
+
+    kept = set(
+        ModelVersion.objects.filter(
+            model_type=model_type,
+            status__in=[ModelVersion.STATUS_ACTIVE, ModelVersion.STATUS_RETIRED]
+        ).order_by('-activated_at').values_list('version', flat=True)[:keep]
+    )
+    building = set(
+        ModelVersion.objects.filter(
+            model_type=model_type,
+            status=ModelVersion.STATUS_BUILDING
+        ).values_list('version', flat=True)
+    )
+    stale = row_model.objects.exclude(model_version__in=kept | building)
+
+    deleted = 0
+    while True:
+        ids = list(stale.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += row_model.objects.filter(pk__in=ids).delete()[0]
+    return deleted
+
+
+def collect_old_versions_in_background(model_type, keep=None):
+    """Run collect_old_versions on a daemon thread once the caller's transaction commits"""
+    def run():
+        try:
+            collect_old_versions(model_type, keep=keep)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
@@ -1,8 +1,10 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Avg, Sum, Case, When, Value
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek
 from django.db import models
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -16,6 +18,31 @@ from .serializers import (
     CustomerChurnDataSerializer, SalesForecastDataSerializer
 )
 from .ml_models import ChurnPredictionModel, SalesForecastModel
+from .exports import streaming_export, DEFAULT_CHUNK_SIZE
+from .routers import read_from_replica
+from .metrics import exposition
+from .versioning import active_or_new_version
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, totals summed over every worker process"""
+    return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def export_params(request):
+    """Read export format and chunk size from query params"""
+    export_format = request.GET.get('export_format', 'ndjson')
+    chunk_size = int(request.GET.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    return export_format, max(1, min(chunk_size, 50000))
+
+
+# Portable date bucketing for sales trends (DATE_TRUNC on PostgreSQL,
+# Django's date-trunc function on SQLite)
+TREND_GRANULARITIES = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -23,9 +50,10 @@ class CustomerViewSet(viewsets.ModelViewSet):
     serializer_class = CustomerSerializer
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def top_churn_risk(self, request):
         """Get top 10 customers with highest churn risk"""
-        predictions = ChurnPrediction.objects.filter(
+        predictions = ChurnPrediction.objects.active().filter(
             risk_level='High'
         ).order_by('-churn_probability')[:10]
         
@@ -33,10 +61,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def churn_analytics(self, request):
         """Get churn analytics and trends"""
         # Get churn rate trends
-        predictions = ChurnPrediction.objects.all()
+        predictions = ChurnPrediction.objects.active()
         
         # Calculate overall churn rate
         total_customers = Customer.objects.count()
@@ -88,6 +117,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def paginated_customers(self, request):
         """Get paginated customers with churn predictions"""
         page = int(request.GET.get('page', 1))
@@ -96,7 +126,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         country_filter = request.GET.get('country', None)
         
         # Build query
-        queryset = ChurnPrediction.objects.select_related('customer').all()
+        queryset = ChurnPrediction.objects.active().select_related('customer')
         
         if risk_filter:
             queryset = queryset.filter(risk_level=risk_filter)
@@ -129,6 +159,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     serializer_class = ProductSerializer
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def top_selling(self, request):
         """Get top 10 products with highest predicted sales"""
         # Get recent sales forecasts
@@ -140,6 +171,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def sales_analytics(self, request):
         """Get sales analytics and trends"""
         # Get sales trends
@@ -159,30 +191,106 @@ class ProductViewSet(viewsets.ModelViewSet):
             order_count=Count('id')
         ).order_by('-total_revenue')
         
-        # Monthly sales trend
-        monthly_sales = orders.extra(
-            select={'year_month': "strftime('%Y-%m', order_date)"}
-        ).values('year_month').annotate(
+        # Sales trend bucketed by week, month or quarter
+        granularity = request.GET.get('granularity', 'month')
+        if granularity not in TREND_GRANULARITIES:
+            return Response({
+                'error': f"Invalid granularity '{granularity}'. Use one of: {', '.join(TREND_GRANULARITIES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        sales_trend = list(Order.objects.annotate(
+            period=TREND_GRANULARITIES[granularity]('order_date')
+        ).values('period').annotate(
             total_quantity=Sum('quantity'),
             total_revenue=Sum('quantity') * Avg('product__unit_price')
-        ).order_by('year_month')
+        ).order_by('period'))
         
-        return Response({
+        response_data = {
             'sales_by_category': list(sales_by_category),
             'sales_by_country': list(sales_by_country),
-            'monthly_sales_trend': list(monthly_sales)
-        })
+            'granularity': granularity,
+            'sales_trend': sales_trend
+        }
+        if granularity == 'month':
+            # Keep the original monthly shape for existing clients
+            response_data['monthly_sales_trend'] = [
+                {
+                    'year_month': row['period'].strftime('%Y-%m'),
+                    'total_quantity': row['total_quantity'],
+                    'total_revenue': row['total_revenue']
+                }
+                for row in sales_trend
+            ]
+        
+        return Response(response_data)
 
 
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
 
+    @action(detail=False, methods=['get'])
+    @read_from_replica
+    def export(self, request):
+        """Stream all orders as NDJSON or CSV (?export_format=ndjson|csv)"""
+        try:
+            export_format, chunk_size = export_params(request)
+            return streaming_export(
+                Order.objects.order_by('pk'),
+                {
+                    'order_id': 'order_id',
+                    'customer_id': 'customer__customer_id',
+                    'product_id': 'product__product_id',
+                    'product_name': 'product__product_name',
+                    'category': 'product__category',
+                    'unit_price': 'product__unit_price',
+                    'quantity': 'quantity',
+                    'order_date': 'order_date',
+                },
+                'orders',
+                export_format=export_format,
+                chunk_size=chunk_size
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class ChurnPredictionViewSet(viewsets.ModelViewSet):
-    queryset = ChurnPrediction.objects.all()
+    queryset = ChurnPrediction.objects.active()
     serializer_class = ChurnPredictionSerializer
 
+    def perform_create(self, serializer):
+        # Readers only see the active version's rows
+        serializer.save(model_version=active_or_new_version('churn_prediction').version)
+
+    @action(detail=False, methods=['get'])
+    @read_from_replica
+    def export(self, request):
+        """Stream all churn predictions as NDJSON or CSV (?export_format=ndjson|csv)"""
+        try:
+            export_format, chunk_size = export_params(request)
+            queryset = ChurnPrediction.objects.active().order_by('pk')
+            risk_filter = request.GET.get('risk_level', None)
+            if risk_filter:
+                queryset = queryset.filter(risk_level=risk_filter)
+
+            return streaming_export(
+                queryset,
+                {
+                    'customer_id': 'customer__customer_id',
+                    'country': 'customer__country',
+                    'churn_probability': 'churn_probability',
+                    'risk_level': 'risk_level',
+                    'prediction_date': 'prediction_date',
+                    'model_version': 'model_version',
+                },
+                'churn_predictions',
+                export_format=export_format,
+                chunk_size=chunk_size
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class SalesForecastViewSet(viewsets.ModelViewSet):
     queryset = SalesForecast.objects.all()
@@ -0,0 +1,143 @@
+"""
+Mixed read/write concurrency benchmark for the configured database.
+
+Spawns worker processes (like gunicorn workers) that run dashboard-style
+aggregate reads alongside prediction bulk writes, then reports throughput,
+latency percentiles and lock errors. Point DATABASE_URL at the backend to
+test; scratch rows are written under model_version 'bench' and removed.
+
+    python benchmarks/db_concurrency.py --workers 4 --duration 10 --write-ratio 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'churn_forecast_backend.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+from django.db import connection, connections, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.db.utils import OperationalError
+
+from analytics.models import Customer, ChurnPrediction, Order
+
+BENCH_VERSION = 'bench'
+
+
+def read_op():
+    """Aggregates similar to churn_analytics and sales_analytics"""
+    list(ChurnPrediction.objects.values('risk_level').annotate(count=Count('id')))
+    list(ChurnPrediction.objects.values('customer__country').annotate(
+        total_customers=Count('id'),
+        high_risk=Count('id', filter=Q(risk_level='High'))
+    ))
+    list(Order.objects.values('product__category').annotate(
+        total_quantity=Sum('quantity'),
+        avg_price=Avg('product__unit_price')
+    ))
+
+
+def write_op(customer_ids, batch_size):
+    """Insert a batch of predictions the way the training endpoints do"""
+    with transaction.atomic():
+        ChurnPrediction.objects.bulk_create([
+            ChurnPrediction(
+                customer_id=random.choice(customer_ids),
+                churn_probability=random.random(),
+                risk_level='Low',
+                model_version=BENCH_VERSION
+            )
+            for _ in range(batch_size)
+        ])
+
+
+def worker(duration, write_ratio, batch_size, seed, results):
+    random.seed(seed)
+    connections.close_all()
+    customer_ids = list(Customer.objects.values_list('id', flat=True)[:5000])
+    latencies = {'read': [], 'write': []}
+    errors = 0
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        kind = 'write' if customer_ids and random.random() < write_ratio else 'read'
+        start = time.perf_counter()
+        try:
+            if kind == 'write':
+                write_op(customer_ids, batch_size)
+            else:
+                read_op()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies[kind].append(time.perf_counter() - start)
+
+    connection.close()
+    results.put({'latencies': latencies, 'errors': errors})
+
+
+def summarize(samples, duration):
+    if not samples:
+        return {'ops': 0, 'ops_per_sec': 0.0, 'p50_ms': None, 'p99_ms': None}
+    arr = np.array(samples) * 1000
+    return {
+        'ops': len(samples),
+        'ops_per_sec': round(len(samples) / duration, 1),
+        'p50_ms': round(float(np.percentile(arr, 50)), 2),
+        'p99_ms': round(float(np.percentile(arr, 99)), 2),
+    }
+
+
+def run(workers, duration, write_ratio, batch_size):
+    connections.close_all()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(duration, write_ratio, batch_size, seed, results))
+        for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    ChurnPrediction.objects.filter(model_version=BENCH_VERSION).delete()
+
+    reads = [lat for o in outcomes for lat in o['latencies']['read']]
+    writes = [lat for o in outcomes for lat in o['latencies']['write']]
+    return {
+        'vendor': connection.vendor,
+        'options': {key: str(value) for key, value in connection.settings_dict['OPTIONS'].items()},
+        'workers': workers,
+        'duration_seconds': duration,
+        'write_ratio': write_ratio,
+        'write_batch_size': batch_size,
+        'reads': summarize(reads, duration),
+        'writes': summarize(writes, duration),
+        'lock_errors': sum(o['errors'] for o in outcomes),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    args = parser.parse_args()
+
+    report = run(args.workers, args.duration, args.write_ratio, args.batch_size)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,115 @@
+"""
+Prediction latency of the compiled forest engine against sklearn.
+
+Loads the saved churn and sales models (train them first) and times, per
+call, the single-customer predict() path (against scoring a one-row pandas
+frame) and the bare model at each batch size, with the compiled engine and
+with sklearn. Batches are drawn from the stored customers and daily product
+sales. Reports p50/p99 in microseconds.
+
+    python benchmarks/inference_latency.py --batch-sizes 1 10 100 1000 10000 --output inference.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'churn_forecast_backend.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+import pandas as pd
+
+from analytics.features import customer_feature_frame
+from analytics.forest_engine import sklearn_predict
+from analytics.ml_models import ChurnPredictionModel, SalesForecastModel
+from analytics.models import Customer
+from analytics.sampling import daily_sales_frame
+
+
+def latencies(call, repeats):
+    """p50/p99 of call() in microseconds, after one warm-up call"""
+    call()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1e6
+    return {'p50_us': round(float(np.percentile(timings, 50)), 1), 'p99_us': round(float(np.percentile(timings, 99)), 1)}
+
+
+def report(row):
+    print(json.dumps(row))
+    return row
+
+
+def run(batch_sizes, repeats, seed=42):
+    churn_model = ChurnPredictionModel()
+    churn_model.load_model()
+    sales_model = SalesForecastModel()
+    sales_model.load_model()
+    if churn_model.engine is None or sales_model.engine is None:
+        raise SystemExit('Saved models have no compiled engine; retrain them with a random_forest backend')
+
+    df = customer_feature_frame(Customer.objects.all())
+    customers = [row.to_dict() for _, row in df.head(repeats).iterrows()]
+    X, _ = churn_model.prepare_features(df.copy())
+    X = X.to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    def customer():
+        return customers[next(position) % len(customers)]
+
+    results = []
+    engine = churn_model.engine
+    for label, model_engine in (('sklearn', None), ('engine', engine)):
+        churn_model.engine = model_engine
+        for path, call in (('predict()', lambda: churn_model.predict(customer())),
+                           ('one-row frame', lambda: churn_model.predict_proba_batch(pd.DataFrame([customer()])))):
+            position = iter(range(10 ** 9))
+            results.append(report({
+                'model': 'churn_prediction', 'path': path, 'inference': label, 'rows': 1,
+                **latencies(call, repeats),
+            }))
+    churn_model.engine = engine
+
+    # Feature rows of the stored daily sales, history features included
+    sales_X, _ = sales_model.training_data(daily_sales_frame())
+    sales_X = sales_X.to_numpy(dtype=np.float64)
+    for model_type, model, rows, column in (('churn_prediction', churn_model.model, X, 1),
+                                            ('sales_forecast', sales_model.model, sales_X, 0)):
+        scaler = churn_model.scaler if model_type == 'churn_prediction' else sales_model.scaler
+        compiled = churn_model.engine if model_type == 'churn_prediction' else sales_model.engine
+        for size in batch_sizes:
+            batch = rows[rng.integers(0, len(rows), size)]
+            assert np.array_equal(compiled.predict(batch)[:, column], sklearn_predict(model, scaler, batch)[:, column])
+            # Large batches are timed fewer times
+            batch_repeats = max(5, min(repeats, repeats * 100 // size))
+            for label, call in (('sklearn', lambda: sklearn_predict(model, scaler, batch)),
+                                ('engine', lambda: compiled.predict(batch))):
+                results.append(report({
+                    'model': model_type, 'path': 'model only', 'inference': label, 'rows': size,
+                    **latencies(call, batch_repeats),
+                }))
+
+    return {'repeats': repeats, 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    args = parser.parse_args()
+
+    report_data = run(args.batch_sizes, args.repeats, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report_data, f, indent=2)
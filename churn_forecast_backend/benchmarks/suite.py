@@ -0,0 +1,210 @@
+"""
+End-to-end benchmark of the data load, ML pipeline and API.
+
+Optionally loads synthetic data first (see synthetic_data.py), then times
+each pipeline stage on whatever the database holds: feature refresh, churn
+and sales training (always refitted, never served from the training cache),
+scoring every customer and forecasting the top products. Finally it measures
+p50/p99 latency of the dashboard and prediction endpoints through Django's
+test client, so the numbers include middleware and serialization but not
+the network.
+
+Training promotes new model versions and scoring replaces the stored
+predictions: point DATABASE_URL and ML_REGISTRY_DIR at scratch locations.
+Results are saved as JSON; --compare checks them against an earlier run and
+exits non-zero when a timing got worse than --tolerance allows. Each step
+prints one JSON line on stdout; PERFORMANCE_LOG_LEVEL=WARNING quiets the
+per-request log on stderr.
+
+    python benchmarks/suite.py --customers 1000000 --orders-per-customer 3 --replace --output bench.json
+    python benchmarks/suite.py --output after.json --compare bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'churn_forecast_backend.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from analytics.features import refresh_customer_features
+from analytics.models import Customer, Order, Product
+from analytics.pipeline import fit_churn, fit_sales, forecast_all, score_all, top_selling_products
+from benchmarks.synthetic_data import generate, load_database
+
+# (name, method, path); predict_churn's body is filled in with a stored customer
+ENDPOINTS = [
+    ('churn_analytics', 'get', '/api/customers/churn_analytics/'),
+    ('top_churn_risk', 'get', '/api/customers/top_churn_risk/'),
+    ('paginated_customers', 'get', '/api/customers/paginated_customers/?page=1&page_size=10'),
+    ('top_selling', 'get', '/api/products/top_selling/'),
+    ('sales_analytics', 'get', '/api/products/sales_analytics/'),
+    ('predict_churn', 'post', '/api/ml-training/predict_churn/'),
+    ('metrics', 'get', '/metrics'),
+]
+# Keys compared by --compare, and whether a larger value is worse
+LOWER_IS_BETTER = ('seconds', 'p50_ms', 'p99_ms')
+HIGHER_IS_BETTER = ('rows_per_second',)
+
+
+def report(name, row):
+    print(json.dumps({'step': name, **row}))
+    return row
+
+
+def throughput(rows, seconds):
+    return round(rows / seconds, 1) if seconds else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latencies(call, repeats):
+    """p50/p99 of call() in milliseconds, after one warm-up call that must succeed"""
+    response = call()
+    if response.status_code >= 400:
+        raise SystemExit(f'{response.status_code} from the warm-up request: {response.content[:200]!r}')
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return {'p50_ms': round(float(np.percentile(timings, 50)), 2), 'p99_ms': round(float(np.percentile(timings, 99)), 2)}
+
+
+def run(customers=None, orders_per_customer=1.0, products=None, replace=False, n_jobs=None, chunk_size=None,
+        cv=0, top_products=20, repeats=100, seed=42):
+    started_at = timezone.now()
+    steps = {}
+    if customers:
+        started = time.perf_counter()
+        counts = load_database(generate(customers, orders_per_customer, products, seed=seed), replace=replace)
+        seconds = time.perf_counter() - started
+        steps['load'] = report('load', {
+            **counts, 'seconds': round(seconds, 3),
+            'rows_per_second': throughput(counts['customers'] + counts['orders'], seconds),
+        })
+
+    started = time.perf_counter()
+    refreshed = refresh_customer_features(chunk_size=chunk_size)
+    seconds = time.perf_counter() - started
+    steps['refresh_features'] = report('refresh_features', {
+        'rows': refreshed, 'seconds': round(seconds, 3), 'rows_per_second': throughput(refreshed, seconds),
+    })
+
+    for name, fit in (('train_churn', fit_churn), ('train_sales', fit_sales)):
+        result = fit(n_jobs=n_jobs, chunk_size=chunk_size, cv=cv, force=True)
+        steps[name] = report(name, {
+            'model_version': result['model_version'], 'training_rows': result['training_rows'],
+            'training_mode': result['training_mode'], 'seconds': result['seconds'], 'timings': result['timings'],
+        })
+
+        if name == 'train_churn':
+            result = score_all(chunk_size=chunk_size, n_jobs=n_jobs)
+            steps['score'] = report('score', {
+                'rows': result['predictions_created'], 'seconds': result['seconds'],
+                'rows_per_second': throughput(result['predictions_created'], result['seconds']),
+                'timings': result['timings'],
+            })
+
+    result = forecast_all(products=top_selling_products(top_products), n_jobs=n_jobs)
+    steps['forecast'] = report('forecast', {
+        'products': result['products_forecasted'], 'rows': result['forecasts_generated'],
+        'seconds': result['seconds'], 'rows_per_second': throughput(result['forecasts_generated'], result['seconds']),
+        'timings': result['timings'],
+    })
+
+    client = Client()
+    customer_id = Customer.objects.values_list('customer_id', flat=True).first()
+    for name, method, path in ENDPOINTS:
+        if method == 'post':
+            call = lambda: client.post(path, {'customer_id': customer_id}, content_type='application/json')
+        else:
+            call = lambda: client.get(path)
+        steps[f'api.{name}'] = report(f'api.{name}', {'path': path, **latencies(call, repeats)})
+
+    return {
+        'environment': {
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'database': connection.vendor,
+            'started_at': started_at.isoformat(),
+        },
+        'data': {
+            'customers': Customer.objects.count(),
+            'products': Product.objects.count(),
+            'orders': Order.objects.count(),
+            'seed': seed,
+        },
+        'repeats': repeats,
+        'steps': steps,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Ratios of current to baseline timings, flagging those worse by more than tolerance"""
+    rows = []
+    for step, values in current['steps'].items():
+        previous = baseline['steps'].get(step, {})
+        for key in (*LOWER_IS_BETTER, *HIGHER_IS_BETTER):
+            if not values.get(key) or not previous.get(key):
+                continue
+            ratio = values[key] / previous[key]
+            worse = ratio > 1 + tolerance if key in LOWER_IS_BETTER else ratio < 1 / (1 + tolerance)
+            rows.append({'step': step, 'metric': key, 'baseline': previous[key], 'current': values[key],
+                         'ratio': round(ratio, 3), 'regression': worse})
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, default=None,
+                        help='Load this many synthetic customers first; without it the current data is used')
+    parser.add_argument('--orders-per-customer', type=float, default=1.0)
+    parser.add_argument('--products', type=int, default=None)
+    parser.add_argument('--replace', action='store_true',
+                        help='Allow replacing existing customers, products and orders with synthetic ones')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--cv', type=int, default=0, help='Cross-validation folds per training run')
+    parser.add_argument('--top-products', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=100, help='Requests timed per endpoint')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    parser.add_argument('--compare', help='Results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown before a step counts as a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    report_data = run(args.customers, args.orders_per_customer, args.products, args.replace, args.workers,
+                      args.chunk_size, args.cv, args.top_products, args.repeats, args.seed)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            report_data['comparison'] = compare(report_data, json.load(f), args.tolerance)
+        regressions = [row for row in report_data['comparison'] if row['regression']]
+        for row in regressions:
+            print(json.dumps(row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report_data, f, indent=2)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,187 @@
+"""
+Synthetic customers, products and orders scaled up from customer_data.csv.
+
+Customers are whole rows of the seed CSV resampled with replacement (so the
+joint distribution of age, gender, country, cancellations, status, purchase
+frequency and ratings is the seed's), with age jittered by a couple of years
+and both dates shifted together by up to a month. Products keep the seed's
+name/category pairs in the seed's proportions, with prices drawn from their
+category's seed prices. Each customer gets one order plus a Poisson number
+more, dated between signup and their last purchase, the latest one on the
+last purchase date as load_data.py does. Rows are generated and written in
+chunks, so millions of customers never sit in memory at once.
+
+Loading replaces every customer, product and order in the configured
+database; point DATABASE_URL at a scratch database.
+
+    python benchmarks/synthetic_data.py --customers 1000000 --orders-per-customer 3 --replace
+    python benchmarks/synthetic_data.py --customers 100000 --csv synthetic.csv
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'churn_forecast_backend.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from analytics.models import Customer, Order, Product
+
+SEED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'customer_data.csv')
+CUSTOMER_COLUMNS = [
+    'age', 'gender', 'country', 'signup_date', 'last_purchase_date', 'cancellations_count',
+    'subscription_status', 'purchase_frequency', 'Ratings',
+]
+CHUNK_CUSTOMERS = 100000
+BATCH_SIZE = 5000
+
+
+def load_seed(path=SEED_CSV):
+    seed = pd.read_csv(path)
+    for column in ('signup_date', 'last_purchase_date'):
+        seed[column] = pd.to_datetime(seed[column], format='mixed')
+    return seed
+
+
+def generate_products(seed, count, rng):
+    """Product catalog in the CSV's columns: seed name/category pairs, prices from the category's seed prices"""
+    # Cycling through a permutation of the seed rows keeps the category mix
+    picked = seed[['product_name', 'category']].iloc[np.resize(rng.permutation(len(seed)), count)]
+    picked = picked.reset_index(drop=True)
+    prices = np.empty(count)
+    for category, positions in picked.groupby('category').indices.items():
+        category_prices = seed.loc[seed['category'] == category, 'unit_price'].to_numpy()
+        prices[positions] = category_prices[rng.integers(0, len(category_prices), len(positions))]
+    picked['unit_price'] = np.round(prices * rng.uniform(0.95, 1.05, count), 2)
+    picked.insert(0, 'product_id', [f'PROD{index}' for index in range(count)])
+    return picked
+
+
+def generate_chunk(seed, products, start, count, orders_per_customer, rng, first_order=0):
+    """Customers start..start+count and their orders, in customer_data.csv's columns (one row per order)
+
+    Orders are numbered from first_order.
+    """
+    customers = seed[CUSTOMER_COLUMNS].iloc[rng.integers(0, len(seed), count)].reset_index(drop=True)
+    customers['age'] = np.clip(customers['age'] + rng.integers(-2, 3, count), seed['age'].min(), seed['age'].max())
+    shift = pd.to_timedelta(rng.integers(-30, 31, count), unit='D')
+    customers['signup_date'] += shift
+    customers['last_purchase_date'] += shift
+    customers.insert(0, 'customer_id', [f'CUST{index}' for index in range(start, start + count)])
+
+    n_orders = 1 + rng.poisson(max(orders_per_customer - 1, 0), count)
+    owner = np.repeat(np.arange(count), n_orders)
+    orders = customers.iloc[owner].reset_index(drop=True)
+    # Earlier orders fall between signup and the last purchase; each
+    # customer's first row is its last purchase
+    first = np.r_[0, np.cumsum(n_orders)[:-1]]
+    span = (orders['last_purchase_date'] - orders['signup_date']).dt.days.clip(lower=0).to_numpy()
+    days_before = np.floor(rng.random(len(orders)) * (span + 1)).astype(int)
+    days_before[first] = 0
+    orders['order_date'] = orders['last_purchase_date'] - pd.to_timedelta(days_before, unit='D')
+
+    product_rows = products.iloc[rng.integers(0, len(products), len(orders))].reset_index(drop=True)
+    orders = pd.concat([orders, product_rows], axis=1)
+    orders['quantity'] = seed['quantity'].to_numpy()[rng.integers(0, len(seed), len(orders))]
+    orders.insert(0, 'order_id', [f'ORD{index}' for index in range(first_order, first_order + len(orders))])
+    return orders
+
+
+def generate(customers, orders_per_customer=1.0, products=None, seed_path=SEED_CSV, seed=42,
+             chunk_size=CHUNK_CUSTOMERS):
+    """Yield (products, order rows) chunk by chunk; products is the same catalog every time"""
+    rng = np.random.default_rng(seed)
+    seed_df = load_seed(seed_path)
+    catalog = generate_products(seed_df, products or seed_df['product_id'].nunique(), rng)
+    first_order = 0
+    for start in range(0, customers, chunk_size):
+        orders = generate_chunk(seed_df, catalog, start, min(chunk_size, customers - start), orders_per_customer,
+                                rng, first_order)
+        first_order += len(orders)
+        yield catalog, orders
+
+
+def load_database(chunks, replace=False):
+    """Write generated chunks to the database, returning row counts
+
+    Refuses to touch a database that already holds customers unless replace.
+    """
+    if Customer.objects.exists() and not replace:
+        raise SystemExit('The database already has customers; pass --replace to overwrite them')
+    with transaction.atomic():
+        Order.objects.all().delete()
+        Customer.objects.all().delete()
+        Product.objects.all().delete()
+
+    product_pks = None
+    counts = {'customers': 0, 'products': 0, 'orders': 0}
+    for catalog, orders in chunks:
+        if product_pks is None:
+            created = Product.objects.bulk_create([
+                Product(product_id=row.product_id, product_name=row.product_name, category=row.category,
+                        unit_price=row.unit_price)
+                for row in catalog.itertuples()
+            ], batch_size=BATCH_SIZE)
+            product_pks = {product.product_id: product.pk for product in created}
+            counts['products'] = len(created)
+
+        customers = orders.drop_duplicates('customer_id')
+        with transaction.atomic():
+            created = Customer.objects.bulk_create([
+                Customer(
+                    customer_id=row.customer_id, age=row.age, gender=row.gender, country=row.country,
+                    signup_date=row.signup_date.date(), last_purchase_date=row.last_purchase_date.date(),
+                    cancellations_count=row.cancellations_count, subscription_status=row.subscription_status,
+                    purchase_frequency=row.purchase_frequency, ratings=row.Ratings
+                )
+                for row in customers.itertuples()
+            ], batch_size=BATCH_SIZE)
+            customer_pks = {customer.customer_id: customer.pk for customer in created}
+            Order.objects.bulk_create([
+                Order(
+                    order_id=row.order_id, customer_id=customer_pks[row.customer_id],
+                    product_id=product_pks[row.product_id], quantity=row.quantity,
+                    order_date=row.order_date.date()
+                )
+                for row in orders.itertuples()
+            ], batch_size=BATCH_SIZE)
+        counts['customers'] += len(created)
+        counts['orders'] += len(orders)
+    return counts
+
+
+def write_csv(chunks, path):
+    """Write generated chunks to a CSV in customer_data.csv's layout"""
+    rows = 0
+    for index, (_, orders) in enumerate(chunks):
+        orders.to_csv(path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+        rows += len(orders)
+    return {'orders': rows}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, required=True)
+    parser.add_argument('--orders-per-customer', type=float, default=1.0,
+                        help='Mean orders per customer, at least 1 (the seed CSV has one each)')
+    parser.add_argument('--products', type=int, default=None,
+                        help='Catalog size (defaults to the seed CSV\'s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--csv', help='Write a CSV in customer_data.csv\'s layout instead of loading the database')
+    parser.add_argument('--replace', action='store_true',
+                        help='Delete the existing customers, products and orders first')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    chunks = generate(args.customers, args.orders_per_customer, args.products, seed=args.seed)
+    counts = write_csv(chunks, args.csv) if args.csv else load_database(chunks, replace=args.replace)
+    print(json.dumps({**counts, 'seconds': round(time.perf_counter() - started, 2)}))
@@ -0,0 +1,115 @@
+"""
+Fit time and model quality of the estimator backends at increasing data sizes.
+
+Customers and orders from the configured database are resampled (with a
+little noise) up to each requested size, then every backend is trained on the
+same frame without saving artifacts. Churn reports accuracy/F1, sales R².
+
+    python benchmarks/training_backends.py --sizes 10000 100000 1000000 --output training.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'churn_forecast_backend.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+import pandas as pd
+
+from analytics.features import customer_feature_frame
+from analytics.ml_models import ESTIMATOR_BACKENDS, ChurnPredictionModel, SalesForecastModel
+from analytics.models import Customer, Order
+
+# (label, backend, n_jobs) combinations measured at every size
+CONFIGURATIONS = [
+    ('random_forest/1 core', 'random_forest', 1),
+    ('random_forest/all cores', 'random_forest', -1),
+    *[(backend, backend, -1) for backend in ESTIMATOR_BACKENDS if backend != 'random_forest'],
+]
+
+ORDER_FIELDS = {
+    'order_id': 'order_id',
+    'product_id': 'product__product_id',
+    'product_name': 'product__product_name',
+    'category': 'product__category',
+    'unit_price': 'product__unit_price',
+    'quantity': 'quantity',
+    'order_date': 'order_date',
+}
+
+
+def order_frame(orders, chunk_size=None):
+    """Orders with their product columns, the seed the sales benchmarks resample"""
+    rows = orders.values_list(*ORDER_FIELDS.values()).order_by('pk')
+    return pd.DataFrame.from_records(rows.iterator(chunk_size=chunk_size or 10000), columns=list(ORDER_FIELDS))
+
+
+def resample_customers(seed_df, size, rng):
+    df = seed_df.sample(n=size, replace=True, random_state=rng.integers(2**31)).reset_index(drop=True)
+    df['age'] = np.clip(df['age'] + rng.integers(-3, 4, size), 18, 90)
+    df['purchase_frequency'] = np.clip(df['purchase_frequency'] + rng.integers(-2, 3, size), 0, None)
+    df['last_purchase_date'] = pd.to_datetime(df['last_purchase_date']) + pd.to_timedelta(rng.integers(-30, 31, size), unit='D')
+    return df
+
+
+def resample_orders(seed_df, size, rng):
+    df = seed_df.sample(n=size, replace=True, random_state=rng.integers(2**31)).reset_index(drop=True)
+    df['order_date'] = pd.to_datetime(df['order_date']) + pd.to_timedelta(rng.integers(-90, 91, size), unit='D')
+    df['quantity'] = np.clip(df['quantity'] + rng.integers(-1, 2, size), 1, None)
+    return df
+
+
+def time_fit(model_class, df, backend, n_jobs):
+    model = model_class()
+    start = time.perf_counter()
+    performance = model.train(df, n_jobs=n_jobs, save=False, backend=backend)
+    return round(time.perf_counter() - start, 3), performance
+
+
+def run(sizes, seed=42):
+    rng = np.random.default_rng(seed)
+    customers = customer_feature_frame(Customer.objects.all())
+    orders = order_frame(Order.objects.all())
+    if customers.empty or orders.empty:
+        raise SystemExit('Load customers and orders first (python setup_database.py)')
+
+    results = []
+    for size in sizes:
+        churn_df = resample_customers(customers, size, rng)
+        sales_df = resample_orders(orders, size, rng)
+        for label, backend, n_jobs in CONFIGURATIONS:
+            churn_seconds, churn = time_fit(ChurnPredictionModel, churn_df, backend, n_jobs)
+            sales_seconds, sales = time_fit(SalesForecastModel, sales_df, backend, n_jobs)
+            row = {
+                'rows': size,
+                'configuration': label,
+                'churn_fit_seconds': churn_seconds,
+                'churn_accuracy': round(churn['accuracy'], 4),
+                'churn_f1': round(churn['f1_score'], 4),
+                'sales_fit_seconds': sales_seconds,
+                'sales_r2': round(sales['r2_score'], 4),
+            }
+            print(json.dumps(row))
+            results.append(row)
+
+    return {'cpu_count': os.cpu_count(), 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,157 @@
+"""
+How training on a sample or in mini-batches trades accuracy for time.
+
+Customers and orders from the configured database are resampled up to
+--population rows. A fixed 20% of that population (of products, for sales)
+is held out; the rest is used in full, as samples of each
+--sample-sizes (stratified by churn label, or of whole product histories,
+picked by the same seeded key the training stages sort by in SQL),
+and streamed in --chunk-size batches to the incremental backend. Every
+model is scored on the same holdout.
+
+    python benchmarks/training_sampling.py --population 1000000 --sample-sizes 10000 100000 --output sampling.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.training_backends import order_frame, resample_customers, resample_orders
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, r2_score
+
+from analytics.features import customer_feature_frame
+from analytics.ml_models import ChurnPredictionModel, SalesForecastModel
+from analytics.models import Customer, Order
+from analytics.sampling import frames_from_rows, proportional_quotas, sample_keys
+
+def churn_labels(df):
+    return ((df['cancellations_count'] > 2) | (df['purchase_frequency'] < 5) | (df['ratings'] < 3.0)).astype(int)
+
+
+def sample_frame(df, size, strata, seed):
+    """Stratified sample of a frame, rows ranked per stratum by the key sample_customer_frame uses in SQL"""
+    quotas = proportional_quotas(strata.value_counts().to_dict(), size)
+    rank = pd.Series(sample_keys(np.arange(len(df)), seed), index=strata.index).groupby(strata).rank(method='first')
+    return df[rank <= strata.map(quotas).fillna(0)].reset_index(drop=True)
+
+
+def sample_products(df, size, seed):
+    """Sample of whole product histories, about size rows, picked as sample_sales_frame does"""
+    products = df['product_id'].unique()
+    quota = max(1, size * len(products) // len(df))
+    sampled = products[np.argsort(sample_keys(np.arange(len(products)), seed), kind='stable')[:quota]]
+    return df[df['product_id'].isin(sampled)].reset_index(drop=True)
+
+
+def chunked(df, chunk_size, group=None):
+    """Frames of about chunk_size rows, never splitting a group's rows"""
+    if group is None:
+        return lambda: (df.iloc[start:start + chunk_size].copy() for start in range(0, len(df), chunk_size))
+    return lambda: frames_from_rows(df.itertuples(index=False), list(df.columns), chunk_size,
+                                    group_of=lambda row: getattr(row, group))
+
+
+def evaluate_churn(model, holdout):
+    y_pred = (model.predict_proba_batch(holdout) >= 0.5).astype(int)
+    y_true = churn_labels(holdout)
+    return {'accuracy': round(accuracy_score(y_true, y_pred), 4), 'f1': round(f1_score(y_true, y_pred), 4)}
+
+
+def evaluate_sales(model, holdout):
+    X, y = model.training_data(holdout)
+    y_pred = model.model.predict(model.scaler.transform(X))
+    return {'r2': round(r2_score(y, y_pred), 4)}
+
+
+def timed(train):
+    start = time.perf_counter()
+    model = train()
+    return model, round(time.perf_counter() - start, 3)
+
+
+def fit(model, df):
+    model.train(df, save=False)
+    return model
+
+
+def incremental(model, frames, *args):
+    model.train_incremental(frames, *args, save=False)
+    return model
+
+
+def report(label, churn_rows, churn_seconds, churn_scores, sales_rows, sales_seconds, sales_scores):
+    row = {
+        'training': label,
+        'churn_rows': churn_rows,
+        'churn_fit_seconds': churn_seconds,
+        **{f'churn_{key}': value for key, value in churn_scores.items()},
+        'sales_rows': sales_rows,
+        'sales_fit_seconds': sales_seconds,
+        **{f'sales_{key}': value for key, value in sales_scores.items()},
+    }
+    print(json.dumps(row))
+    return row
+
+
+def run(population, sample_sizes, chunk_size, seed=42):
+    rng = np.random.default_rng(seed)
+    customers = resample_customers(customer_feature_frame(Customer.objects.all()), population, rng)
+    orders = resample_orders(order_frame(Order.objects.all()), population, rng)
+    split = int(population * 0.8)
+    churn_train, churn_holdout = customers.iloc[:split], customers.iloc[split:]
+    # Aggregate first so sales rows are at training grain, as fit_sales does
+    daily = SalesForecastModel().prepare_sales_data(orders)[['product_id', 'order_date', 'quantity', 'unit_price']]
+    # Hold out whole products so history features only see a product's own days
+    products = daily['product_id'].unique()
+    rng.shuffle(products)
+    holdout_products = products[int(len(products) * 0.8):]
+    is_holdout = daily['product_id'].isin(holdout_products)
+    sales_train, sales_holdout = daily[~is_holdout].reset_index(drop=True), daily[is_holdout].reset_index(drop=True)
+
+    churn_strata = churn_labels(churn_train)
+
+    runs = [('full', len(churn_train), len(sales_train), lambda: churn_train, lambda: sales_train)]
+    for size in sample_sizes:
+        runs.append((
+            f'sample {size}', size, size,
+            lambda size=size: sample_frame(churn_train, size, churn_strata, seed),
+            lambda size=size: sample_products(sales_train, size, seed)
+        ))
+
+    results = []
+    for label, churn_rows, sales_rows, churn_frame, sales_frame in runs:
+        churn_model, churn_seconds = timed(lambda: fit(ChurnPredictionModel(), churn_frame()))
+        sales_model, sales_seconds = timed(lambda: fit(SalesForecastModel(), sales_frame()))
+        results.append(report(label, churn_rows, churn_seconds, evaluate_churn(churn_model, churn_holdout),
+                              sales_rows, sales_seconds, evaluate_sales(sales_model, sales_holdout)))
+
+    categories = {col: churn_train[col].unique().tolist() for col in ('gender', 'country', 'subscription_status')}
+    churn_model, churn_seconds = timed(lambda: incremental(ChurnPredictionModel(), chunked(churn_train, chunk_size), categories))
+    sales_model, sales_seconds = timed(lambda: incremental(SalesForecastModel(),
+                                                           chunked(sales_train, chunk_size, group='product_id')))
+    results.append(report(f'incremental sgd ({chunk_size}/batch)', len(churn_train), churn_seconds,
+                          evaluate_churn(churn_model, churn_holdout), len(sales_train), sales_seconds,
+                          evaluate_sales(sales_model, sales_holdout)))
+
+    return {'population': population, 'holdout_fraction': 0.2, 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--population', type=int, default=1000000)
+    parser.add_argument('--sample-sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    args = parser.parse_args()
+
+    report_data = run(args.population, args.sample_sizes, args.chunk_size, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report_data, f, indent=2)
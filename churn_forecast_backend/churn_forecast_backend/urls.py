@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from analytics.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('analytics.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
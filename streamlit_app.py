@@ -603,11 +603,15 @@ def show_model_training_page():
         st.markdown("### Churn Prediction Model")
         st.markdown("Train the machine learning model to predict customer churn.")
         
+        force_churn = st.checkbox("Force retrain", key="force_churn",
+                                  help="Retrain even if the data has not changed since the last training")
         if st.button("🚀 Train Churn Model", key="train_churn"):
             with st.spinner("Training churn prediction model..."):
-                result = make_api_request("ml-training/train_churn_model/", method="POST")
+                result = make_api_request("ml-training/train_churn_model/", method="POST", data={'force': force_churn})
                 if result:
                     st.success("Churn model trained successfully!")
+                    if result.get('cached'):
+                        st.info("Data unchanged since the last training; reused the saved model.")
                     
                     # Display performance metrics
                     performance = result.get('performance', {})
@@ -628,11 +632,15 @@ def show_model_training_page():
         st.markdown("### Sales Forecasting Model")
         st.markdown("Train the machine learning model to forecast sales.")
         
+        force_sales = st.checkbox("Force retrain", key="force_sales",
+                                  help="Retrain even if the data has not changed since the last training")
         if st.button("🚀 Train Sales Model", key="train_sales"):
             with st.spinner("Training sales forecasting model..."):
-                result = make_api_request("ml-training/train_sales_model/", method="POST")
+                result = make_api_request("ml-training/train_sales_model/", method="POST", data={'force': force_sales})
                 if result:
                     st.success("Sales model trained successfully!")
+                    if result.get('cached'):
+                        st.info("Data unchanged since the last training; reused the saved model.")
                     
                     # Display performance metrics
                     performance = result.get('performance', {})